@@ -0,0 +1,232 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats():
+    """Статистика кэша"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # текущий объем кэша в байтах и количество записей
+    bytes: int = 0
+    entries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля обращений, найденных в кэше"""
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class SliceCache():
+    """
+    LRU-кэш прочитанных срезов данных с ограничением по объему памяти
+
+    Параметры:
+    ----------
+    max_bytes: int
+        максимальный суммарный объем хранимых массивов в байтах; массивы больше этого
+        объема не кэшируются
+
+    Примеры использования:
+    ----------------------
+    >>> cache = SliceCache(256 * 2**20)
+    >>> array = cache.get(key)
+    >>> if array is None:
+    ...     array = cache.put(key, readArray())
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Инициализация"""
+        self.max_bytes: int = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._stats: CacheStats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    @property
+    def stats(self) -> CacheStats:
+        """Возвращает статистику кэша"""
+        self._stats.entries = len(self._entries)
+        return self._stats
+
+    def get(self, key: tuple) -> np.ndarray | None:
+        """Возвращает массив по ключу 'key' или None, если его нет в кэше"""
+        array = self._entries.get(key)
+
+        if array is None:
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return array
+
+    def put(self, key: tuple, array: np.ndarray) -> np.ndarray:
+        """
+        Сохраняет массив в кэш, вытесняя давно не использовавшиеся массивы, и возвращает его
+
+        Сохраненный массив доступен только для чтения, так как он может использоваться
+        несколькими вызывающими
+        """
+        array = np.asarray(array)
+        array.flags.writeable = False
+
+        if array.nbytes > self.max_bytes:
+            return array
+
+        if key in self._entries:
+            self._stats.bytes -= self._entries.pop(key).nbytes
+
+        self._entries[key] = array
+        self._stats.bytes += array.nbytes
+
+        while self._stats.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._stats.bytes -= evicted.nbytes
+            self._stats.evictions += 1
+
+        return array
+
+    def clear(self) -> None:
+        """Очищает кэш, сохраняя счетчики обращений"""
+        self._entries.clear()
+        self._stats.bytes = 0
+
+
+class ResultCache():
+    """
+    Кэш результатов расчета на локальном диске с ограничением по объему
+
+    Каждый результат хранится в отдельном файле .npy, имя которого - хэш ключа  (см.
+    makeKey). При превышении 'max_bytes' удаляются файлы, к которым дольше всего  не
+    обращались (время обращения хранится во времени модификации файла и  учитывается
+    при следующем открытии кэша)
+
+    Параметры:
+    ----------
+    directory: str
+        каталог кэша
+    max_bytes: int
+        максимальный суммарный объем файлов кэша в байтах
+
+    Примеры использования:
+    ----------------------
+    >>> cache = ResultCache("../balance_cache", 2**30)
+    >>> calculator = BalanceCalculator(result_cache=cache)
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """Инициализация"""
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self._stats: CacheStats = CacheStats()
+
+        # размеры файлов кэша в порядке давности обращения; каталог просматривается  только
+        # при открытии кэша, дальше объем ведется по записям и удалениям этого объекта
+        self._files: OrderedDict[str, int] = OrderedDict()
+        for path, size, _ in sorted(self._listFiles(), key=lambda file: file[2]):
+            self._files[path] = size
+        self._stats.bytes = sum(self._files.values())
+
+    @property
+    def stats(self) -> CacheStats:
+        """Возвращает статистику кэша"""
+        self._stats.entries = len(self._files)
+        return self._stats
+
+    @staticmethod
+    def makeKey(**fields) -> str:
+        """Возвращает ключ результата по описывающим его полям"""
+        description = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def _listFiles(self) -> list[tuple[str, int, float]]:
+        """Возвращает (путь, размер, время обращения) всех файлов кэша"""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _track(self, path: str, size: int) -> None:
+        """Учитывает файл кэша как использованный последним"""
+        self._stats.bytes += size - self._files.pop(path, 0)
+        self._files[path] = size
+
+    def _forget(self, path: str) -> None:
+        """Исключает файл кэша из учета"""
+        self._stats.bytes -= self._files.pop(path, 0)
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Возвращает результат по ключу 'key' или None, если его нет в кэше"""
+        path = self._path(key)
+
+        try:
+            array = np.load(path, allow_pickle=False)
+            os.utime(path)
+            size = os.path.getsize(path)
+        except (OSError, ValueError):
+            self._forget(path)
+            self._stats.misses += 1
+            return None
+
+        # файл мог быть записан другим процессом
+        self._track(path, size)
+        self._stats.hits += 1
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """Сохраняет результат в кэш, удаляя давно не использовавшиеся результаты"""
+        array = np.asarray(array)
+        if array.nbytes > self.max_bytes:
+            return None
+
+        # запись во временный файл, чтобы другие процессы не прочитали неполный результат
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, array)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+
+        self._track(path, size)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет давно не использовавшиеся файлы, пока объем кэша больше 'max_bytes'"""
+        while self._stats.bytes > self.max_bytes and self._files:
+            path = next(iter(self._files))
+            self._forget(path)
+
+            try:
+                os.remove(path)
+            except OSError:
+                # файл уже удален другим процессом
+                continue
+
+            self._stats.evictions += 1
+
+    def clear(self) -> None:
+        """Очищает кэш, сохраняя счетчики обращений"""
+        for path, _, _ in self._listFiles():
+            os.remove(path)
+
+        self._files.clear()
+        self._stats.bytes = 0
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import struct
+import zipfile
 import numpy as np
 import pandas as pd
 import h5netcdf
 
 from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
+
+from src.constants import CELL_LENGTH_METERS
 
 
 class Region:
@@ -100,6 +105,131 @@ class Region:
         return self.regionAroundCenter(self.center, height, width)
     
 
+class RegionSet:
+    """
+    Набор регионов в одном массиве (N, 4) со столбцами down, up, left, right
+
+    Операции выполняются над всеми регионами сразу и совпадают с  операциями  Region:
+    координаты хранятся в float32, промежуточные расчеты - в float64
+
+    Примеры использования:
+    ----------------------
+    >>> regions = RegionSet.fromRegions([region]).centralize(heights, widths)
+    >>> lattice = regions.shiftLattice(lat_shifts, lon_shifts)
+    >>> ids = lattice.snapIds(grid)
+    """
+
+    def __init__(self, coords: np.ndarray) -> None:
+        """Инициализация"""
+        self.coords: np.ndarray = np.asarray(coords, dtype=np.float32).reshape(-1, 4)
+
+    def __len__(self) -> int:
+        return self.coords.shape[0]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({len(self)} regions)"
+
+    def __getitem__(self, key) -> Region | RegionSet:
+        """Возвращает регион по индексу или набор регионов по срезу или массиву индексов"""
+        if isinstance(key, (int, np.integer)):
+            return Region(*map(float, self.coords[key]))
+        return RegionSet(self.coords[key])
+
+    @classmethod
+    def fromRegions(cls, regions: list[Region]) -> RegionSet:
+        """Создает набор из списка регионов"""
+        coords = np.array([(region.down, region.up, region.left, region.right) for region in regions])
+        return cls(coords)
+
+    def toRegions(self) -> list[Region]:
+        """Возвращает регионы набора в виде списка Region"""
+        return [Region(*coords) for coords in self.coords.tolist()]
+
+    @property
+    def down(self) -> np.ndarray:
+        return self.coords[:, 0]
+
+    @property
+    def up(self) -> np.ndarray:
+        return self.coords[:, 1]
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.coords[:, 2]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.coords[:, 3]
+
+    @property
+    def height(self) -> np.ndarray:
+        return np.abs(self.up.astype(np.float64) - self.down)
+
+    @property
+    def width(self) -> np.ndarray:
+        return np.abs(self.left.astype(np.float64) - self.right)
+
+    @property
+    def center(self) -> np.ndarray:
+        """Возвращает центры регионов, массив (N, 2) со столбцами широта, долгота"""
+        return self.coords.reshape(-1, 2, 2).mean(axis=2)
+
+    def shift(self, lat_shift: np.ndarray | float, lon_shift: np.ndarray | float) -> RegionSet:
+        """Сдвигает регионы на 'lat_shift' по широте и 'lon_shift' по долготе (как Region.addCoords)"""
+        lat_shift = np.asarray(lat_shift, dtype=np.float64)
+        lon_shift = np.asarray(lon_shift, dtype=np.float64)
+
+        shifts = np.stack(np.broadcast_arrays(lat_shift, lat_shift, lon_shift, lon_shift), axis=-1)
+        return RegionSet(self.coords + shifts)
+
+    def shiftLattice(self, lat_shifts: np.ndarray, lon_shifts: np.ndarray) -> RegionSet:
+        """
+        Сдвигает каждый регион на все сочетания сдвигов;  порядок  результата  -  (регион,
+        сдвиг широты, сдвиг долготы)
+        """
+        lat_shifts, lon_shifts = np.meshgrid(lat_shifts, lon_shifts, indexing="ij")
+
+        shifted = RegionSet(np.repeat(self.coords, lat_shifts.size, axis=0))
+        return shifted.shift(np.tile(lat_shifts.ravel(), len(self)), np.tile(lon_shifts.ravel(), len(self)))
+
+    def centralize(self, heights: np.ndarray | float, widths: np.ndarray | float) -> RegionSet:
+        """
+        Создает регионы высотой 'heights' и шириной 'widths' с центрами в центрах регионов
+        набора (как Region.centralizeRegion)
+        """
+        half_heights = np.asarray(heights, dtype=np.float64) / 2
+        half_widths = np.asarray(widths, dtype=np.float64) / 2
+        central_lat, central_lon = self.center.T
+
+        coords = np.stack(np.broadcast_arrays(
+            central_lat - half_heights,
+            central_lat + half_heights,
+            central_lon - half_widths,
+            central_lon + half_widths,
+        ), axis=-1)
+        return RegionSet(coords)
+
+    def resize(self, height_delta: np.ndarray | float, width_delta: np.ndarray | float) -> RegionSet:
+        """Изменяет высоту и ширину регионов на 'height_delta' и 'width_delta', сохраняя центры"""
+        return self.centralize(self.height + height_delta, self.width + width_delta)
+
+    def snapIds(self, grid: Grid) -> np.ndarray:
+        """Рассчитывает индексы регионов на сетке, массив (N, 4) (см. GridIndex.snapIds)"""
+        return grid.index.snapIds(self.coords.astype(np.float64))
+
+    def snap(self, grid: Grid) -> RegionSet:
+        """Заменяет координаты регионов ближайшими значениями сетки (см. GridIndex.snapCoords)"""
+        return RegionSet(grid.index.snapCoords(self.coords.astype(np.float64)))
+
+    def calcAreas(self, grid: Grid) -> np.ndarray:
+        """Рассчитывает площади регионов на сетке (в м2) по таблице площадей ячеек (см. Grid.geometry)"""
+        ids = self.snapIds(grid)
+        row_areas = np.concatenate(([0], np.cumsum(grid.geometry.areas)))
+
+        column_areas = row_areas[ids[:, 0] + 1] - row_areas[ids[:, 1]]
+        return column_areas * (ids[:, 3] - ids[:, 2] + 1)
+
+
 @dataclass
 class Id:
     """
@@ -114,6 +244,133 @@ class Id:
     right: int
 
 
+@dataclass
+class GridGeometry:
+    """
+    Размеры ячеек сетки для каждой широты
+
+    Считается, что каждая ячейка имеет прямоугольную форму
+
+    Атрибуты:
+    ---------
+    areas: np.ndarray
+        - площади ячеек (в м2)
+    parallel_lengths: np.ndarray
+        - длины сторон ячеек вдоль параллели (верхней и нижней, в м)
+    meridian_lengths: np.ndarray
+        - длины сторон ячеек вдоль меридиана (левой и правой, в м)
+    """
+    areas: np.ndarray
+    parallel_lengths: np.ndarray
+    meridian_lengths: np.ndarray
+
+    @classmethod
+    def fromLat(cls, lat: np.ndarray) -> GridGeometry:
+        """Рассчитывает размеры ячеек для широт сетки 'lat'"""
+        coefs = np.cos(np.radians(np.abs(np.asarray(lat, dtype=np.float64))))
+
+        geometry = cls(
+            areas=pow(CELL_LENGTH_METERS, 2) * coefs,
+            parallel_lengths=CELL_LENGTH_METERS * coefs,
+            meridian_lengths=np.full(coefs.shape, CELL_LENGTH_METERS),
+        )
+
+        # таблицы общие для всех регионов сетки
+        for table in (geometry.areas, geometry.parallel_lengths, geometry.meridian_lengths):
+            table.flags.writeable = False
+
+        return geometry
+
+
+class AxisIndex():
+    """
+    Поиск ближайших значений оси сетки для массивов координат
+
+    Для равномерной оси (возможно, со швом, как у долгот, - тогда ось равномерна после
+    сортировки) индекс находится арифметически, для неравномерной - двоичным поиском.
+    Результат совпадает с CoordTools.closestId: ближайшее значение, при равенстве
+    расстояний - с меньшим индексом; координаты приводятся к типу значений оси
+    """
+
+    def __init__(self, values: np.ndarray) -> None:
+        """Инициализация"""
+        self.values: np.ndarray = np.asarray(values)
+        self.order: np.ndarray = np.argsort(self.values, kind="stable")
+        self.sorted: np.ndarray = self.values[self.order]
+
+        steps = np.diff(self.sorted)
+        self.step: float = float(steps[0]) if steps.size else 0.0
+        self.is_regular: bool = bool(
+            steps.size and self.step > 0 and np.allclose(steps, self.step, rtol=1e-6, atol=0)
+        )
+
+    def closestIds(self, coords: np.ndarray | float) -> np.ndarray:
+        """Возвращает индексы значений оси, ближайших к координатам 'coords'"""
+        coords = np.asarray(coords, dtype=self.values.dtype)
+        size = self.sorted.size
+
+        if self.is_regular:
+            lower = np.floor((coords - self.sorted[0]) / self.step).astype(np.int64)
+        else:
+            lower = np.searchsorted(self.sorted, coords) - 1
+
+        # ближайшее значение - одно из соседей;  при  арифметическом  поиске  допускается
+        # ошибка округления на один шаг
+        candidates = np.clip(lower[..., np.newaxis] + np.arange(-1, 3), 0, size - 1)
+        distances = np.abs(self.sorted[candidates] - coords[..., np.newaxis])
+
+        closest = distances == distances.min(axis=-1, keepdims=True)
+        ids = np.where(closest, self.order[candidates], np.iinfo(np.int64).max)
+
+        return ids.min(axis=-1)
+
+    def closest(self, coords: np.ndarray | float) -> np.ndarray:
+        """Возвращает значения оси, ближайшие к координатам 'coords'"""
+        return self.values[self.closestIds(coords)]
+
+
+class GridIndex():
+    """
+    Привязка регионов к сетке для массивов регионов (см. AxisIndex)
+
+    Примеры использования:
+    ----------------------
+    >>> ids = grid.index.snapIds(coords)  # coords - массив (N, 4): down, up, left, right
+    """
+
+    def __init__(self, grid: Grid) -> None:
+        """Инициализация"""
+        self.lat: AxisIndex = AxisIndex(grid.lat)
+        self.lon: AxisIndex = AxisIndex(grid.lon)
+
+    def snapIds(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Рассчитывает индексы регионов (как RegionProcessor.getId)
+
+        :param coords: координаты регионов, массив (N, 4) со столбцами down, up, left, right
+        :return: индексы, массив (N, 4) со столбцами down, up, left, right
+        :rtype: np.ndarray
+        """
+        coords = np.asarray(coords).reshape(-1, 4)
+
+        ids = np.empty(coords.shape, dtype=np.int64)
+        ids[:, :2] = self.lat.closestIds(coords[:, :2])
+        ids[:, 2:] = self.lon.closestIds(coords[:, 2:]) + 1
+
+        return ids
+
+    def snapCoords(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Заменяет координаты регионов ближайшими значениями сетки (как
+        RegionProcessor.getGridRegion)
+
+        :param coords: координаты регионов, массив (N, 4) со столбцами down, up, left, right
+        """
+        coords = np.asarray(coords).reshape(-1, 4)
+
+        return np.concatenate((self.lat.closest(coords[:, :2]), self.lon.closest(coords[:, 2:])), axis=1)
+
+
 @dataclass
 class Grid:
     # все значения координат широт в сетке
@@ -121,6 +378,16 @@ class Grid:
     # все значения координат долгот в сетке
     lon: np.ndarray
 
+    @cached_property
+    def geometry(self) -> GridGeometry:
+        """Размеры ячеек сетки, рассчитываемые один раз для сетки (см. GridGeometry)"""
+        return GridGeometry.fromLat(self.lat)
+
+    @cached_property
+    def index(self) -> GridIndex:
+        """Поиск ближайших значений сетки (см. GridIndex)"""
+        return GridIndex(self)
+
 
 @dataclass
 class Cell:
@@ -206,6 +473,101 @@ class ConvValue():
     up: np.ndarray
 
 
+@dataclass
+class BorderSeries():
+    """
+    Граничные значения региона для многих единиц времени (и, возможно, многих регионов
+    одного размера) в общих буферах
+
+    Четыре границы хранятся подряд вдоль последней оси  -  периметра:  right  и  left
+    (по 'height' ячеек), down и up (по 'width' ячеек). Массивы имеют оси (время, периметр)
+    или (регион, время, периметр); отдельные границы и единицы времени доступны как
+    представления буферов (см. getConvData)
+
+    Атрибуты:
+    ---------
+    conc: np.ndarray
+        - концентрации на границах
+    flow: np.ndarray
+        - потоки: U для боковых границ, V для верхней и нижней
+    height, width: int
+        - длины боковых и верхней/нижней границ в ячейках
+    """
+    conc: np.ndarray
+    flow: np.ndarray
+    height: int
+    width: int
+
+    EDGES = ("right", "left", "down", "up")
+    # знак потока, направленного внутрь региона, для каждой границы
+    INWARD_SIGNS = {"right": -1.0, "left": 1.0, "down": 1.0, "up": -1.0}
+
+    @classmethod
+    def empty(cls, shape: tuple, height: int, width: int) -> BorderSeries:
+        """
+        Создает буферы для (*shape, периметр), например, shape = (время,) или (регион, время)
+        """
+        perimeter = 2 * (height + width)
+        return cls(
+            conc=np.empty((*shape, perimeter)),
+            flow=np.empty((*shape, perimeter)),
+            height=height,
+            width=width,
+        )
+
+    @classmethod
+    def fromConvData(cls, convdata: ConvOriginalDayData) -> BorderSeries:
+        """Собирает буферы из граничных значений с осями (..., длина границы)"""
+        conc, flow = convdata.conc, convdata.flow
+        border = cls(
+            conc=np.concatenate([getattr(conc, edge) for edge in cls.EDGES], axis=-1),
+            flow=np.concatenate([getattr(flow, edge) for edge in cls.EDGES], axis=-1),
+            height=conc.right.shape[-1],
+            width=conc.down.shape[-1],
+        )
+        return border
+
+    @property
+    def perimeter(self) -> int:
+        return 2 * (self.height + self.width)
+
+    def getEdge(self, edge: str) -> slice:
+        """Возвращает срез границы 'edge' вдоль оси периметра"""
+        sizes = {"right": self.height, "left": self.height, "down": self.width, "up": self.width}
+        start = sum(sizes[name] for name in self.EDGES[: self.EDGES.index(edge)])
+        return slice(start, start + sizes[edge])
+
+    def calcEdgeFactors(self, cells: Cell | list[Cell]) -> np.ndarray:
+        """
+        Рассчитывает множители  ячеек  периметра:  длина  стороны  ячейки  на  знак  потока,
+        направленного внутрь региона
+
+        :return: массив (периметр,) для одной ячейки или (регион, периметр) для списка
+        :rtype: np.ndarray
+        """
+        cells_list = cells if isinstance(cells, list) else [cells]
+
+        factors = np.empty((len(cells_list), self.perimeter))
+        for edge in self.EDGES:
+            lengths = [getattr(cell, edge) for cell in cells_list]
+            factors[:, self.getEdge(edge)] = np.multiply(lengths, self.INWARD_SIGNS[edge])[:, np.newaxis]
+
+        return factors if isinstance(cells, list) else factors[0]
+
+    def getConvData(self, *index) -> ConvOriginalDayData:
+        """
+        Возвращает граничные значения  как  ConvOriginalDayData  из  представлений  буферов;
+        'index' выбирает, например, единицу времени или регион и единицу времени
+        """
+        conc, flow = self.conc[index], self.flow[index]
+
+        convdata = ConvOriginalDayData(
+            conc=ConvConc(**{edge: conc[..., self.getEdge(edge)] for edge in self.EDGES}),
+            flow=ConvFlow(**{edge: flow[..., self.getEdge(edge)] for edge in self.EDGES}),
+        )
+        return convdata
+
+
 @dataclass
 class DateRange():
 
@@ -241,6 +603,121 @@ class RegionBalance():
     balance: np.ndarray
 
 
+@dataclass
+class RegionBalances():
+    """
+    Балансы нескольких регионов за один временной диапазон
+
+    Атрибуты:
+    ---------
+    regions: np.ndarray
+        - координаты регионов, массив (регион, 4) со столбцами down, up, left, right
+    balance: np.ndarray
+        - временные ряды баланса, массив (регион, время)
+    time_series: pd.Series
+        - значения времени
+    """
+    regions: np.ndarray
+    balance: np.ndarray
+    time_series: pd.Series
+
+    def __len__(self) -> int:
+        return self.regions.shape[0]
+
+    def getRegionBalance(self, region_id: int) -> RegionBalance:
+        """Возвращает баланс региона с индексом 'region_id'"""
+        region = Region(*map(float, self.regions[region_id]))
+        return RegionBalance(region, self.balance[region_id])
+
+    def toRegionBalances(self) -> list[RegionBalance]:
+        """Возвращает балансы в виде списка RegionBalance"""
+        return [self.getRegionBalance(region_id) for region_id in range(len(self))]
+
+
+@dataclass
+class TargetsBalances():
+    """
+    Балансы нескольких регионов для нескольких переменных с концентрациями
+
+    Атрибуты:
+    ---------
+    target_names: list[str]
+        - названия переменных
+    regions: np.ndarray
+        - координаты регионов, массив (регион, 4) со столбцами down, up, left, right
+    balance: np.ndarray
+        - временные ряды баланса, массив (переменная, регион, время)
+    time_series: pd.Series
+        - значения времени
+    """
+    target_names: list[str]
+    regions: np.ndarray
+    balance: np.ndarray
+    time_series: pd.Series
+
+    def getTargetBalances(self, target_name: str) -> RegionBalances:
+        """Возвращает балансы регионов для переменной 'target_name' без копирования"""
+        target_id = self.target_names.index(target_name)
+        return RegionBalances(regions=self.regions, balance=self.balance[target_id], time_series=self.time_series)
+
+
+@dataclass
+class BalanceRecord():
+    """
+    Часть временного ряда баланса региона (см. BalanceCalculator.iterBalance)
+
+    Атрибуты:
+    ---------
+    time: np.ndarray
+        - значения времени в формате numpy.datetime64
+    diff_sum: np.ndarray
+        - изменение суммарного содержания вещества в регионе
+    income, outcome: np.ndarray
+        - внос и вынос вещества через границы региона
+    balance: np.ndarray
+        - баланс, diff_sum - (income - outcome)
+    last_sum: float
+        - суммарное содержание вещества в момент, следующий за последним  моментом  части
+        (начальная сумма для следующей части)
+    """
+    time: np.ndarray
+    diff_sum: np.ndarray
+    income: np.ndarray
+    outcome: np.ndarray
+    balance: np.ndarray
+    last_sum: float
+
+    def __len__(self) -> int:
+        return self.time.size
+
+
+@dataclass
+class WindowBalances():
+    """
+    Суммарные значения баланса региона за несколько временных окон (см. TimeIndex)
+
+    Атрибуты:
+    ---------
+    start, end: np.ndarray
+        - первое и последнее время каждого окна в формате numpy.datetime64
+    diff_sum: np.ndarray
+        - изменение содержания вещества в регионе за окно
+    income, outcome: np.ndarray
+        - внос и вынос вещества через границы региона за окно
+    balance: np.ndarray
+        - сумма баланса за окно, diff_sum - (income - outcome)
+    """
+    start: np.ndarray
+    end: np.ndarray
+    diff_sum: np.ndarray
+    income: np.ndarray
+    outcome: np.ndarray
+    balance: np.ndarray
+
+    def __len__(self) -> int:
+        return self.start.size
+
+
 @dataclass
 class HeapOfBalances():
     """
@@ -250,3 +727,187 @@ class HeapOfBalances():
     balances: list[RegionBalance]
     height: int
     width: int
+
+
+@dataclass
+class BalanceHeaps():
+    """
+    Балансы всех регионов расчета StaticMaker в одном массиве
+
+    Регионы упорядочены по (размер, сдвиг широты, сдвиг долготы), так что  выборка  по
+    размеру или сдвигу - это представление массива без копирования (см. getBalances)
+
+    Атрибуты:
+    ---------
+    balance: np.ndarray
+        - временные ряды баланса, массив (регион, время)
+    regions: np.ndarray
+        - координаты регионов, массив (регион, 4) со столбцами down, up, left, right
+    time: np.ndarray
+        - значения времени в формате numpy.datetime64
+    heights, widths: np.ndarray
+        - высоты и ширины центральных регионов каждого размера
+    shape: tuple
+        - (количество размеров, сдвигов широты, сдвигов долготы)
+
+    Примеры использования:
+    ----------------------
+    >>> heaps = static_maker.calcBalanceHeaps(data_loader, region)
+    >>> heaps.save("heaps.npz", compress=False)
+    >>> heaps = BalanceHeaps.load("heaps.npz")  # массивы открываются через memmap
+    >>> series = heaps.getBalances(size=3, lat_shift=8)
+    """
+    balance: np.ndarray
+    regions: np.ndarray
+    time: np.ndarray
+    heights: np.ndarray
+    widths: np.ndarray
+    shape: tuple
+
+    ARRAYS = ("balance", "regions", "time", "heights", "widths")
+
+    def __post_init__(self) -> None:
+        self.shape = tuple(int(size) for size in self.shape)
+
+        if self.balance.shape != (int(np.prod(self.shape)), self.time.size):
+            raise ValueError("'balance' must have shape (regions, time)")
+
+    def __len__(self) -> int:
+        """Возвращает количество размеров регионов"""
+        return self.shape[0]
+
+    def getBalances(self,
+                    size: int | slice = slice(None),
+                    lat_shift: int | slice = slice(None),
+                    lon_shift: int | slice = slice(None),
+                   ) -> np.ndarray:
+        """
+        Возвращает временные ряды баланса регионов с  данными  номерами  размера  и  сдвигов
+        как представление массива без копирования
+
+        :return: массив с осями (размер, сдвиг широты, сдвиг долготы, время), оси  целочисленных
+            аргументов опускаются
+        :rtype: np.ndarray
+        """
+        return self.balance.reshape(*self.shape, -1)[size, lat_shift, lon_shift]
+
+    def getRegions(self,
+                   size: int | slice = slice(None),
+                   lat_shift: int | slice = slice(None),
+                   lon_shift: int | slice = slice(None),
+                  ) -> np.ndarray:
+        """Возвращает координаты регионов с данными номерами размера и сдвигов (см. getBalances)"""
+        return self.regions.reshape(*self.shape, 4)[size, lat_shift, lon_shift]
+
+    def getHeap(self, size: int) -> HeapOfBalances:
+        """Возвращает балансы регионов одного размера в виде HeapOfBalances"""
+        balances = self.getBalances(size).reshape(-1, self.time.size)
+        regions = self.getRegions(size).reshape(-1, 4)
+
+        heap_balances = [
+            RegionBalance(Region(*map(float, coords)), balance)
+            for coords, balance in zip(regions, balances)
+        ]
+        return HeapOfBalances(heap_balances, float(self.heights[size]), float(self.widths[size]))
+
+    def toHeaps(self) -> dict[int, HeapOfBalances]:
+        """Возвращает балансы в виде словаря {номер размера: HeapOfBalances}"""
+        return {size: self.getHeap(size) for size in range(len(self))}
+
+    def save(self, path: str, compress: bool = True) -> None:
+        """
+        Сохраняет балансы в файл .nc (NetCDF, HDF5) или .npz
+
+        :param compress: если True,  массивы  сжимаются;  несжатый  файл  .npz  загружается
+            через memmap (см. load)
+        """
+        if path.endswith(".nc"):
+            return self._saveNetCDF(path, compress)
+
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays["time"] = self.time.astype("datetime64[s]").astype(np.int64)
+        arrays["shape"] = np.array(self.shape)
+
+        save = np.savez_compressed if compress else np.savez
+        with open(path, "wb") as file:
+            save(file, **arrays)
+
+    def _saveNetCDF(self, path: str, compress: bool) -> None:
+        kwargs = {"compression": "gzip", "shuffle": True} if compress else {}
+
+        with h5netcdf.File(path, "w") as db:
+            db.dimensions = {
+                "region": self.regions.shape[0],
+                "time": self.time.size,
+                "size": len(self),
+                "coord": 4,
+            }
+            db.attrs["shape"] = np.array(self.shape)
+
+            time = db.create_variable("time", ("time",), data=self.time.astype("datetime64[s]").astype(np.int64))
+            time.attrs["units"] = "seconds since 1970-01-01 00:00:00"
+
+            db.create_variable("balance", ("region", "time"), data=self.balance, **kwargs)
+            db.create_variable("regions", ("region", "coord"), data=self.regions, **kwargs)
+            db.create_variable("heights", ("size",), data=self.heights)
+            db.create_variable("widths", ("size",), data=self.widths)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> BalanceHeaps:
+        """
+        Загружает балансы из файла .nc или .npz
+
+        :param mmap: если True, массивы несжатого  файла  .npz  открываются  через  memmap
+            без чтения в память
+        """
+        if path.endswith(".nc"):
+            with h5netcdf.File(path, "r") as db:
+                arrays = {name: np.asarray(db[name][...]) for name in cls.ARRAYS}
+                shape = tuple(db.attrs["shape"])
+        else:
+            arrays = _loadNpz(path, mmap)
+            shape = tuple(arrays.pop("shape"))
+
+        arrays["time"] = np.asarray(arrays["time"]).astype("datetime64[s]")
+
+        return cls(shape=shape, **arrays)
+
+
+def _loadNpz(path: str, mmap: bool) -> dict[str, np.ndarray]:
+    """
+    Загружает массивы файла .npz;  несжатые  массивы  при  'mmap'  открываются  через
+    numpy.memmap по их смещению в архиве
+    """
+    arrays = {}
+
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            # данные начинаются после локального заголовка записи архива и заголовка .npy
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", file.read(4))
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+
+            if not shape or 0 in shape or dtype.hasobject:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            arrays[name] = np.memmap(
+                path, dtype=dtype, mode="r", offset=file.tell(),
+                shape=shape, order="F" if fortran_order else "C",
+            )
+
+    return arrays
@@ -1,42 +1,282 @@
+import os
 import numpy as np
 import pandas as pd
 import h5netcdf
+import threading
 
+from collections import deque
 from datetime import date, datetime
 from dataclasses import dataclass
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor
 
-from src.containers import DateRange, Grid, ConvConc, ConvFlow, Id, ConvOriginalDayData, RegionData
+from src.tools import findClosestTimeIds
+from src.metadata import DatasetIndex
+from src.read_planner import ReadPlanner, ReadReport
+from src.cache import SliceCache, CacheStats
+from src.store import MemmapStore
+from src.containers import DateRange, Grid, ConvConc, ConvFlow, Id, ConvOriginalDayData, RegionData, ConvData, BorderSeries
 
 
 class DataLoader():
-    """Класс для загрузки данных"""
-
-    def __init__(self, path: str, target_name: str) -> None:
+    """
+    Класс для загрузки данных
+
+    Параметры:
+    ----------
+    path: str
+        путь к файлу NetCDF или к каталогу локального хранилища (см. src.store);
+        переменные хранилища читаются через numpy.memmap без копирования
+
+    target_name: str | list[str]
+        название переменной с концентрациями или список названий нескольких переменных,
+        переносимых одними и теми же U и V; первая переменная списка  считается  основной
+        (target_name), остальные  рассчитываются  вместе  с  ней  (см.  target_names  и
+        BalanceCalculator.getTargetsBalanceSeries)
+
+    use_index: bool
+        если True,  метаданные файла (времена, сетка, формы переменных)  берутся  из
+        индекса рядом с файлом (см. DatasetIndex), а если индекса нет  или  он  устарел,
+        индекс создается. Файл данных в этом случае открывается только при первом чтении
+
+    chunk_cache: int | str | None
+        размер кэша блоков HDF5 для каждой переменной в байтах; если "auto", размер
+        рассчитывается так, чтобы в кэш  помещался  слой  блоков  по  времени  для  всей
+        сетки (см. ReadPlanner.calcCacheBytes); если None, используется размер по умолчанию
+
+    cache_bytes: int
+        объем памяти в байтах для LRU-кэша прочитанных срезов (переменная,  индекс  времени,
+        пространственное окно), общего для всех расчетов с этим  DataLoader;  если  0,
+        кэш не используется (см. getCacheStats)
+
+    prefetch: int
+        количество частей временного диапазона,  читаемых  фоновым  потоком  заранее,  пока
+        обрабатывается текущая часть (см. iterCubeChunks); по умолчанию 0 - чтение синхронное,
+        без фонового потока
+    """
+
+    def __init__(self,
+                 path: str,
+                 target_name: str | list[str],
+                 use_index: bool = False,
+                 chunk_cache: int | str | None = None,
+                 cache_bytes: int = 0,
+                 prefetch: int = 0,
+                ) -> None:
         """Инициализация"""
 
-        self._db: h5netcdf.File = h5netcdf.File(path, "r")
-        self.target_name: str = target_name
+        self.path: str = path
+        self._file: h5netcdf.File | MemmapStore | None = None
+        self._open_kwargs: dict = {
+            "use_index": use_index,
+            "chunk_cache": chunk_cache,
+            "cache_bytes": cache_bytes,
+            "prefetch": prefetch,
+        }
+        self._chunk_cache: int | str | None = chunk_cache
+        self._target_arg: str | list[str] = target_name
+        self.target_names: list[str] = [target_name] if isinstance(target_name, str) else list(target_name)
+        self.target_name: str = self.target_names[0]
 
         self.time_variable = "stime"
 
-        self.original_shape = self._db[target_name].shape
+        # планировщик создается по метаданным файла; пока их нет, файл открывается  без
+        # настроек кэша блоков (см. _getCacheOptions)
+        self.planner: ReadPlanner | None = None
+        self._index: DatasetIndex = self.getIndex(use_index)
+        self.original_shape = self._index.variables[self.target_name].shape
+
+        self.planner = ReadPlanner(self._index.variables)
+        self.cache: SliceCache | None = SliceCache(cache_bytes) if cache_bytes else None
+        self.prefetch: int = prefetch
+        # чтение из фонового потока (см. iterCubeChunks)
+        self._read_lock = threading.RLock()
+        if chunk_cache is not None:
+            # файл мог быть открыт для построения индекса без настроек кэша
+            self.close()
 
         self._verifyData()
 
+        self._time_axis = self._index.time_axis
+        self._time_sorted = bool(np.all(np.diff(self._time_axis) > np.timedelta64(0, "s")))
         self._original_time_series = self.getOriginTimeSeries()
         self._seconds_step = self.getSecondsStep()
+        self._grid = Grid(lat=self._index.lat, lon=self._index.lon)
 
         # self.region_id: Id = self.getDefaultRegionId()
         self.default_date_range: DateRange = self.getDefaultDateRange()
         self._date_range: DateRange = self.default_date_range
 
+    @property
+    def _db(self) -> h5netcdf.File | MemmapStore:
+        """Возвращает файл данных, открывая его при первом обращении"""
+        if self._file is None:
+            if MemmapStore.isStore(self.path):
+                self._file = MemmapStore(self.path)
+            else:
+                self._file = h5netcdf.File(self.path, "r", **self._getCacheOptions())
+        return self._file
+
+    def _getCacheOptions(self) -> dict:
+        """Возвращает параметры кэша блоков HDF5 для открытия файла"""
+        if self._chunk_cache is None or self.planner is None:
+            return {}
+
+        names = [name for name in (*self.target_names, "U", "V") if name in self._index.variables]
+
+        if self._chunk_cache == "auto":
+            cache_bytes = max(self.planner.calcCacheBytes(name) for name in names)
+        else:
+            cache_bytes = int(self._chunk_cache)
+
+        chunk_bytes = max(self.planner.getChunkBytes(name) for name in names)
+        cache_slots = self.planner.calcCacheSlots(cache_bytes, chunk_bytes)
+
+        return {"rdcc_nbytes": cache_bytes, "rdcc_nslots": cache_slots}
+
+    def _readVariable(self, name: str, lon: int | slice, lat: int | slice, time: int | slice) -> np.ndarray:
+        """
+        Читает  переменную  'name'  по  индексам  (долгота, широта, время)  и  учитывает
+        чтение в статистике планировщика (см. getReadReport)
+        """
+        with self._read_lock:
+            return self._readCached(name, lon, lat, time)
+
+    def _readCached(self, name: str, lon: int | slice, lat: int | slice, time: int | slice) -> np.ndarray:
+        """
+        Читает переменную через кэш прочитанных срезов, если он используется. Массивы  в
+        кэше доступны только для чтения, поэтому возвращается их копия
+        """
+        if self.cache is None:
+            self.planner.account(name, lon, lat, time)
+            return self._db[name][lon, lat, time]
+
+        shape = self._index.variables[name].shape
+        window = (self._normalizeIndex(lon, shape[0]), self._normalizeIndex(lat, shape[1]))
+
+        if not isinstance(time, slice):
+            key = (name, time, window)
+            data_slice = self.cache.get(key)
+
+            if data_slice is None:
+                self.planner.account(name, lon, lat, time)
+                data_slice = self.cache.put(key, self._db[name][lon, lat, time])
+
+            return data_slice.copy()
+
+        time_ids = range(*time.indices(shape[2]))
+        if len(time_ids) == 0 or time_ids.step != 1:
+            self.planner.account(name, lon, lat, time)
+            return self._db[name][lon, lat, time]
+
+        slices = [self.cache.get((name, time_id, window)) for time_id in time_ids]
+
+        # недостающие срезы читаются непрерывными отрезками времени
+        run_start = None
+        for position, time_id in enumerate(list(time_ids) + [None]):
+            missing = time_id is not None and slices[position] is None
+
+            if missing and run_start is None:
+                run_start = position
+
+            elif not missing and run_start is not None:
+                run = slice(time_ids[run_start], time_ids[position - 1] + 1)
+                self.planner.account(name, lon, lat, run)
+                data = self._db[name][lon, lat, run]
+
+                for offset in range(position - run_start):
+                    key = (name, time_ids[run_start + offset], window)
+                    slices[run_start + offset] = self.cache.put(key, np.array(data[..., offset]))
+
+                run_start = None
+
+        return np.stack(slices, axis=-1)
+
+    @staticmethod
+    def _normalizeIndex(index: int | slice, size: int) -> tuple:
+        """Переводит индекс или срез в ключ кэша"""
+        if isinstance(index, slice):
+            return index.indices(size)
+        return (index,)
+
+    def getCacheStats(self) -> CacheStats | None:
+        """
+        Возвращает статистику кэша прочитанных срезов (попадания,  промахи,  вытеснения)
+        или None, если кэш не используется
+        """
+        return self.cache.stats if self.cache is not None else None
+
+    def getReadReport(self) -> dict[str, ReadReport]:
+        """Возвращает статистику чтения переменных: распаковано байт и использовано байт"""
+        return self.planner.report()
+
+    def iterTimeBatches(self, start_id: int, end_id: int, batch_size: int) -> list[tuple[int, int]]:
+        """
+        Разбивает временной диапазон на части не больше 'batch_size' единиц времени,
+        выровненные по границам блоков HDF5 по времени (см. ReadPlanner.alignTimeBatches)
+        """
+        return self.planner.alignTimeBatches(self.target_name, start_id, end_id, batch_size)
+
+    def getIndex(self, use_index: bool = False) -> DatasetIndex:
+        """
+        Возвращает индекс метаданных файла; если 'use_index', индекс  загружается  из  файла
+        рядом с данными или создается и сохраняется там
+        """
+        index = DatasetIndex.load(self.path) if use_index else None
+
+        if index is None:
+            index = DatasetIndex.fromDatabase(self._db, self.path, self.getTimeAxis())
+
+            if use_index:
+                try:
+                    index.save(self.path)
+                except OSError:
+                    pass
+
+        return index
+
+    @property
+    def index(self) -> DatasetIndex:
+        """Возвращает индекс метаданных файла"""
+        return self._index
+
+    @property
+    def fingerprint(self) -> dict:
+        """
+        Возвращает  описание  данных,  меняющееся  при  изменении  файла:  путь,  размер  и
+        время модификации
+        """
+        fingerprint = {
+            "source": os.path.abspath(self.path),
+            "source_size": self._index.file_size,
+            "source_mtime": self._index.file_mtime,
+        }
+        return fingerprint
+
+    def getOpenArgs(self) -> tuple[type, tuple, dict]:
+        """
+        Возвращает (класс, позиционные аргументы, именованные аргументы), по которым можно
+        открыть такой же DataLoader, например, в другом процессе
+        """
+        return self.__class__, (self.path, self._target_arg), dict(self._open_kwargs)
+
     def _verifyData(self) -> None:
         """Проверяет полученные данные"""
         self._verifyTime()
+        self._verifyTargets()
+
+    def _verifyTargets(self) -> None:
+        """Проверяет, что все переменные с концентрациями имеют одинаковую форму"""
+        for name in self.target_names:
+            if name not in self._index.variables:
+                raise ValueError(f"Variable '{name}' is not found")
+
+            if self._index.variables[name].shape != self.original_shape:
+                raise ValueError(f"Variable '{name}' has shape different from '{self.target_name}'")
 
     def _verifyTime(self) -> None:
         """Проверяет временную переменную"""
-        time_shape = self._db[self.time_variable].shape
+        time_shape = self._index.variables[self.time_variable].shape
 
         if len(time_shape) != 1:
             raise ValueError("Time variable is not 1-dimensional")
@@ -56,30 +296,66 @@ class DataLoader():
 
     def getGrid(self) -> Grid:
         """Возвращает сетку"""
-        lat = np.array(self._db["lat"])
-        lon = np.array(self._db["lon"])
-
-        grid = Grid(lat=lat, lon=lon)
-        return grid
+        return self._grid
     
+    def getGridId(self) -> Id:
+        """Возвращает индексы границ всей сетки"""
+        lon_size, lat_size = self.original_shape[:2]
+        return Id(down=lat_size - 1, up=0, left=0, right=lon_size - 1)
+
     def getDateRange(self) -> DateRange:
         return self.date_range
     
     def getTargetMap(self, day_id: int) -> np.ndarray:
-        data_map = self._db[self.target_name][..., day_id]
+        data_map = self._readVariable(self.target_name, slice(None), slice(None), day_id)
         return np.transpose(data_map)
     
     def getUMap(self, day_id: int) -> np.ndarray:
-        return np.transpose(self._db["U"][..., day_id])
+        return np.transpose(self._readVariable("U", slice(None), slice(None), day_id))
     
     def getVMap(self, day_id: int) -> np.ndarray:
-        return np.transpose(self._db["V"][..., day_id])
+        return np.transpose(self._readVariable("V", slice(None), slice(None), day_id))
+
+    def getCube(self, name: str, region_id: Id, start_id: int, end_id: int) -> np.ndarray:
+        """
+        Возвращает значения переменной 'name' внутри ограничивающего прямоугольника региона
+        для всех индексов времени от 'start_id' до 'end_id' включительно
+
+        Данные читаются одним обращением к файлу,  без  чтения  глобальной  карты  на  каждом
+        шаге времени
+
+        :return: 3D-массив с осями (время, широта, долгота)
+        :rtype: numpy.ndarray
+        """
+        cube = self._readVariable(
+            name,
+            slice(region_id.left, region_id.right + 1),
+            slice(region_id.up, region_id.down + 1),
+            slice(start_id, end_id + 1),
+        )
+
+        if cube.shape[2] != end_id - start_id + 1:
+            raise IndexError(f"time range [{start_id}, {end_id}] is out of '{name}' bounds")
+
+        return np.transpose(cube, (2, 1, 0))
+
+    def getTargetCube(self, region_id: Id, start_id: int, end_id: int) -> np.ndarray:
+        return self.getCube(self.target_name, region_id, start_id, end_id)
+
+    def getUCube(self, region_id: Id, start_id: int, end_id: int) -> np.ndarray:
+        return self.getCube("U", region_id, start_id, end_id)
+
+    def getVCube(self, region_id: Id, start_id: int, end_id: int) -> np.ndarray:
+        return self.getCube("V", region_id, start_id, end_id)
     
+    @property
+    def time_axis(self) -> np.ndarray:
+        """Возвращает исходные времена в виде массива numpy.datetime64"""
+        return self._time_axis
+
     def getSecondsStep(self) -> int:
         """Рассчитывает шаг времени в секундах"""
-        _seconds_step = (
-            self._original_time_series[1] - self._original_time_series[0]
-        ).total_seconds()
+        _seconds_step = (self._time_axis[1] - self._time_axis[0]) / np.timedelta64(1, "s")
         return int(_seconds_step)
 
     def getDefaultDateRange(self) -> DateRange:
@@ -87,8 +363,8 @@ class DataLoader():
         start_id = 0
         end_id = self.original_shape[2] - 1
 
-        start_day = self._stimeToDate(self._db[self.time_variable][start_id])
-        end_day = self._stimeToDate(self._db[self.time_variable][end_id])
+        start_day = self.getDatetimeById(start_id)
+        end_day = self.getDatetimeById(end_id)
 
         date_data = DateRange(
             start=start_day, end=end_day,
@@ -99,33 +375,38 @@ class DataLoader():
 
         return date_data
     
+    def getTimeAxis(self) -> np.ndarray:
+        """Получает исходные времена в виде массива numpy.datetime64"""
+        stimes = np.asarray(self._db[self.time_variable][:])
+        return self._decodeStimes(stimes)
+
     def getOriginTimeSeries(self) -> pd.Series:
         """Получает исходные времена в формате pandas.Series"""
-        # список времен в оригинальном формате
-        original_times = list(self._db[self.time_variable])
+        return pd.Series(self._time_axis.astype("datetime64[ns]"))
 
-        # тот же времена в формате datetime в формате pandas.Series
-        time_series = pd.Series(map(self._stimeToDate, original_times))
-        
-        return time_series
+    def getTimeIds(self, times: list[datetime] | np.ndarray) -> np.ndarray:
+        """
+        Находит индексы ближайших времен для массива времен
 
-    def getTimeId(self, time: datetime) -> int:
-        """Находит индекс ближайшего времени"""
+        Если время находится ровно посередине между двумя временами,  выбирается  более
+        раннее
+        """
+        times = np.asarray(times, dtype="datetime64[s]")
+        axis = self._time_axis
 
-        # массив с модулем разниц времен от переданного времени, в секундах
-        diff = self._original_time_series.apply(
-            lambda timeunit: (time - timeunit).total_seconds()
-        ).abs()
+        if not self._time_sorted:
+            diff = np.abs(axis[np.newaxis, :] - times.reshape(-1, 1))
+            return diff.argmin(axis=1).reshape(times.shape)
 
-        # находим индекс минимального значения - это и есть индекс ближайшей даты
-        min_id = int(diff.argmin())
+        return findClosestTimeIds(axis, times)
 
-        return min_id
+    def getTimeId(self, time: datetime) -> int:
+        """Находит индекс ближайшего времени"""
+        return int(self.getTimeIds([time])[0])
     
     def setDateRange(self, start_day: datetime, end_day: datetime) -> None:
         """Задает временной диапазон"""
-        start_id = self.getTimeId(start_day)
-        end_id = self.getTimeId(end_day)
+        start_id, end_id = map(int, self.getTimeIds([start_day, end_day]))
 
         correct_start_day = self.getDatetimeById(start_id)
         correct_end_day = self.getDatetimeById(end_id)
@@ -139,6 +420,26 @@ class DataLoader():
             time_series=self._original_time_series[start_id : end_id + 1].reset_index(drop=True)
         )
 
+    @staticmethod
+    def _decodeStimes(stimes: np.ndarray) -> np.ndarray:
+        """
+        Переводит массив времен в оригинальном формате (b"YYYY-MM-DD_HH...") в  массив
+        numpy.datetime64 без цикла по значениям
+        """
+        if stimes.dtype.kind != "S":
+            stimes = np.array([
+                stime if isinstance(stime, bytes) else str(stime).encode() for stime in stimes
+            ], dtype="S")
+
+        # символы каждого времени по столбцам
+        chars = stimes.view("S1").reshape(stimes.size, -1)
+        separator = np.full((stimes.size, 1), b"T")
+
+        iso = np.concatenate((chars[:, :10], separator, chars[:, 11:13]), axis=1)
+        iso = np.ascontiguousarray(iso).view("S13").ravel()
+
+        return iso.astype("datetime64[s]")
+
     @staticmethod
     def _stimeToDate(stime: bytes) -> datetime:
         stime = str(stime)
@@ -153,13 +454,11 @@ class DataLoader():
         """
         Возвращает дату и время, соответствующие индексу 'time_id'
         """
-        stime = self._db[self.time_variable][time_id]
-        date_time = self._stimeToDate(stime)
-        return date_time
+        return self._time_axis[time_id].astype(datetime)
 
     def getBorderConc(self, day_id: int, region_id: Id) -> ConvConc:
         """Возвращает граничные значения концентраций для региона"""
-        conc_map = self._db[self.target_name][..., day_id]
+        conc_map = self._readVariable(self.target_name, slice(None), slice(None), day_id)
 
         right = conc_map[
             region_id.right,
@@ -189,7 +488,7 @@ class DataLoader():
     
     def getBorderFlow(self, day_id: int, region_id: Id) -> ConvFlow:
         # U по границам (м / с)
-        umap = self._db["U"][..., day_id]
+        umap = self._readVariable("U", slice(None), slice(None), day_id)
         right_flow = umap[
             region_id.right,
             region_id.up : region_id.down + 1,
@@ -200,7 +499,7 @@ class DataLoader():
         ]
 
         # V по границам  (м / с)
-        vmap = self._db["V"][..., day_id]
+        vmap = self._readVariable("V", slice(None), slice(None), day_id)
         down_flow = vmap[
             region_id.left : region_id.right + 1,
             region_id.down,
@@ -219,6 +518,81 @@ class DataLoader():
 
         return flow
     
+    def getCubeChunk(self,
+                     region_id: Id,
+                     start_id: int,
+                     end_id: int,
+                     extra: bool = False,
+                     target_names: list[str] | None = None,
+                    ) -> ConvData:
+        """
+        Возвращает значения  концентраций  и  скоростей  в  прямоугольнике  'region_id'  для
+        индексов времени от 'start_id' до 'end_id' включительно
+
+        :param extra: если True, концентрации читаются на одну единицу времени  больше  (для
+            расчета изменения сумм, см. BalanceCalculator.calcSumSeries)
+        :param target_names: если передан, концентрации всех этих переменных читаются  в
+            массив с осями (переменная, время, широта, долгота); U и V читаются один раз
+        """
+        conc_end_id = end_id + 1 if extra else end_id
+        if target_names is None:
+            conc = self.getTargetCube(region_id, start_id, conc_end_id)
+        else:
+            conc = np.stack([self.getCube(name, region_id, start_id, conc_end_id) for name in target_names])
+
+        umap = self.getUCube(region_id, start_id, end_id)
+        vmap = self.getVCube(region_id, start_id, end_id)
+
+        return ConvData(target=conc, U=umap, V=vmap)
+
+    def iterCubeChunks(self,
+                       region_id: Id,
+                       start_id: int,
+                       end_id: int,
+                       chunk_size: int,
+                       prefetch: int | None = None,
+                       target_names: list[str] | None = None,
+                      ) -> Iterator[tuple[int, int, ConvData]]:
+        """
+        Перебирает  части  временного  диапазона  (см. iterTimeBatches)   и   возвращает
+        (начало, конец, данные части) (см. getCubeChunk);  в  последней  части  концентрации
+        содержат одну лишнюю единицу времени
+
+        Пока обрабатывается текущая часть, фоновый поток читает и распаковывает следующие
+        'prefetch' частей; в памяти одновременно находится не больше 'prefetch' + 1 частей
+
+        :param prefetch: глубина предварительного чтения; если None, используется self.prefetch
+        :param target_names: переменные с концентрациями (см. getCubeChunk)
+        """
+        prefetch = self.prefetch if prefetch is None else prefetch
+        batches = self.iterTimeBatches(start_id, end_id, chunk_size)
+
+        def read(batch: tuple[int, int]) -> ConvData:
+            chunk_start, chunk_end = batch
+            return self.getCubeChunk(region_id, chunk_start, chunk_end, chunk_end == end_id, target_names)
+
+        if prefetch <= 0:
+            for batch in batches:
+                yield (*batch, read(batch))
+            return None
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = deque()
+        try:
+            for batch in batches:
+                pending.append((batch, executor.submit(read, batch)))
+
+                if len(pending) > prefetch:
+                    ready_batch, future = pending.popleft()
+                    yield (*ready_batch, future.result())
+
+            while pending:
+                ready_batch, future = pending.popleft()
+                yield (*ready_batch, future.result())
+
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def getConvData(self, day_id: int, region_id: Id) -> ConvOriginalDayData:
         """
         Возвращает сырые данные необходимые для расчета конвергенции одного дня
@@ -229,9 +603,139 @@ class DataLoader():
         convdata = ConvOriginalDayData(conc=conc, flow=flow)
         return convdata
     
+    def getStrip(self, name: str, lon: int | slice, lat: int | slice, start_id: int, end_id: int) -> np.ndarray:
+        """
+        Возвращает одномерный отрезок границы переменной 'name'  для  всех  индексов времени
+        от 'start_id' до 'end_id' включительно
+
+        Один из аргументов 'lon', 'lat' должен быть индексом, а другой - срезом
+
+        :return: 2D-массив с осями (время, длина границы)
+        :rtype: numpy.ndarray
+        """
+        strip = self._readVariable(name, lon, lat, slice(start_id, end_id + 1))
+
+        if strip.shape[-1] != end_id - start_id + 1:
+            raise IndexError(f"time range [{start_id}, {end_id}] is out of '{name}' bounds")
+
+        return np.transpose(strip)
+
+    def getBorderConcSeries(self, region_id: Id, start_id: int, end_id: int) -> ConvConc:
+        """
+        Возвращает граничные значения концентраций для региона за весь временной диапазон
+
+        Каждая граница читается одним обращением к файлу; массивы имеют оси (время, длина
+        границы)
+        """
+        lat = slice(region_id.up, region_id.down + 1)
+        lon = slice(region_id.left, region_id.right + 1)
+
+        conc = ConvConc(
+            right=self.getStrip(self.target_name, region_id.right, lat, start_id, end_id),
+            left=self.getStrip(self.target_name, region_id.left, lat, start_id, end_id),
+            down=self.getStrip(self.target_name, lon, region_id.down, start_id, end_id),
+            up=self.getStrip(self.target_name, lon, region_id.up, start_id, end_id),
+        )
+
+        return conc
+
+    def getBorderFlowSeries(self, region_id: Id, start_id: int, end_id: int) -> ConvFlow:
+        """
+        Возвращает граничные значения потоков (U  для  боковых  границ,  V  для  верхней  и
+        нижней) для региона за весь временной диапазон
+
+        Каждая граница читается одним обращением к файлу; массивы имеют оси (время, длина
+        границы)
+        """
+        lat = slice(region_id.up, region_id.down + 1)
+        lon = slice(region_id.left, region_id.right + 1)
+
+        flow = ConvFlow(
+            right=self.getStrip("U", region_id.right, lat, start_id, end_id),
+            left=self.getStrip("U", region_id.left, lat, start_id, end_id),
+            down=self.getStrip("V", lon, region_id.down, start_id, end_id),
+            up=self.getStrip("V", lon, region_id.up, start_id, end_id),
+        )
+
+        return flow
+
+    def getBorderSeries(self,
+                        region_id: Id,
+                        start_id: int,
+                        end_id: int,
+                        out: BorderSeries | None = None,
+                        target_names: list[str] | None = None,
+                       ) -> BorderSeries:
+        """
+        Возвращает граничные значения концентраций и потоков для региона за весь временной
+        диапазон в общих буферах с осями (время, периметр) (см. BorderSeries)
+
+        :param out: буферы не меньше чем на end_id - start_id + 1 единиц времени, в  начало
+            которых записывается результат (например, общие для частей временного  диапазона
+            или строка буферов нескольких регионов); если None, буферы выделяются
+        :type out: BorderSeries | None
+        :param target_names: если передан, концентрации всех этих переменных  записываются
+            в буфер с осями (переменная, время, периметр), а потоки читаются один раз
+        :type target_names: list[str] | None
+        """
+        timesize = end_id - start_id + 1
+        height = region_id.down - region_id.up + 1
+        width = region_id.right - region_id.left + 1
+
+        if out is None:
+            out = BorderSeries.empty((timesize,), height, width)
+            if target_names is not None:
+                out.conc = np.empty((len(target_names), *out.conc.shape))
+
+        if (out.height, out.width) != (height, width) or out.flow.shape[-2] < timesize:
+            raise ValueError("'out' buffers do not fit the region and the time range")
+
+        # буфер концентраций на одну ось (переменная) больше, если 'target_names' передан
+        conc_shape = out.flow.shape if target_names is None else (len(target_names), *out.flow.shape)
+        if out.conc.shape != conc_shape:
+            raise ValueError(f"'out' concentration buffer has shape {out.conc.shape}, expected {conc_shape}")
+
+        border = BorderSeries(conc=out.conc[..., :timesize, :], flow=out.flow[..., :timesize, :], height=height, width=width)
+
+        # буферы концентраций по переменным
+        if target_names is None:
+            targets = [(self.target_name, border.conc)]
+        else:
+            targets = list(zip(target_names, border.conc))
+
+        lat = slice(region_id.up, region_id.down + 1)
+        lon = slice(region_id.left, region_id.right + 1)
+        strips = {
+            "right": (region_id.right, lat, "U"),
+            "left": (region_id.left, lat, "U"),
+            "down": (lon, region_id.down, "V"),
+            "up": (lon, region_id.up, "V"),
+        }
+
+        for edge, (edge_lon, edge_lat, flow_name) in strips.items():
+            edge_slice = border.getEdge(edge)
+            for name, conc in targets:
+                conc[..., edge_slice] = self.getStrip(name, edge_lon, edge_lat, start_id, end_id)
+            border.flow[..., edge_slice] = self.getStrip(flow_name, edge_lon, edge_lat, start_id, end_id)
+
+        return border
+
+    def getConvDataSeries(self, region_id: Id, start_id: int, end_id: int) -> ConvOriginalDayData:
+        """
+        Возвращает сырые данные,  необходимые для расчета конвергенции,  для всех индексов
+        времени от 'start_id' до 'end_id' включительно
+        """
+        conc = self.getBorderConcSeries(region_id, start_id, end_id)
+        flow = self.getBorderFlowSeries(region_id, start_id, end_id)
+
+        convdata = ConvOriginalDayData(conc=conc, flow=flow)
+        return convdata
+
     def close(self) -> None:
         """Закрытие базы данных"""
-        self._db.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
 @dataclass
@@ -1,7 +1,11 @@
 import numpy as np
 
+from typing import Iterator
+
 from src.tools import CoordTools, Mode, verifyMap
 from src.data_loading import  DataLoader, BalanceData
+from src.prefix_sums import SumTable, BorderFluxTable
+from src.cache import ResultCache
 from src.containers import *
 from src.constants import *
 
@@ -35,9 +39,9 @@ class RegionProcessor():
         self._grid: Grid = grid if grid else CoordTools.calcGrid()
         self._id: Id = self.getId(self._region, self._grid)
         self._grid_region: Region = self.getGridRegion(self._region, self._grid)
-        self._cell: Cell = self.getCell(self._grid_region)
+        self._cell: Cell = self.getGridCell(self._id, self._grid)
 
-        self.areas_matrix: np.ndarray = self.calcAreasMatrix(self._grid_region)
+        self.areas_matrix: np.ndarray = self.getAreasView(self._id, self._grid)
     
     @property
     def id(self) -> Id:
@@ -69,10 +73,8 @@ class RegionProcessor():
         """
         Рассчитывает краевые значение региона в индексах и возвращает результат
         """
-        left = CoordTools.closestId(region.left, grid.lon) + 1
-        right = CoordTools.closestId(region.right, grid.lon) + 1
-        down = CoordTools.closestId(region.down, grid.lat)
-        up = CoordTools.closestId(region.up, grid.lat)
+        coords = np.array([region.down, region.up, region.left, region.right])
+        down, up, left, right = map(int, grid.index.snapIds(coords)[0])
 
         id = Id(left=left, right=right, down=down, up=up)
         return id
@@ -82,10 +84,8 @@ class RegionProcessor():
         """
         Изменяет координаты региона на ближайшие значения сетки и возвращает результат
         """
-        left = CoordTools.closest(region.left, grid.lon)
-        right = CoordTools.closest(region.right, grid.lon)
-        down = CoordTools.closest(region.down, grid.lat)
-        up = CoordTools.closest(region.up, grid.lat)
+        coords = np.array([region.down, region.up, region.left, region.right])
+        down, up, left, right = map(float, grid.index.snapCoords(coords)[0])
 
         grid_region = Region(left=left, right=right, down=down, up=up)
         return grid_region
@@ -101,6 +101,35 @@ class RegionProcessor():
         cell = Cell(left=CELL_LENGTH_METERS, right=CELL_LENGTH_METERS, down=down, up=up)
         return cell
 
+    @staticmethod
+    def getGridCell(id: Id, grid: Grid) -> Cell:
+        """
+        Возвращает параметры краевых ячеек в метрах по таблицам размеров ячеек сетки
+        (см. Grid.geometry)
+        """
+        geometry = grid.geometry
+
+        cell = Cell(
+            left=float(geometry.meridian_lengths[id.up]),
+            right=float(geometry.meridian_lengths[id.up]),
+            down=float(geometry.parallel_lengths[id.down]),
+            up=float(geometry.parallel_lengths[id.up]),
+        )
+        return cell
+
+    @staticmethod
+    def getAreasView(id: Id, grid: Grid) -> np.ndarray:
+        """
+        Возвращает матрицу площадей ячеек региона  (широта, долгота)  как  представление
+        таблицы площадей сетки (см. Grid.geometry) без выделения памяти под матрицу
+
+        Матрица доступна только для чтения
+        """
+        row_areas = grid.geometry.areas[id.up : id.down + 1]
+        width = id.right - id.left + 1
+
+        return np.broadcast_to(row_areas[:, np.newaxis], (row_areas.size, width))
+
     def getRegionData(self) -> RegionData:
         """Возвращает контейнер с основными данными региона"""
 
@@ -174,6 +203,23 @@ class SumCalculator():
         total_sum = (cellareas * values_in_points).sum()
         return float(total_sum)
     
+    @staticmethod
+    def calcSumSeries(cube: np.ndarray, regdata: RegionData) -> np.ndarray:
+        """
+        Рассчитывает временной ряд сумм в регионе и возвращает результат
+
+        :param cube: 3D-numpy.ndarray с осями (время, широта, долгота), значения  в  ячейках
+            ограничивающего прямоугольника региона (см. DataLoader.getCube)
+        :type cube: numpy.ndarray
+        ...
+        :return: суммарное содержание вещества в регионе для каждой единицы времени (в кг)
+        :rtype: numpy.ndarray
+        """
+        if cube.ndim != 3:
+            raise ValueError("'cube' must be 3-dimensional array")
+
+        return (cube * regdata.cellareas).sum(axis=(1, 2))
+
     def __call__(self, data_map: np.ndarray, regdata: RegionData) -> float:
         return self.calcSum(data_map, regdata)
 
@@ -199,27 +245,80 @@ class ConvCalculator():
         return values
     
     @staticmethod
-    def calcIncome(conv_values: ConvValue) -> float:
-        """Рассчитывает приход"""
-        income = float(
-            conv_values.right[np.argwhere(conv_values.right < 0)].sum() * -1
-            + conv_values.left[np.argwhere(conv_values.left > 0)].sum()
-            + conv_values.down[np.argwhere(conv_values.down > 0)].sum()
-            + conv_values.up[np.argwhere(conv_values.up < 0)].sum() * -1
+    def calcIncomeSeries(conv_values: ConvValue) -> np.ndarray:
+        """
+        Рассчитывает приход для массивов потоков с осями (..., длина границы)
+
+        Суммирование идет по последней оси, поэтому для массивов с осями (время,  длина
+        границы) возвращается временной ряд прихода
+        """
+        income = (
+            np.minimum(conv_values.right, 0).sum(axis=-1) * -1
+            + np.maximum(conv_values.left, 0).sum(axis=-1)
+            + np.maximum(conv_values.down, 0).sum(axis=-1)
+            + np.minimum(conv_values.up, 0).sum(axis=-1) * -1
         )
         return income
 
     @staticmethod
-    def calcOutcome(conv_values: ConvValue) -> float:
-        """Рассчитывает уход"""
-        outcome = float(
-            conv_values.right[np.argwhere(conv_values.right >= 0)].sum()
-            + conv_values.left[np.argwhere(conv_values.left <= 0)].sum() * -1
-            + conv_values.down[np.argwhere(conv_values.down <= 0)].sum() * -1
-            + conv_values.up[np.argwhere(conv_values.up >= 0)].sum()
+    def calcOutcomeSeries(conv_values: ConvValue) -> np.ndarray:
+        """
+        Рассчитывает уход для массивов потоков с осями (..., длина границы)
+
+        Суммирование идет по последней оси, поэтому для массивов с осями (время,  длина
+        границы) возвращается временной ряд ухода
+        """
+        outcome = (
+            np.maximum(conv_values.right, 0).sum(axis=-1)
+            + np.minimum(conv_values.left, 0).sum(axis=-1) * -1
+            + np.minimum(conv_values.down, 0).sum(axis=-1) * -1
+            + np.maximum(conv_values.up, 0).sum(axis=-1)
         )
         return outcome
 
+    @staticmethod
+    def calcIncomeOutcomeBatch(border: BorderSeries,
+                               cells: Cell | list[Cell],
+                               seconds: int,
+                               work: np.ndarray | None = None,
+                              ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Рассчитывает внос и вынос вещества для граничных значений в общих буферах без
+        промежуточных контейнеров для границ и единиц времени
+
+        :param border: граничные значения с осями (время, периметр) или (регион,  время,
+            периметр) (см. DataLoader.getBorderSeries)
+        :type border: BorderSeries
+        :param cells: параметры краевых ячеек региона или список для каждого региона
+        :type cells: Cell | list[Cell]
+        :param work: буфер формы border.conc для промежуточного результата; если None,
+            выделяется
+        :return: (income, outcome) с осями (время) или (регион, время)
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        factors = border.calcEdgeFactors(cells)
+        if factors.ndim == 2:
+            factors = factors[:, np.newaxis, :]
+
+        # поток внутрь региона через каждую ячейку периметра
+        inward = np.multiply(border.conc, border.flow, out=work)
+        inward *= factors
+
+        net = inward.sum(axis=-1)
+        income = np.maximum(inward, 0, out=inward).sum(axis=-1)
+
+        return income * seconds, (income - net) * seconds
+
+    @staticmethod
+    def calcIncome(conv_values: ConvValue) -> float:
+        """Рассчитывает приход"""
+        return float(ConvCalculator.calcIncomeSeries(conv_values))
+
+    @staticmethod
+    def calcOutcome(conv_values: ConvValue) -> float:
+        """Рассчитывает уход"""
+        return float(ConvCalculator.calcOutcomeSeries(conv_values))
+
     def calcConv(self,
                  convdata: ConvOriginalDayData,
                  regdata: RegionData,
@@ -250,6 +349,37 @@ class ConvCalculator():
         else:
             raise ValueError("invalid 'mode'") 
 
+    def calcConvSeries(self,
+                       convdata: ConvOriginalDayData,
+                       regdata: RegionData,
+                       seconds: int,
+                       mode: Mode = Mode.TOTAL,
+                      ) -> np.ndarray | tuple:
+        """
+        Рассчитывает временной ряд конвергенции в регионе без цикла по времени
+
+        :param convdata: данные, необходимые для расчета конвергенции, массивы  с  осями
+            (время, длина границы) (см. DataLoader.getConvDataSeries)
+        :type convdata: ConvOriginalDayData
+        :param mode: [Mode.TOTAL, Mode.SEP]  -  определяет  тип  возвращаемого  значения; если
+            Mode.TOTAL  -  возвращается временной ряд переноса вещества в регионе, если
+            Mode.SEP - кортеж (income, outcome) с временными рядами вноса и выноса вещества
+        :type mode: Mode
+        """
+        values = self.getConvValue(convdata.conc, convdata.flow, regdata.cell)
+
+        income = self.calcIncomeSeries(values) * seconds
+        outcome = self.calcOutcomeSeries(values) * seconds
+
+        if mode == Mode.SEP:
+            return income, outcome
+        
+        elif mode == Mode.TOTAL:
+            return (income - outcome)
+        
+        else:
+            raise ValueError("invalid 'mode'") 
+
     def __call__(self,
                  convdata: ConvOriginalDayData,
                  regdata: RegionData,
@@ -302,16 +432,24 @@ class BalanceCalculator():
         - рассчитывает временной ряд баланса вещества  в атмосфере для заданных региона и
         промежутка времени и возвращает результат
 
+    calcBalanceFromArrays() -> np.ndarray
+        - рассчитывает временной ряд баланса по  заранее  прочитанным  массивам  без  цикла
+        по времени и возвращает результат
+
+    Параметр конструктора result_cache: ResultCache | None - кэш результатов  на  диске
+    для calcRegionBalance (см. src.cache.ResultCache)
+
     Примеры использования:
     ----------------------
     >>> balance_calculator = BalaceCalculator(regdata, data_loader, date_range)
     >>> balance = balance_calculator.getBalanceSeries()
     """
 
-    def __init__(self) -> None:
+    def __init__(self, result_cache: ResultCache | None = None) -> None:
         """Инициализация"""
         self.sum_calculator = SumCalculator()
         self.conv_calculator = ConvCalculator()
+        self.result_cache = result_cache
     
     @staticmethod
     def _verifyParams(regdata: RegionData, data_loader: DataLoader, date_range: DateRange) -> None:
@@ -338,27 +476,14 @@ class BalanceCalculator():
         # каждое предыдущее из следующего, так что массив изменения массы
         # будет на 1 меньше
         start_id, end_id = date_range.start_id, date_range.end_id + 1
-        sums = np.zeros(date_range.timesize + 1)
-    
-        for time_id in range(start_id, end_id + 1):
-            concmap = data_loader.getTargetMap(time_id)
-            sums[time_id - start_id] = self.sum_calculator(concmap, regdata)
-    
-        return sums
+        cube = data_loader.getTargetCube(regdata.id, start_id, end_id)
+
+        return self.sum_calculator.calcSumSeries(cube, regdata)
 
     @staticmethod
     def calcSumsDiffSeries(sums: np.ndarray) -> np.ndarray:
         """Рассчитывает разницу сумм концетраций"""
-        # sums = self.calcSumSeries()
-
-        sums_len = sums.size
-        diff_sums_len = sums_len - 1
-
-        diff_sums = np.zeros(diff_sums_len)
-        for time_id in range(diff_sums_len):
-            diff_sums[time_id] = sums[time_id + 1] - sums[time_id]
-
-        return diff_sums
+        return np.diff(sums)
     
     def calcConvSeries(self, balance_data: BalanceData) -> np.ndarray:
         """Рассчитывает разницу конвергенций"""
@@ -368,15 +493,11 @@ class BalanceCalculator():
         data_loader = balance_data.data
         date_range = data_loader.date_range
 
-        # расчет конвергенции (для каждой единицы времени)
+        # граничные значения за весь диапазон времени, оси (время, длина границы)
         start_id, end_id = date_range.start_id, date_range.end_id
-        convs = np.zeros(end_id - start_id + 1)
+        convdata = data_loader.getConvDataSeries(regdata.id, start_id, end_id)
 
-        for day_id in range(start_id, end_id + 1):
-            convdata =data_loader.getConvData(day_id, regdata.id)
-            convs[day_id - start_id] = self.conv_calculator(convdata, regdata, date_range.seconds)
-
-        return convs
+        return self.conv_calculator.calcConvSeries(convdata, regdata, date_range.seconds)
 
     @staticmethod
     def calcBalanceSeries(diff_sums: np.ndarray, convs: np.ndarray) -> np.ndarray:
@@ -398,6 +519,31 @@ class BalanceCalculator():
         
         return diff_sums - convs
 
+    def calcBalanceFromArrays(self,
+                              cube: np.ndarray,
+                              convdata: ConvOriginalDayData,
+                              regdata: RegionData,
+                              seconds: int,
+                             ) -> np.ndarray:
+        """
+        Рассчитывает временной ряд баланса по заранее прочитанным данным без  цикла  по
+        времени
+
+        :param cube: значения в ограничивающем прямоугольнике  региона  с  осями  (время,
+            широта, долгота), на одну единицу времени больше, чем 'convdata'
+        :type cube: 3D массив numpy
+        :param convdata: граничные значения с осями (время, длина границы)
+        :type convdata: ConvOriginalDayData
+        """
+        # расчет сумм
+        sums = self.sum_calculator.calcSumSeries(cube, regdata)
+        diff_sums = self.calcSumsDiffSeries(sums)
+        # расчет конвергенции
+        convs = self.conv_calculator.calcConvSeries(convdata, regdata, seconds)
+
+        # расчет баланса
+        return self.calcBalanceSeries(diff_sums, convs)
+
     def makeBalanceDF(self, balance_series: np.ndarray) -> pd.DataFrame:
         """
         Возвращает временной ряд баласа в pandas.DataFrame
@@ -426,14 +572,19 @@ class BalanceCalculator():
         :return: временной ряд баланса
         :rtype: np.ndarray | pd.DataFrame
         """
-        # расчет сумм
-        sums = self.calcSumSeries(data)
-        diff_sums = self.calcSumsDiffSeries(sums)
-        # расчет конвергенции
-        convs = self.calcConvSeries(data)
+        regdata = data.reg_data
+        data_loader = data.data
+        date_range = data_loader.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
 
-        # расчет баланса
-        balance = self.calcBalanceSeries(diff_sums, convs)
+        # значения в регионе (на одно больше, см. calcSumSeries) и на его границах
+        cube = data_loader.getTargetCube(regdata.id, start_id, end_id + 1)
+        border = data_loader.getBorderSeries(regdata.id, start_id, end_id)
+
+        diff_sums = self.calcSumsDiffSeries(self.sum_calculator.calcSumSeries(cube, regdata))
+        income, outcome = self.conv_calculator.calcIncomeOutcomeBatch(border, regdata.cell, date_range.seconds)
+
+        balance = self.calcBalanceSeries(diff_sums, income - outcome)
 
         if mode == Mode.ARRAY:
             return balance
@@ -441,6 +592,68 @@ class BalanceCalculator():
         elif mode == Mode.DF:
             return self.makeBalanceDF(balance)
     
+    def iterBalance(self,
+                    data: BalanceData,
+                    chunk_size: int = 8,
+                    initial_sum: float | None = None,
+                   ) -> Iterator[BalanceRecord]:
+        """
+        Рассчитывает временной ряд баланса по частям и  возвращает  их  по  мере  расчета
+        (см. BalanceRecord)
+
+        Для части [начало, конец] читаются концентрации в моменты  [начало + 1, конец + 1]
+        и граничные значения в моменты [начало, конец]; между частями хранится только сумма
+        в последний момент предыдущей части, так что объем памяти не  зависит  от  длины
+        временного диапазона
+
+        :param chunk_size: единиц времени в одной части (1 - по одной единице времени)
+        :param initial_sum: сумма содержания вещества в регионе в начальный момент; если
+            None, она рассчитывается по данным (например, при продолжении расчета передается
+            последняя сумма предыдущего расчета)
+        """
+        regdata = data.reg_data
+        data_loader = data.data
+        date_range = data_loader.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
+
+        previous_sum = initial_sum
+        if previous_sum is None:
+            cube = data_loader.getTargetCube(regdata.id, start_id, start_id)
+            previous_sum = float(self.sum_calculator.calcSumSeries(cube, regdata)[0])
+
+        batches = data_loader.iterTimeBatches(start_id, end_id, chunk_size)
+
+        # буферы граничных значений общие для всех частей
+        id = regdata.id
+        border = BorderSeries.empty(
+            (max(batch_end - batch_start + 1 for batch_start, batch_end in batches),),
+            height=id.down - id.up + 1,
+            width=id.right - id.left + 1,
+        )
+        work = np.empty_like(border.conc)
+
+        for chunk_start, chunk_end in batches:
+            cube = data_loader.getTargetCube(regdata.id, chunk_start + 1, chunk_end + 1)
+            sums = self.sum_calculator.calcSumSeries(cube, regdata)
+
+            diff_sum = np.diff(sums, prepend=previous_sum)
+            previous_sum = float(sums[-1])
+
+            timesize = chunk_end - chunk_start + 1
+            chunk_border = data_loader.getBorderSeries(regdata.id, chunk_start, chunk_end, out=border)
+            income, outcome = self.conv_calculator.calcIncomeOutcomeBatch(
+                chunk_border, regdata.cell, date_range.seconds, work[:timesize]
+            )
+
+            yield BalanceRecord(
+                time=data_loader.time_axis[chunk_start : chunk_end + 1],
+                diff_sum=diff_sum,
+                income=income,
+                outcome=outcome,
+                balance=diff_sum - (income - outcome),
+                last_sum=previous_sum,
+            )
+
     def calcRegionBalance(self, region: Region, data: DataLoader) -> RegionBalance:
         """Рассчитывает баланс для данного региона"""
         # обрабатываем регион
@@ -448,10 +661,191 @@ class BalanceCalculator():
         processor = RegionProcessor(region, grid)
         regdata = processor.getRegionData()
 
-        balance_data = BalanceData(reg_data=regdata, data=data)
-        balance = self.getBalanceSeries(balance_data)
+        if self.result_cache is None:
+            balance = self.getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+            return RegionBalance(region, balance)
+
+        # регионы, совпадающие после привязки к сетке, имеют общий ключ
+        date_range = data.date_range
+        key = self.result_cache.makeKey(
+            kind="balance",
+            data=data.fingerprint,
+            target=data.target_name,
+            id=[regdata.id.down, regdata.id.up, regdata.id.left, regdata.id.right],
+            start_id=date_range.start_id,
+            end_id=date_range.end_id,
+            seconds=date_range.seconds,
+        )
+
+        balance = self.result_cache.get(key)
+        if balance is None:
+            balance = self.getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+            self.result_cache.put(key, balance)
 
         return RegionBalance(region, balance)
-   
+
+    def calcRegionBalances(self,
+                           regions: list[Region] | RegionSet,
+                           data: DataLoader,
+                           chunk_size: int = 8,
+                           tables: tuple[SumTable, BorderFluxTable] | None = None,
+                          ) -> RegionBalances:
+        """
+        Рассчитывает балансы для множества регионов за один проход по данным
+
+        Регионы объединяются в группы,  использующие  общие  блоки  данных  (см.
+        ReadPlanner.groupWindows). Для каждой группы и каждой части временного  диапазона
+        (по 'chunk_size' единиц времени) один раз читается ограничивающий  прямоугольник
+        группы (см. DataLoader.iterCubeChunks), по нему строятся таблицы накопленных сумм
+        (см. SumTable,  BorderFluxTable),  из  которых  рассчитываются  суммы  и  конвергенция
+        каждого региона группы
+
+        :param tables: таблицы по всей сетке для временного диапазона 'data'  (например,
+            сохраненные SumTable.fromLoader и BorderFluxTable.fromLoader); если переданы,
+            данные не читаются, а балансы рассчитываются по этим таблицам
+        :type tables: tuple[SumTable, BorderFluxTable] | None
+        """
+        if not isinstance(regions, RegionSet):
+            regions = RegionSet.fromRegions(regions)
+
+        if tables is None:
+            balance = self._calcRegionBalancesArray(regions, data, chunk_size, None)[0]
+        else:
+            balance = self._calcTablesBalances(regions, data, *tables)
+
+        return RegionBalances(regions=regions.coords, balance=balance, time_series=data.date_range.time_series)
+
+    @staticmethod
+    def _calcTablesBalances(regions: RegionSet,
+                            data: DataLoader,
+                            sum_table: SumTable,
+                            flux_table: BorderFluxTable,
+                           ) -> np.ndarray:
+        """Рассчитывает балансы регионов, массив (регион, время), по готовым таблицам"""
+        date_range = data.date_range
+
+        if sum_table.timesize != date_range.timesize + 1 or flux_table.timesize != date_range.timesize:
+            raise ValueError("'tables' do not match the date range of 'data'")
+
+        ids = regions.snapIds(data.getGrid())
+        sums = sum_table.calcSums(ids)
+        convs = flux_table.calcConvs(ids, date_range.seconds)
+
+        return np.diff(sums, axis=1) - convs
+
+    def calcRegionTargetsBalances(self,
+                                  regions: list[Region] | RegionSet,
+                                  data: DataLoader,
+                                  chunk_size: int = 8,
+                                  target_names: list[str] | None = None,
+                                 ) -> TargetsBalances:
+        """
+        Рассчитывает балансы для множества регионов и нескольких переменных  с  концентрациями
+        за один проход по данным (см. calcRegionBalances)
+
+        U и V каждой части временного диапазона читаются один раз и используются для  всех
+        переменных
+
+        :param target_names: названия переменных; если None, используются  все  переменные
+            DataLoader (см. DataLoader.target_names)
+        """
+        if not isinstance(regions, RegionSet):
+            regions = RegionSet.fromRegions(regions)
+
+        target_names = data.target_names if target_names is None else list(target_names)
+        balance = self._calcRegionBalancesArray(regions, data, chunk_size, target_names)
+
+        balances = TargetsBalances(
+            target_names=target_names,
+            regions=regions.coords,
+            balance=balance,
+            time_series=data.date_range.time_series,
+        )
+        return balances
+
+    @staticmethod
+    def _calcRegionBalancesArray(regions: RegionSet,
+                                 data: DataLoader,
+                                 chunk_size: int,
+                                 target_names: list[str] | None,
+                                ) -> np.ndarray:
+        """
+        Рассчитывает балансы регионов по таблицам накопленных сумм
+
+        :return: массив (переменная, регион, время); если 'target_names' - None, то одна
+            переменная - основная переменная DataLoader
+        """
+        grid = data.getGrid()
+        date_range = data.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
+
+        ids = regions.snapIds(grid)
+
+        targets_count = 1 if target_names is None else len(target_names)
+        sums = np.zeros((targets_count, len(regions), date_range.timesize + 1))
+        convs = np.zeros((targets_count, len(regions), date_range.timesize))
+
+        # регионы, не использующие общих блоков данных, читаются отдельно: иначе общий
+        # ограничивающий прямоугольник далеких регионов покрывает почти всю сетку
+        windows = [Id(*map(int, region_id)) for region_id in ids]
+        groups = data.planner.groupWindows(data.target_name, windows)
+
+        for bounds, region_ids in groups:
+            group_ids = ids[region_ids]
+            row_areas = grid.geometry.areas[bounds.up : bounds.down + 1]
+            row_lengths = grid.geometry.parallel_lengths[bounds.up : bounds.down + 1]
+
+            chunks = data.iterCubeChunks(bounds, start_id, end_id, chunk_size, target_names=target_names)
+            for chunk_start, chunk_end, chunk in chunks:
+                targets = chunk.target[np.newaxis] if target_names is None else chunk.target
+
+                # для сумм нужна одна лишняя единица времени в конце диапазона
+                sums_end = chunk_start + targets.shape[1] - 1
+                timesize = chunk_end - chunk_start + 1
+
+                for target_id, target in enumerate(targets):
+                    sum_table = SumTable.fromCube(target, row_areas, bounds.up, bounds.left)
+                    sums[target_id, region_ids, chunk_start - start_id : sums_end - start_id + 1] = (
+                        sum_table.calcSums(group_ids)
+                    )
+
+                    flux_table = BorderFluxTable.fromCubes(
+                        target[:timesize], chunk.U, chunk.V, row_lengths, bounds.up, bounds.left
+                    )
+                    convs[target_id, region_ids, chunk_start - start_id : chunk_end - start_id + 1] = (
+                        flux_table.calcConvs(group_ids, date_range.seconds)
+                    )
+
+        return np.diff(sums, axis=-1) - convs
+
+    def getTargetsBalanceSeries(self, data: BalanceData, target_names: list[str] | None = None) -> np.ndarray:
+        """
+        Рассчитывает временные ряды баланса региона для нескольких переменных с концентрациями
+        (см. getBalanceSeries); граничные значения U и V читаются один раз
+
+        :param target_names: названия переменных; если None, используются  все  переменные
+            DataLoader (см. DataLoader.target_names)
+        :return: балансы, массив (переменная, время)
+        :rtype: np.ndarray
+        """
+        regdata = data.reg_data
+        data_loader = data.data
+        date_range = data_loader.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
+
+        target_names = data_loader.target_names if target_names is None else list(target_names)
+
+        diff_sums = np.stack([
+            self.calcSumsDiffSeries(self.sum_calculator.calcSumSeries(
+                data_loader.getCube(name, regdata.id, start_id, end_id + 1), regdata
+            ))
+            for name in target_names
+        ])
+
+        border = data_loader.getBorderSeries(regdata.id, start_id, end_id, target_names=target_names)
+        income, outcome = self.conv_calculator.calcIncomeOutcomeBatch(border, regdata.cell, date_range.seconds)
+
+        return diff_sums - (income - outcome)
+
     def __call__(self, data: BalanceData, mode: Mode = Mode.ARRAY) -> np.ndarray | pd.DataFrame:
         self.getBalanceSeries(data, mode)
@@ -0,0 +1,189 @@
+"""
+Дорасчет баланса по мере пополнения файла данных
+
+Состояние расчета для (файл, регион, переменная) хранится в файле .npz: рассчитанные
+временные ряды, индекс последнего обработанного времени и сумма содержания вещества  в
+следующий момент. Дорасчет читает только добавленные в файл единицы времени.
+
+Использование:
+--------------
+>>> state = BalanceState.open("states", data_loader, region)
+>>> new_steps = state.refresh(data_loader)
+>>> state.save()
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import numpy as np
+
+from dataclasses import dataclass, field
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.containers import Region, BalanceRecord
+
+
+def _regionCoords(region: Region) -> list[float]:
+    return [region.down, region.up, region.left, region.right]
+
+
+@dataclass
+class BalanceState():
+    """
+    Состояние расчета баланса региона по одному файлу данных
+
+    Атрибуты:
+    ---------
+    path: str
+        - путь к файлу состояния
+    source: str
+        - путь к файлу данных
+    region: Region
+        - регион
+    target_name: str
+        - название переменной с концентрациями
+    start_id, end_id: int
+        - индексы первого и последнего рассчитанного времени;  если  ничего  не  рассчитано,
+        end_id = start_id - 1
+    last_sum: float | None
+        - сумма содержания вещества в момент end_id + 1
+    time, diff_sum, income, outcome, balance: np.ndarray
+        - рассчитанные временные ряды (см. BalanceRecord)
+    """
+    path: str
+    source: str
+    region: Region
+    target_name: str
+    start_id: int
+    end_id: int
+    last_sum: float | None = None
+    time: np.ndarray = field(default_factory=lambda: np.array([], dtype="datetime64[s]"))
+    diff_sum: np.ndarray = field(default_factory=lambda: np.array([]))
+    income: np.ndarray = field(default_factory=lambda: np.array([]))
+    outcome: np.ndarray = field(default_factory=lambda: np.array([]))
+    balance: np.ndarray = field(default_factory=lambda: np.array([]))
+
+    SERIES = ("time", "diff_sum", "income", "outcome", "balance")
+
+    @staticmethod
+    def statePath(directory: str, source: str, region: Region, target_name: str) -> str:
+        """Возвращает путь к файлу состояния для (файл, регион, переменная)"""
+        key = json.dumps([os.path.abspath(source), _regionCoords(region), target_name])
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(directory, f"balance_{name}.npz")
+
+    @classmethod
+    def open(cls, directory: str, data: DataLoader, region: Region) -> BalanceState:
+        """
+        Загружает состояние для файла 'data' и региона 'region' или, если его  нет,  создает
+        пустое состояние, начинающееся с начала временного диапазона 'data'
+        """
+        path = cls.statePath(directory, data.path, region, data.target_name)
+        state = cls.load(path)
+
+        if state is None:
+            start_id = data.date_range.start_id
+            state = cls(
+                path=path,
+                source=os.path.abspath(data.path),
+                region=region,
+                target_name=data.target_name,
+                start_id=start_id,
+                end_id=start_id - 1,
+            )
+
+        return state
+
+    @classmethod
+    def load(cls, path: str) -> BalanceState | None:
+        """Загружает состояние из файла 'path'; возвращает None, если файла нет"""
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as file:
+            meta = json.loads(str(file["meta"]))
+            series = {name: file[name] for name in cls.SERIES}
+
+        state = cls(
+            path=path,
+            source=meta["source"],
+            region=Region(*meta["region"]),
+            target_name=meta["target"],
+            start_id=meta["start_id"],
+            end_id=meta["end_id"],
+            last_sum=meta["last_sum"],
+            **series,
+        )
+        return state
+
+    def save(self) -> None:
+        """Сохраняет состояние"""
+        meta = {
+            "source": self.source,
+            "region": _regionCoords(self.region),
+            "target": self.target_name,
+            "start_id": self.start_id,
+            "end_id": self.end_id,
+            "last_sum": self.last_sum,
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # запись во временный файл, чтобы прерванное сохранение не испортило состояние
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(file, meta=np.array(json.dumps(meta)), **{name: getattr(self, name) for name in self.SERIES})
+        os.replace(tmp_path, self.path)
+
+    def _verifySource(self, data: DataLoader) -> None:
+        """Проверяет, что 'data' - тот же файл, дополненный новыми единицами времени"""
+        if os.path.abspath(data.path) != self.source or data.target_name != self.target_name:
+            raise ValueError(f"State {self.path} belongs to other data")
+
+        if self.end_id >= data.time_axis.size:
+            raise ValueError(f"Data {data.path} is shorter than the processed time range")
+
+        if self.time.size and self.time[-1] != data.time_axis[self.end_id]:
+            raise ValueError(f"Time axis of {data.path} has changed")
+
+    def refresh(self, data: DataLoader, chunk_size: int = 8) -> int:
+        """
+        Рассчитывает баланс для единиц времени,  добавленных  в  файл  после  последнего
+        расчета, и дописывает его к состоянию
+
+        Баланс в момент t требует концентраций в момент t + 1, поэтому последний  момент
+        файла рассчитывается при следующем дорасчете. Временной диапазон 'data' меняется
+
+        :param data: DataLoader, открытый заново после пополнения файла
+        :return: количество новых единиц времени
+        :rtype: int
+        """
+        self._verifySource(data)
+
+        start_id = self.end_id + 1
+        end_id = data.time_axis.size - 2
+        if end_id < start_id:
+            return 0
+
+        data.setDateRange(data.getDatetimeById(start_id), data.getDatetimeById(end_id))
+
+        regdata = RegionProcessor(self.region, data.getGrid()).getRegionData()
+        balance_data = BalanceData(reg_data=regdata, data=data)
+
+        records = list(BalanceCalculator().iterBalance(balance_data, chunk_size, self.last_sum))
+        self._append(records)
+        self.end_id = end_id
+
+        return end_id - start_id + 1
+
+    def _append(self, records: list[BalanceRecord]) -> None:
+        """Дописывает рассчитанные части к временным рядам состояния"""
+        for name in self.SERIES:
+            setattr(self, name, np.concatenate([getattr(self, name)] + [getattr(record, name) for record in records]))
+
+        self.last_sum = records[-1].last_sum
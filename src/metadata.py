@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+import json
+import numpy as np
+import h5netcdf
+
+from dataclasses import dataclass
+
+
+@dataclass
+class VariableInfo():
+    """Описание переменной файла NetCDF"""
+    shape: tuple
+    dtype: str
+    # форма блоков (chunks) HDF5, None - если переменная хранится непрерывно
+    chunks: tuple | None
+    compression: str | None
+    compression_opts: int | None
+
+
+@dataclass
+class DatasetIndex():
+    """
+    Индекс метаданных файла NetCDF
+
+    Хранит раскодированную ось времени, векторы сетки, формы,  типы  и  разбиение  на
+    блоки всех переменных. Сохраняется рядом с файлом данных (см. indexPath) и считается
+    действительным, пока у файла данных не изменились размер и время модификации
+
+    Атрибуты:
+    ---------
+    time_axis: np.ndarray
+        - времена в формате numpy.datetime64
+    lat, lon: np.ndarray
+        - координаты сетки
+    variables: dict[str, VariableInfo]
+        - описание переменных
+    file_size: int
+        - размер файла данных в байтах
+    file_mtime: float
+        - время модификации файла данных
+    """
+    time_axis: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    variables: dict[str, VariableInfo]
+    file_size: int
+    file_mtime: float
+
+    @staticmethod
+    def indexPath(path: str) -> str:
+        """Возвращает путь к файлу индекса для файла данных 'path'"""
+        return path + ".index.npz"
+
+    @staticmethod
+    def describeVariables(db: h5netcdf.File) -> dict[str, VariableInfo]:
+        """Собирает описание всех переменных открытого файла"""
+        variables = {}
+        for name, variable in db.variables.items():
+            chunks = variable.chunks
+            variables[name] = VariableInfo(
+                shape=tuple(variable.shape),
+                dtype=variable.dtype.str,
+                chunks=tuple(chunks) if chunks else None,
+                compression=variable.compression,
+                compression_opts=variable.compression_opts,
+            )
+
+        return variables
+
+    @classmethod
+    def fromDatabase(cls, db: h5netcdf.File, path: str, time_axis: np.ndarray) -> DatasetIndex:
+        """Строит индекс по открытому файлу данных"""
+        stat = os.stat(path)
+
+        index = cls(
+            time_axis=time_axis,
+            lat=np.array(db["lat"]),
+            lon=np.array(db["lon"]),
+            variables=cls.describeVariables(db),
+            file_size=stat.st_size,
+            file_mtime=stat.st_mtime,
+        )
+        return index
+
+    def isValid(self, path: str) -> bool:
+        """Проверяет, что индекс соответствует файлу данных 'path'"""
+        stat = os.stat(path)
+        return self.file_size == stat.st_size and self.file_mtime == stat.st_mtime
+
+    def save(self, path: str) -> None:
+        """Сохраняет индекс рядом с файлом данных 'path'"""
+        meta = {
+            "variables": {name: info.__dict__ for name, info in self.variables.items()},
+            "file_size": self.file_size,
+            "file_mtime": self.file_mtime,
+        }
+
+        with open(self.indexPath(path), "wb") as file:
+            np.savez(
+                file,
+                time_axis=self.time_axis,
+                lat=self.lat,
+                lon=self.lon,
+                meta=np.array(json.dumps(meta)),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> DatasetIndex | None:
+        """
+        Загружает индекс файла данных 'path';  возвращает  None,  если  индекса  нет  или  он
+        устарел
+        """
+        index_path = cls.indexPath(path)
+        if not os.path.exists(index_path):
+            return None
+
+        try:
+            with np.load(index_path, allow_pickle=False) as file:
+                meta = json.loads(str(file["meta"]))
+                time_axis, lat, lon = file["time_axis"], file["lat"], file["lon"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        variables = {}
+        for name, info in meta["variables"].items():
+            info["shape"] = tuple(info["shape"])
+            info["chunks"] = tuple(info["chunks"]) if info["chunks"] else None
+            variables[name] = VariableInfo(**info)
+
+        index = cls(
+            time_axis=time_axis,
+            lat=lat,
+            lon=lon,
+            variables=variables,
+            file_size=meta["file_size"],
+            file_mtime=meta["file_mtime"],
+        )
+
+        return index if index.isValid(path) else None
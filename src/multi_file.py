@@ -0,0 +1,298 @@
+"""
+Набор файлов NetCDF с общей сеткой как один файл
+
+Файлы (например, по одному на год) упорядочиваются по первому времени и склеиваются по
+оси времени; файлы открываются при первом чтении, одновременно открыто не больше
+заданного количества файлов. Так временной диапазон, пересекающий границу  файлов,
+обрабатывается одним вызовом DataLoader.
+
+Использование:
+--------------
+>>> data = MultiFileDataLoader("../CO_flow_*.nc", "20220601_mean")
+>>> data.setDateRange(datetime(2022, 12, 1), datetime(2023, 2, 1))
+"""
+
+from __future__ import annotations
+
+import os
+import glob
+import h5netcdf
+import numpy as np
+
+from collections import OrderedDict
+
+from src.metadata import DatasetIndex
+from src.data_loading import DataLoader
+
+
+class VirtualVariable():
+    """
+    Переменная, склеенная по оси времени из переменных нескольких файлов
+
+    Предоставляет тот же интерфейс, что и h5netcdf.Variable; переменные,  не  зависящие
+    от времени (например, lat и lon), читаются из первого файла
+    """
+
+    def __init__(self, dataset: VirtualDataset, name: str) -> None:
+        """Инициализация"""
+        self._dataset: VirtualDataset = dataset
+        self.name: str = name
+
+        variable = dataset.getFile(0)[name]
+        self.dtype: np.dtype = variable.dtype
+        self.chunks: tuple | None = variable.chunks
+        self.compression: str | None = variable.compression
+        self.compression_opts: int | None = variable.compression_opts
+
+        self.is_temporal: bool = name == dataset.time_variable or variable.ndim == 3
+
+        shape = tuple(variable.shape)
+        if self.is_temporal:
+            shape = shape[:-1] + (int(dataset.offsets[-1]),)
+        self.shape: tuple = shape
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not self.is_temporal:
+            return self._dataset.getFile(0)[self.name][key]
+
+        key = key if isinstance(key, tuple) else (key,)
+        # ось времени - последняя
+        key = key + (slice(None),) * (self.ndim - len(key))
+        *space, time = key
+
+        if isinstance(time, slice):
+            return self._readSlice(tuple(space), time)
+
+        time = int(time)
+        if time < 0:
+            time += self.shape[-1]
+        if not 0 <= time < self.shape[-1]:
+            raise IndexError(f"Time index {time} is out of range")
+
+        file_id, local_id = self._dataset.locate(time)
+        return self._dataset.getFile(file_id)[self.name][(*space, local_id)]
+
+    def _readSlice(self, space: tuple, time: slice) -> np.ndarray:
+        """Читает срез по времени, собирая его из частей соседних файлов"""
+        start, stop, step = time.indices(self.shape[-1])
+        if step != 1:
+            return self[(*space, slice(start, max(stop, start)))][..., ::step]
+
+        offsets = self._dataset.offsets
+        parts = []
+        for file_id in range(len(offsets) - 1):
+            file_start, file_stop = offsets[file_id], offsets[file_id + 1]
+            if file_stop <= start or file_start >= stop:
+                continue
+
+            local = slice(max(start, file_start) - file_start, min(stop, file_stop) - file_start)
+            parts.append(self._dataset.getFile(file_id)[self.name][(*space, local)])
+
+        if not parts:
+            return self._dataset.getFile(0)[self.name][(*space, slice(0, 0))]
+
+        return parts[0] if len(parts) == 1 else np.concatenate(parts, axis=-1)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return np.asarray(self[(slice(None),) * self.ndim], dtype=dtype)
+
+
+class VirtualDataset():
+    """
+    Несколько файлов NetCDF, открытых как один файл с общей осью времени
+
+    Предоставляет тот же интерфейс, что и h5netcdf.File. Файлы открываются по мере
+    обращения к ним; если открыто больше 'max_open' файлов, давно не использовавшийся
+    файл закрывается
+
+    Параметры:
+    ----------
+    paths: list[str]
+        пути к файлам с одинаковой сеткой и одинаковыми переменными; упорядочиваются  по
+        первому времени. Оси времени файлов должны возрастать и продолжать друг  друга  без
+        перекрытий и пропусков
+
+    max_open: int
+        максимальное количество одновременно открытых файлов
+
+    open_kwargs: dict | None
+        дополнительные параметры h5netcdf.File (например, размер кэша блоков)
+    """
+
+    time_variable = "stime"
+
+    def __init__(self, paths: list[str], max_open: int = 4, open_kwargs: dict | None = None) -> None:
+        """Инициализация"""
+        if not paths:
+            raise ValueError("No data files to open")
+
+        if max_open < 1:
+            raise ValueError("max_open must be positive")
+
+        self.max_open: int = max_open
+        self._open_kwargs: dict = open_kwargs or {}
+        self._handles: OrderedDict[int, h5netcdf.File] = OrderedDict()
+
+        self.paths: list[str] = list(paths)
+        time_axes = [
+            DataLoader._decodeStimes(np.asarray(self.getFile(file_id)[self.time_variable][:]))
+            for file_id in range(len(self.paths))
+        ]
+
+        order = sorted(range(len(self.paths)), key=lambda file_id: time_axes[file_id][0])
+        self.close()
+        self.paths = [self.paths[file_id] for file_id in order]
+        time_axes = [time_axes[file_id] for file_id in order]
+
+        self.offsets: np.ndarray = np.concatenate(([0], np.cumsum([axis.size for axis in time_axes])))
+
+        self._verifyTime(time_axes)
+        self._verifyGrid()
+        self.variables: dict[str, VirtualVariable] = {
+            name: VirtualVariable(self, name) for name in self.getFile(0).variables
+        }
+
+    def _verifyTime(self, time_axes: list[np.ndarray]) -> None:
+        """
+        Проверяет, что общая ось времени возрастает, а файлы не перекрываются и  следуют
+        друг за другом без пропусков (с тем же шагом, что и внутри файлов)
+        """
+        for file_id, axis in enumerate(time_axes):
+            if np.any(np.diff(axis) <= np.timedelta64(0, "s")):
+                raise ValueError(f"Time axis of {self.paths[file_id]} is not increasing")
+
+        time_axis = np.concatenate(time_axes)
+        if time_axis.size < 2:
+            return None
+
+        step = time_axis[1] - time_axis[0]
+        for file_id in range(1, len(time_axes)):
+            gap = time_axes[file_id][0] - time_axes[file_id - 1][-1]
+
+            if gap <= np.timedelta64(0, "s"):
+                raise ValueError(f"Time axis of {self.paths[file_id]} overlaps {self.paths[file_id - 1]}")
+
+            if gap != step:
+                raise ValueError(f"Time axis has a gap between {self.paths[file_id - 1]} and {self.paths[file_id]}")
+
+    def _verifyGrid(self) -> None:
+        """Проверяет, что у всех файлов одинаковая сетка"""
+        lat = np.asarray(self.getFile(0)["lat"][:])
+        lon = np.asarray(self.getFile(0)["lon"][:])
+
+        for file_id in range(1, len(self.paths)):
+            db = self.getFile(file_id)
+            if not (np.array_equal(lat, db["lat"][:]) and np.array_equal(lon, db["lon"][:])):
+                raise ValueError(f"Grid of {self.paths[file_id]} differs from {self.paths[0]}")
+
+    def getFile(self, file_id: int) -> h5netcdf.File:
+        """Возвращает открытый файл с номером 'file_id', открывая его при необходимости"""
+        db = self._handles.get(file_id)
+
+        if db is None:
+            while len(self._handles) >= self.max_open:
+                _, evicted = self._handles.popitem(last=False)
+                evicted.close()
+
+            db = h5netcdf.File(self.paths[file_id], "r", **self._open_kwargs)
+            self._handles[file_id] = db
+
+        self._handles.move_to_end(file_id)
+        return db
+
+    def locate(self, time_id: int) -> tuple[int, int]:
+        """Возвращает (номер файла, индекс времени в файле) для общего индекса времени"""
+        file_id = int(np.searchsorted(self.offsets, time_id, side="right")) - 1
+        return file_id, time_id - int(self.offsets[file_id])
+
+    def __getitem__(self, name: str) -> VirtualVariable:
+        return self.variables[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.variables
+
+    def close(self) -> None:
+        """Закрывает все открытые файлы"""
+        while self._handles:
+            _, db = self._handles.popitem()
+            db.close()
+
+
+class MultiFileDataLoader(DataLoader):
+    """
+    DataLoader для набора файлов NetCDF с одинаковой сеткой (см. VirtualDataset)
+
+    Индексы времени, временной диапазон и все чтения относятся к общей оси  времени
+    набора файлов
+
+    Параметры:
+    ----------
+    paths: str | list[str]
+        шаблон путей (glob) или список путей к файлам
+
+    target_name: str | list[str]
+        название переменной с концентрациями или список названий (см. DataLoader)
+
+    max_open: int
+        максимальное количество одновременно открытых файлов
+
+    Остальные параметры - как у DataLoader; индекс метаданных набора файлов  рядом  с
+    файлами не сохраняется
+    """
+
+    def __init__(self, paths: str | list[str], target_name: str | list[str], max_open: int = 4, **kwargs) -> None:
+        """Инициализация"""
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(paths))
+
+        if not paths:
+            raise ValueError("No data files match the given paths")
+
+        self.paths: list[str] = list(paths)
+        self.max_open: int = max_open
+
+        super().__init__(self.paths[0], target_name, **kwargs)
+        self.path = self.paths[0]
+
+    @property
+    def _db(self) -> VirtualDataset:
+        """Возвращает набор файлов, открывая его при первом обращении"""
+        if self._file is None:
+            self._file = VirtualDataset(self.paths, self.max_open, self._getCacheOptions())
+        return self._file
+
+    def getIndex(self, use_index: bool = False) -> DatasetIndex:
+        """Строит индекс метаданных набора файлов"""
+        db = self._db
+        # пути в порядке общей оси времени
+        self.paths = list(db.paths)
+        stats = [os.stat(path) for path in self.paths]
+
+        index = DatasetIndex(
+            time_axis=self.getTimeAxis(),
+            lat=np.array(db["lat"]),
+            lon=np.array(db["lon"]),
+            variables=DatasetIndex.describeVariables(db),
+            file_size=sum(stat.st_size for stat in stats),
+            file_mtime=max(stat.st_mtime for stat in stats),
+        )
+        return index
+
+    @property
+    def fingerprint(self) -> dict:
+        """Возвращает описание набора файлов: пути, суммарный размер и время модификации"""
+        fingerprint = {
+            "source": [os.path.abspath(path) for path in self.paths],
+            "source_size": self._index.file_size,
+            "source_mtime": self._index.file_mtime,
+        }
+        return fingerprint
+
+    def getOpenArgs(self) -> tuple[type, tuple, dict]:
+        """Возвращает (класс, позиционные аргументы, именованные аргументы) для открытия"""
+        kwargs = dict(self._open_kwargs, max_open=self.max_open)
+        return self.__class__, (list(self.paths), self._target_arg), kwargs
@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import os
+import json
+import numpy as np
+
+from src.tools import Mode
+from src.data_loading import DataLoader
+from src.containers import *
+from src.constants import *
+
+
+def idsToArray(ids: list[Id] | np.ndarray) -> np.ndarray:
+    """
+    Переводит индексы регионов в целочисленный массив размером (N, 4) со столбцами
+    down, up, left, right и возвращает результат
+    """
+    if isinstance(ids, np.ndarray):
+        array = ids
+    else:
+        array = np.array([(id.down, id.up, id.left, id.right) for id in ids])
+
+    array = np.asarray(array, dtype=np.int64).reshape(-1, 4)
+    return array
+
+
+def _metaPath(path: str) -> str:
+    return path + ".json"
+
+
+def _tableMeta(data: DataLoader, kind: str, start_id: int, end_id: int) -> dict:
+    """Возвращает описание данных, по которым строится таблица"""
+    meta = {
+        "kind": kind,
+        **data.fingerprint,
+        "target": data.target_name,
+        "start_id": start_id,
+        "end_id": end_id,
+    }
+    return meta
+
+
+def _loadTable(path: str | None, meta: dict) -> np.ndarray | None:
+    """
+    Открывает через memmap таблицу, сохраненную по пути 'path', если она построена по
+    тем же данным, иначе возвращает None
+    """
+    if path is None:
+        return None
+
+    meta_path = _metaPath(path)
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path) as file:
+        if json.load(file) != meta:
+            return None
+
+    return np.load(path, mmap_mode="r")
+
+
+def _tmpPath(path: str) -> str:
+    return path + ".tmp"
+
+
+def _createTable(path: str | None, shape: tuple) -> np.ndarray:
+    """
+    Создает массив для таблицы в памяти или, если передан 'path', во временном файле .npy
+    рядом с 'path' (см. _saveTable)
+
+    Описание старой таблицы удаляется до начала записи, чтобы прерванное  построение  не
+    оставило старое описание рядом с другими данными
+    """
+    if path is None:
+        return np.empty(shape)
+
+    meta_path = _metaPath(path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    return np.lib.format.open_memmap(_tmpPath(path), mode="w+", dtype=np.float64, shape=shape)
+
+
+def _saveTable(path: str | None, table: np.ndarray, meta: dict) -> np.ndarray:
+    """
+    Сохраняет таблицу и описание данных, по которым она построена, и возвращает таблицу,
+    открытую через memmap
+
+    Таблица и описание записываются во временные файлы и заменяют старые только  после
+    окончания записи
+    """
+    if path is None:
+        return table
+
+    table.flush()
+    os.replace(_tmpPath(path), path)
+
+    meta_path = _metaPath(path)
+    with open(_tmpPath(meta_path), "w") as file:
+        json.dump(meta, file)
+    os.replace(_tmpPath(meta_path), meta_path)
+
+    return np.load(path, mmap_mode="r")
+
+
+class SumTable():
+    """
+    Таблица  накопленных  сумм  (интегральное  изображение)  содержания  вещества  в
+    ячейках сетки
+
+    Для каждой единицы времени хранит 2D-массив  накопленных  сумм  по  широте  и  долготе
+    произведения концентрации на площадь ячейки,  дополненный  нулевыми  строкой  и
+    столбцом. Суммарное содержание вещества в любом прямоугольнике сетки рассчитывается
+    по четырем значениям таблицы
+
+    Параметры:
+    ----------
+    table: np.ndarray
+        3D-массив накопленных сумм с осями (время, широта + 1, долгота + 1)
+
+    row0, col0: int
+        индексы сетки, соответствующие первой строке и первому  столбцу  таблицы  (если
+        таблица построена не по всей сетке)
+
+    Примеры использования:
+    ----------------------
+    >>> table = SumTable.fromLoader(data_loader, "sums.npy")
+    >>> sums = table.calcSums([regdata.id for regdata in regions_data])
+    """
+
+    def __init__(self, table: np.ndarray, row0: int = 0, col0: int = 0) -> None:
+        """Инициализация"""
+        if table.ndim != 3:
+            raise ValueError("'table' must be 3-dimensional array")
+
+        self.table: np.ndarray = table
+        self.row0: int = row0
+        self.col0: int = col0
+
+    @property
+    def timesize(self) -> int:
+        """Возвращает количество единиц времени в таблице"""
+        return self.table.shape[0]
+
+    @staticmethod
+    def buildTable(cube: np.ndarray, row_areas: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Рассчитывает таблицу накопленных сумм и возвращает результат
+
+        :param cube: значения концентраций с осями (время, широта, долгота)
+        :type cube: 3D массив numpy
+        :param row_areas: площади ячеек для каждой широты 'cube'
+        :type row_areas: 1D массив numpy
+        :param out: массив размером (время, широта + 1, долгота + 1) для записи результата
+        :type out: 3D массив numpy
+        """
+        timesize, height, width = cube.shape
+
+        if out is None:
+            out = np.empty((timesize, height + 1, width + 1))
+
+        out[:, 0, :] = 0
+        out[:, :, 0] = 0
+
+        inner = out[:, 1:, 1:]
+        np.multiply(cube, row_areas[:, np.newaxis], out=inner)
+        np.cumsum(inner, axis=1, out=inner)
+        np.cumsum(inner, axis=2, out=inner)
+
+        return out
+
+    @classmethod
+    def fromCube(cls, cube: np.ndarray, row_areas: np.ndarray, row0: int = 0, col0: int = 0) -> SumTable:
+        """
+        Строит таблицу по значениям концентраций с осями (время, широта, долгота)
+
+        :param row_areas: площади ячеек для каждой строки 'cube' (срез GridGeometry.areas)
+        :param row0, col0: индексы сетки первой строки и первого столбца 'cube'
+        """
+        table = cls.buildTable(cube, row_areas)
+        return cls(table, row0, col0)
+
+    @classmethod
+    def fromLoader(cls, data: DataLoader, path: str | None = None, chunk_size: int = 8) -> SumTable:
+        """
+        Строит таблицу по всей сетке для временного диапазона 'data'
+
+        Как и в BalanceCalculator.calcSumSeries,  таблица  содержит  на  одну  единицу
+        времени больше, чем временной диапазон.  Данные читаются  частями  по  'chunk_size'
+        единиц времени. Таблица используется BalanceCalculator.calcRegionBalances (параметр
+        'tables') и StaticMaker (параметр 'tables_dir') вместо чтения файла данных
+
+        :param path: путь к файлу .npy для сохранения таблицы; если  файл  уже  построен
+            для тех же данных, таблица не пересчитывается, а открывается через memmap
+        :type path: str | None
+        """
+        date_range = data.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id + 1
+
+        grid_id = data.getGridId()
+        shape = (end_id - start_id + 1, grid_id.down + 2, grid_id.right + 2)
+
+        meta = _tableMeta(data, "sums", start_id, end_id)
+
+        table = _loadTable(path, meta)
+        if table is not None:
+            return cls(table)
+
+        table = _createTable(path, shape)
+        row_areas = data.getGrid().geometry.areas
+
+        for chunk_start, chunk_end in data.iterTimeBatches(start_id, end_id, chunk_size):
+            cube = data.getTargetCube(grid_id, chunk_start, chunk_end)
+            out = table[chunk_start - start_id : chunk_end - start_id + 1]
+            cls.buildTable(cube, row_areas, out=out)
+
+        table = _saveTable(path, table, meta)
+
+        return cls(table)
+
+    def calcSums(self, ids: list[Id] | np.ndarray) -> np.ndarray:
+        """
+        Рассчитывает временные ряды сумм содержания вещества в регионах  и  возвращает
+        результат
+
+        :param ids: индексы регионов (см. RegionProcessor.getId)  или  массив  (N, 4)  со
+            столбцами down, up, left, right
+        :return: 2D-массив с осями (регион, время)
+        :rtype: numpy.ndarray
+        """
+        ids = idsToArray(ids)
+
+        down = ids[:, 0] - self.row0 + 1
+        up = ids[:, 1] - self.row0
+        left = ids[:, 2] - self.col0
+        right = ids[:, 3] - self.col0 + 1
+
+        table = self.table
+        sums = (
+            table[:, down, right]
+            - table[:, up, right]
+            - table[:, down, left]
+            + table[:, up, left]
+        )
+
+        return np.transpose(sums)
+
+
+class BorderFluxTable():
+    """
+    Таблица накопленных сумм потоков вещества через границы ячеек сетки
+
+    Для каждой единицы времени хранит накопленные  вдоль  столбцов  сетки  суммы
+    положительных и отрицательных частей  потока  conc * U * длина_меридиана  и  накопленные
+    вдоль строк  сетки  суммы  положительных  и  отрицательных  частей  потока  conc * V *
+    длина_параллели.  Приход и уход вещества через  границы  любого  прямоугольника  сетки
+    рассчитываются по нескольким значениям таблицы
+
+    Параметры:
+    ----------
+    table: np.ndarray
+        4D-массив с осями (время, часть, широта + 1, долгота + 1), где части  -  это
+        U_POS, U_NEG (накопленные по широте) и V_POS, V_NEG (накопленные по долготе)
+
+    row0, col0: int
+        индексы сетки, соответствующие первой строке и первому  столбцу  таблицы  (если
+        таблица построена не по всей сетке)
+
+    Примеры использования:
+    ----------------------
+    >>> table = BorderFluxTable.fromLoader(data_loader, "fluxes.npy")
+    >>> convs = table.calcConvs(ids, data_loader.seconds_step)
+    """
+
+    U_POS = 0
+    U_NEG = 1
+    V_POS = 2
+    V_NEG = 3
+
+    def __init__(self, table: np.ndarray, row0: int = 0, col0: int = 0) -> None:
+        """Инициализация"""
+        if table.ndim != 4 or table.shape[1] != 4:
+            raise ValueError("'table' must be 4-dimensional array with 4 parts")
+
+        self.table: np.ndarray = table
+        self.row0: int = row0
+        self.col0: int = col0
+
+    @property
+    def timesize(self) -> int:
+        """Возвращает количество единиц времени в таблице"""
+        return self.table.shape[0]
+
+    @classmethod
+    def buildTable(cls,
+                   conc: np.ndarray,
+                   umap: np.ndarray,
+                   vmap: np.ndarray,
+                   row_lengths: np.ndarray,
+                   out: np.ndarray | None = None,
+                  ) -> np.ndarray:
+        """
+        Рассчитывает таблицу накопленных сумм потоков и возвращает результат
+
+        :param conc, umap, vmap: значения концентраций и скоростей с осями (время, широта,
+            долгота)
+        :type conc, umap, vmap: 3D массивы numpy
+        :param row_lengths: длины единичного отрезка параллели для каждой широты
+        :type row_lengths: 1D массив numpy
+        :param out: массив размером (время, 4, широта + 1, долгота + 1) для записи результата
+        :type out: 4D массив numpy
+        """
+        timesize, height, width = conc.shape
+
+        if out is None:
+            out = np.empty((timesize, 4, height + 1, width + 1))
+
+        # значение унесенного/ принесенного вещества (кг / м2) * (м / c) * м
+        uflow = conc * umap * CELL_LENGTH_METERS
+        vflow = conc * vmap * row_lengths[:, np.newaxis]
+
+        # U накапливается по широте, V - по долготе; лишние строка/столбец не используются
+        out[:, :, 0, :] = 0
+        out[:, :, :, 0] = 0
+        out[:, cls.U_POS:cls.U_NEG + 1, 1:, width] = 0
+        out[:, cls.V_POS:cls.V_NEG + 1, height, 1:] = 0
+
+        parts = (
+            (cls.U_POS, np.maximum(uflow, 0), 1),
+            (cls.U_NEG, np.minimum(uflow, 0), 1),
+            (cls.V_POS, np.maximum(vflow, 0), 2),
+            (cls.V_NEG, np.minimum(vflow, 0), 2),
+        )
+
+        for part, values, axis in parts:
+            if axis == 1:
+                inner = out[:, part, 1:, :width]
+            else:
+                inner = out[:, part, :height, 1:]
+            np.cumsum(values, axis=axis, out=inner)
+
+        return out
+
+    @classmethod
+    def fromCubes(cls,
+                  conc: np.ndarray,
+                  umap: np.ndarray,
+                  vmap: np.ndarray,
+                  row_lengths: np.ndarray,
+                  row0: int = 0,
+                  col0: int = 0,
+                 ) -> BorderFluxTable:
+        """
+        Строит таблицу по значениям концентраций и скоростей с осями (время, широта, долгота)
+
+        :param row_lengths: длины сторон ячеек вдоль параллели для каждой строки массивов
+            (срез GridGeometry.parallel_lengths)
+        :param row0, col0: индексы сетки первой строки и первого столбца массивов
+        """
+        table = cls.buildTable(conc, umap, vmap, row_lengths)
+        return cls(table, row0, col0)
+
+    @classmethod
+    def fromLoader(cls, data: DataLoader, path: str | None = None, chunk_size: int = 8) -> BorderFluxTable:
+        """
+        Строит таблицу по всей сетке для временного диапазона 'data'
+
+        Данные читаются частями по 'chunk_size' единиц времени. Таблица используется  вместе
+        с SumTable.fromLoader (см. BalanceCalculator.calcRegionBalances)
+
+        :param path: путь к файлу .npy для сохранения таблицы; если  файл  уже  построен
+            для тех же данных, таблица не пересчитывается, а открывается через memmap
+        :type path: str | None
+        """
+        date_range = data.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
+
+        grid_id = data.getGridId()
+        shape = (end_id - start_id + 1, 4, grid_id.down + 2, grid_id.right + 2)
+        meta = _tableMeta(data, "fluxes", start_id, end_id)
+
+        table = _loadTable(path, meta)
+        if table is not None:
+            return cls(table)
+
+        table = _createTable(path, shape)
+        row_lengths = data.getGrid().geometry.parallel_lengths
+
+        for chunk_start, chunk_end in data.iterTimeBatches(start_id, end_id, chunk_size):
+            conc = data.getTargetCube(grid_id, chunk_start, chunk_end)
+            umap = data.getUCube(grid_id, chunk_start, chunk_end)
+            vmap = data.getVCube(grid_id, chunk_start, chunk_end)
+            out = table[chunk_start - start_id : chunk_end - start_id + 1]
+            cls.buildTable(conc, umap, vmap, row_lengths, out=out)
+
+        table = _saveTable(path, table, meta)
+
+        return cls(table)
+
+    def calcIncomeOutcome(self, ids: list[Id] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Рассчитывает приход и уход вещества через границы регионов  (в  кг / с)  и  возвращает
+        результат
+
+        :param ids: индексы регионов (см. RegionProcessor.getId)  или  массив  (N, 4)  со
+            столбцами down, up, left, right
+        :return: кортеж (income, outcome) из 2D-массивов с осями (регион, время)
+        :rtype: tuple
+        """
+        ids = idsToArray(ids)
+
+        down = ids[:, 0] - self.row0
+        up = ids[:, 1] - self.row0
+        left = ids[:, 2] - self.col0
+        right = ids[:, 3] - self.col0
+
+        table = self.table
+
+        def column(part: int, col: np.ndarray) -> np.ndarray:
+            return table[:, part, down + 1, col] - table[:, part, up, col]
+
+        def row(part: int, row: np.ndarray) -> np.ndarray:
+            return table[:, part, row, right + 1] - table[:, part, row, left]
+
+        income = (
+            column(self.U_NEG, right) * -1
+            + column(self.U_POS, left)
+            + row(self.V_POS, down)
+            + row(self.V_NEG, up) * -1
+        )
+        outcome = (
+            column(self.U_POS, right)
+            + column(self.U_NEG, left) * -1
+            + row(self.V_NEG, down) * -1
+            + row(self.V_POS, up)
+        )
+
+        return np.transpose(income), np.transpose(outcome)
+
+    def calcConvs(self, ids: list[Id] | np.ndarray, seconds: int, mode: Mode = Mode.TOTAL) -> np.ndarray | tuple:
+        """
+        Рассчитывает временные ряды конвергенции в регионах
+
+        :param mode: [Mode.TOTAL, Mode.SEP]  -  определяет  тип  возвращаемого  значения; если
+            Mode.TOTAL  -  возвращается  массив  (регион,  время)  суммарного   переноса
+            вещества, если Mode.SEP - кортеж (income, outcome) таких массивов
+        :type mode: Mode
+        """
+        income, outcome = self.calcIncomeOutcome(ids)
+        income, outcome = income * seconds, outcome * seconds
+
+        if mode == Mode.SEP:
+            return income, outcome
+
+        elif mode == Mode.TOTAL:
+            return (income - outcome)
+
+        else:
+            raise ValueError("invalid 'mode'")
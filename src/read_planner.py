@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import math
+import numpy as np
+
+from dataclasses import dataclass
+
+from src.metadata import VariableInfo
+from src.containers import Id
+
+
+@dataclass
+class ReadReport():
+    """
+    Статистика чтения одной переменной
+
+    Атрибуты:
+    ---------
+    bytes_used: int
+        - объем запрошенных данных в байтах
+    bytes_decoded: int
+        - объем распакованных блоков HDF5 в байтах, если бы каждый блок  распаковывался
+        при каждом обращении к нему (без кэша блоков)
+    chunks_decoded: int
+        - количество обращений к блокам
+    unique_chunks: int
+        - количество различных блоков, к которым были обращения;  при  достаточном  кэше
+        блоков каждый из них распаковывается один раз
+    chunk_bytes: int
+        - размер одного распакованного блока в байтах
+    """
+    bytes_used: int = 0
+    bytes_decoded: int = 0
+    chunks_decoded: int = 0
+    unique_chunks: int = 0
+    chunk_bytes: int = 0
+
+    @property
+    def efficiency(self) -> float:
+        """Доля полезных данных в распакованных"""
+        return self.bytes_used / self.bytes_decoded if self.bytes_decoded else 1.0
+
+    @property
+    def cached_efficiency(self) -> float:
+        """Доля полезных данных, если каждый блок распаковывается один раз"""
+        decoded = self.unique_chunks * self.chunk_bytes
+        return self.bytes_used / decoded if decoded else 1.0
+
+
+class ReadPlanner():
+    """
+    Класс для планирования чтения переменных, разбитых на блоки (chunks) HDF5
+
+    Переменные  имеют  оси  (долгота, широта, время).  Планировщик  выравнивает  части
+    временного диапазона по границам блоков, объединяет окна регионов, использующие  одни
+    и те же блоки, рассчитывает необходимый размер кэша блоков и ведет статистику  чтения
+    (см. ReadReport)
+
+    Параметры:
+    ----------
+    variables: dict[str, VariableInfo]
+        описание переменных (см. DatasetIndex)
+
+    Примеры использования:
+    ----------------------
+    >>> planner = ReadPlanner(data_loader.index.variables)
+    >>> batches = planner.alignTimeBatches("U", start_id, end_id, 8)
+    >>> print(planner.report()["U"].efficiency)
+    """
+
+    # максимальный размер кэша блоков одной переменной
+    MAX_CACHE_BYTES = 512 * 2**20
+
+    def __init__(self, variables: dict[str, VariableInfo]) -> None:
+        """Инициализация"""
+        self.variables: dict[str, VariableInfo] = variables
+        self._reports: dict[str, ReadReport] = {}
+        # отметки блоков, к которым были обращения (см. _getSeenChunks)
+        self._chunks_seen: dict[str, np.ndarray] = {}
+
+    def getChunks(self, name: str) -> tuple:
+        """
+        Возвращает форму блока переменной;  для  непрерывно  хранящихся  переменных  блоком
+        считается один элемент
+        """
+        info = self.variables[name]
+        return info.chunks if info.chunks else (1,) * len(info.shape)
+
+    def getChunkBytes(self, name: str) -> int:
+        """Возвращает размер распакованного блока переменной в байтах"""
+        itemsize = np.dtype(self.variables[name].dtype).itemsize
+        return math.prod(self.getChunks(name)) * itemsize
+
+    def alignTimeBatches(self, name: str, start_id: int, end_id: int, batch_size: int) -> list[tuple[int, int]]:
+        """
+        Разбивает временной диапазон [start_id, end_id] на части  не  больше  'batch_size'
+        единиц времени, границы которых совпадают с границами блоков по времени
+
+        Так каждый блок переменной распаковывается только в одной части диапазона.  Если
+        блок по времени длиннее 'batch_size', выравнивание невозможно без  увеличения  частей,
+        и диапазон разбивается на части ровно по 'batch_size' единиц времени
+
+        :return: список пар (начало, конец) включительно
+        :rtype: list[tuple[int, int]]
+        """
+        time_chunk = self.getChunks(name)[-1]
+        batch_size = max(batch_size, 1)
+
+        if time_chunk > batch_size:
+            return [
+                (batch_start, min(batch_start + batch_size - 1, end_id))
+                for batch_start in range(start_id, end_id + 1, batch_size)
+            ]
+
+        # наибольшее кратное длине блока, не превышающее batch_size
+        batch_size = batch_size // time_chunk * time_chunk
+
+        batches = []
+        batch_start = start_id
+        while batch_start <= end_id:
+            # следующая граница блоков, кратная batch_size
+            batch_end = (batch_start // batch_size + 1) * batch_size - 1
+            batches.append((batch_start, min(batch_end, end_id)))
+            batch_start = batch_end + 1
+
+        return batches
+
+    def getChunkWindow(self, name: str, window: Id) -> tuple[int, int, int, int]:
+        """
+        Возвращает  индексы  блоков  (первый  и  последний  по  долготе,  первый и последний
+        по широте), в которых находится окно 'window'
+        """
+        lon_chunk, lat_chunk = self.getChunks(name)[:2]
+        return (
+            window.left // lon_chunk,
+            window.right // lon_chunk,
+            window.up // lat_chunk,
+            window.down // lat_chunk,
+        )
+
+    def groupWindows(self, name: str, windows: list[Id]) -> list[tuple[Id, list[int]]]:
+        """
+        Объединяет окна, использующие общие блоки переменной, в группы
+
+        Окна одной группы выгоднее читать одним обращением по их общему ограничивающему
+        прямоугольнику: каждый общий блок распаковывается один раз. Переменная без  блоков
+        хранится непрерывно и читается по окнам без распаковки,  поэтому  каждое  окно  -
+        отдельная группа
+
+        :return: список пар (ограничивающий прямоугольник группы, индексы окон группы)
+        :rtype: list[tuple[Id, list[int]]]
+        """
+        if self.variables[name].chunks is None:
+            return [(window, [window_id]) for window_id, window in enumerate(windows)]
+
+        parents = list(range(len(windows)))
+
+        def find(window_id: int) -> int:
+            while parents[window_id] != window_id:
+                parents[window_id] = parents[parents[window_id]]
+                window_id = parents[window_id]
+            return window_id
+
+        # окно, которое первым использовало блок
+        owners = {}
+        for window_id, window in enumerate(windows):
+            left, right, up, down = self.getChunkWindow(name, window)
+            for chunk in ((a, b) for a in range(left, right + 1) for b in range(up, down + 1)):
+                owner = owners.setdefault(chunk, window_id)
+                parents[find(window_id)] = find(owner)
+
+        groups = {}
+        for window_id in range(len(windows)):
+            groups.setdefault(find(window_id), []).append(window_id)
+
+        result = []
+        for window_ids in groups.values():
+            group = [windows[window_id] for window_id in window_ids]
+            window = Id(
+                down=max(window.down for window in group),
+                up=min(window.up for window in group),
+                left=min(window.left for window in group),
+                right=max(window.right for window in group),
+            )
+            result.append((window, window_ids))
+
+        return result
+
+    def calcCacheBytes(self, name: str, window: Id | None = None) -> int:
+        """
+        Рассчитывает размер кэша блоков, достаточный для хранения одного слоя блоков  по
+        времени, покрывающего окно 'window' (или всю сетку)
+
+        Тогда последовательные чтения по одной единице времени  распаковывают  каждый  блок
+        один раз
+        """
+        info = self.variables[name]
+        if info.chunks is None:
+            return 0
+
+        if window is None:
+            window = Id(down=info.shape[1] - 1, up=0, left=0, right=info.shape[0] - 1)
+
+        left, right, up, down = self.getChunkWindow(name, window)
+        chunks_count = (right - left + 1) * (down - up + 1)
+
+        return min(chunks_count * self.getChunkBytes(name), self.MAX_CACHE_BYTES)
+
+    @staticmethod
+    def calcCacheSlots(cache_bytes: int, chunk_bytes: int) -> int:
+        """
+        Рассчитывает  количество  слотов  хэш-таблицы  кэша  блоков:  простое  число,  примерно
+        в 100 раз больше количества помещающихся в кэш блоков
+        """
+        slots = max(100 * cache_bytes // max(chunk_bytes, 1), 521)
+        while any(slots % divisor == 0 for divisor in range(2, int(math.sqrt(slots)) + 1)):
+            slots += 1
+        return slots
+
+    def _getSeenChunks(self, name: str) -> np.ndarray:
+        """
+        Возвращает отметки блоков переменной, к которым были обращения: по одному  байту
+        на блок, так что объем не зависит от количества чтений
+        """
+        seen = self._chunks_seen.get(name)
+
+        if seen is None:
+            info = self.variables[name]
+            grid_shape = tuple(math.ceil(size / chunk) for size, chunk in zip(info.shape, self.getChunks(name)))
+            seen = self._chunks_seen[name] = np.zeros(grid_shape, dtype=bool)
+
+        return seen
+
+    def account(self, name: str, lon: int | slice, lat: int | slice, time: int | slice) -> None:
+        """Учитывает в статистике чтение переменной 'name' по индексам (lon, lat, time)"""
+        info = self.variables[name]
+        chunks = self.getChunks(name)
+        itemsize = np.dtype(info.dtype).itemsize
+
+        ranges = []
+        for key, size in zip((lon, lat, time), info.shape):
+            if isinstance(key, slice):
+                start, stop, _ = key.indices(size)
+            else:
+                start, stop = key, key + 1
+            ranges.append((start, max(stop, start)))
+
+        elements = math.prod(stop - start for start, stop in ranges)
+
+        report = self._reports.setdefault(name, ReadReport(chunk_bytes=self.getChunkBytes(name)))
+        report.bytes_used += elements * itemsize
+
+        if info.chunks is None:
+            report.bytes_decoded += elements * itemsize
+            return None
+
+        if elements == 0:
+            return None
+
+        # блоки, которых касается чтение
+        touched = tuple(
+            slice(start // chunk, (stop - 1) // chunk + 1)
+            for (start, stop), chunk in zip(ranges, chunks)
+        )
+        touched_count = math.prod(window.stop - window.start for window in touched)
+
+        seen = self._getSeenChunks(name)
+        report.unique_chunks += touched_count - int(np.count_nonzero(seen[touched]))
+        seen[touched] = True
+
+        report.chunks_decoded += touched_count
+        report.bytes_decoded += touched_count * report.chunk_bytes
+
+    def report(self) -> dict[str, ReadReport]:
+        """Возвращает статистику чтения по переменным"""
+        return dict(self._reports)
+
+    def resetReport(self) -> None:
+        """Сбрасывает статистику чтения"""
+        self._reports = {}
+        self._chunks_seen = {}
@@ -1,53 +1,231 @@
+import os
+import math
+import atexit
 import numpy as np
 import pandas as pd
 
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
 from src.data_loading import DataLoader, BalanceData
-from src.containers import Region, HeapOfBalances
+from src.containers import Region, RegionSet, HeapOfBalances, BalanceHeaps
 from src.data_processing import BalanceCalculator
+from src.prefix_sums import SumTable, BorderFluxTable
+
+
+# DataLoader и таблицы процесса-исполнителя, открываются один раз в _initWorker
+_worker_data: DataLoader | None = None
+_worker_tables: tuple[SumTable, BorderFluxTable] | None = None
+
+
+def _openTables(data: DataLoader, tables_dir: str | None, chunk_size: int) -> tuple[SumTable, BorderFluxTable] | None:
+    """
+    Открывает таблицы накопленных сумм по всей сетке, сохраненные в каталоге 'tables_dir',
+    или строит и сохраняет их, если они построены не для данных 'data' (см. SumTable.fromLoader)
+    """
+    if tables_dir is None:
+        return None
+
+    os.makedirs(tables_dir, exist_ok=True)
+    sum_table = SumTable.fromLoader(data, os.path.join(tables_dir, "sums.npy"), chunk_size)
+    flux_table = BorderFluxTable.fromLoader(data, os.path.join(tables_dir, "fluxes.npy"), chunk_size)
+
+    return sum_table, flux_table
+
+
+def _initWorker(open_args: tuple[type, tuple, dict],
+                start: datetime,
+                end: datetime,
+                tables_dir: str | None,
+                chunk_size: int,
+               ) -> None:
+    """
+    Открывает собственный DataLoader процесса-исполнителя по пути к файлу и таблицы,
+    уже построенные основным процессом
+
+    :param open_args: класс и аргументы DataLoader (см. DataLoader.getOpenArgs)
+    """
+    global _worker_data, _worker_tables
+
+    loader_class, args, kwargs = open_args
+    _worker_data = loader_class(*args, **kwargs)
+    _worker_data.setDateRange(start, end)
+    atexit.register(_worker_data.close)
+
+    _worker_tables = _openTables(_worker_data, tables_dir, chunk_size)
+
+
+def _calcLatticeBalances(coords: np.ndarray,
+                         data: DataLoader,
+                         chunk_size: int,
+                         tables: tuple[SumTable, BorderFluxTable] | None = None,
+                        ) -> np.ndarray:
+    """
+    Рассчитывает балансы рядов регионов
+
+    :param coords: координаты регионов, массив (ряд, регион, 4)
+    :param tables: таблицы по всей сетке (см. BalanceCalculator.calcRegionBalances)
+    :return: балансы, массив (регион, время)
+    """
+    balances = BalanceCalculator().calcRegionBalances(RegionSet(coords), data, chunk_size, tables)
+    return balances.balance
+
+
+def _calcBalancesTask(coords: np.ndarray, chunk_size: int) -> np.ndarray:
+    """Рассчитывает балансы рядов регионов в процессе-исполнителе"""
+    return _calcLatticeBalances(coords, _worker_data, chunk_size, _worker_tables)
 
 
 class StaticMaker():
-    """Класс для набора статистики по данным"""
+    """
+    Класс для набора статистики по данным
+
+    Параметры:
+    ----------
+    workers: int | None
+        - количество процессов для расчета (по умолчанию 1, без пула процессов); если None,
+        используются все ядра. Каждый процесс открывает файл данных заново с  теми  же  па-
+        раметрами DataLoader, поэтому память под кэш чанков HDF5 (chunk_cache) и кэш срезов
+        (cache_bytes) умножается на количество процессов
 
-    def __init__(self) -> None:
+    chunk_size: int
+        - количество единиц времени, читаемых за одно обращение к файлу
+
+    tables_dir: str | None
+        - каталог для таблиц накопленных сумм по всей сетке (см. SumTable.fromLoader,
+        BorderFluxTable.fromLoader); если задан, таблицы строятся при первом расчете и
+        используются повторными расчетами по тем же данным без чтения файла данных
+    """
+
+    def __init__(self, workers: int | None = 1, chunk_size: int = 8, tables_dir: str | None = None) -> None:
         """Инициализация"""
 
         self.bal_calc = BalanceCalculator()
+        self.workers: int = workers if workers else os.cpu_count()
+        self.chunk_size: int = chunk_size
+        self.tables_dir: str | None = tables_dir
+
+    # сдвиги регионов относительно центрального (в градусах)
+    STEP_SHIFTS = (np.arange(0, 425, 25) - 200) / 100
+    # изменения размеров центральных регионов (в градусах)
+    SIZE_SHIFTS = (np.arange(0, 55, 5) - 25) / - 10
+
+    @classmethod
+    def calcShiftedRegionSet(cls, center_regions: RegionSet) -> RegionSet:
+        """
+        Рассчитывает регионы, сдвинутые относительно каждого из центральных, и  возвращает
+        результат в порядке (центральный регион, сдвиг широты, сдвиг долготы)
+        """
+        return center_regions.shiftLattice(cls.STEP_SHIFTS, cls.STEP_SHIFTS)
+
+    @classmethod
+    def calcShiftedRegions(cls, center_region: Region) -> list[list[Region]]:
+        """
+        Рассчитывает регионы,  сдвинутые относительно центрального,  и возвращает результат
+
+        Результат сгруппирован по сдвигам широты: каждый вложенный список содержит регионы
+        с одинаковым сдвигом широты и разными сдвигами долготы
+        """
+        regions = cls.calcShiftedRegionSet(RegionSet.fromRegions([center_region]))
+        row_size = cls.STEP_SHIFTS.size
+
+        return [regions[row_start : row_start + row_size].toRegions() for row_start in range(0, len(regions), row_size)]
+
+    @classmethod
+    def calcCenterRegionSet(cls, region: Region) -> RegionSet:
+        """
+        Рассчитывает  центральные  регионы  различных  размеров  с  тем  же  центром,  что  и
+        'region', и возвращает результат
+
+        Высота и ширина 'region' должны быть больше наибольшего уменьшения размера,  иначе
+        самые маленькие регионы получили бы неположительные размеры
+        """
+        min_size = -cls.SIZE_SHIFTS.min()
+        if region.height <= min_size or region.width <= min_size:
+            raise ValueError(f"region height and width must be greater than {min_size} degrees, got {region}")
+
+        heights = cls.SIZE_SHIFTS + region.height
+        widths = cls.SIZE_SHIFTS + region.width
+
+        return RegionSet.fromRegions([region]).centralize(heights, widths)
+
+    @classmethod
+    def calcCenterRegions(cls, region: Region) -> list[Region]:
+        """
+        Рассчитывает  центральные  регионы  различных  размеров  с  тем  же  центром,  что  и
+        'region', и возвращает результат
+        """
+        return cls.calcCenterRegionSet(region).toRegions()
 
     def calcHeapOfBalances(self, center_region: Region, data: DataLoader) -> HeapOfBalances:
         """
         Рассчитывает  балансы  для  регионов  с  одинаковыми параметрами высоты и ширины,
         сдвинутых относительного центрального
         """
-        step_shifts = (np.arange(0, 425, 25) - 200) / 100
+        lattice = self.calcShiftedRegions(center_region)
+        tables = _openTables(data, self.tables_dir, self.chunk_size)
+        balances = self.bal_calc.calcRegionBalances(sum(lattice, []), data, self.chunk_size, tables)
 
-        balances = []
-        for lat_shift in step_shifts:
-            for lon_shift in step_shifts:
-                working_region = center_region.addCoords(lat_shift, lon_shift)
-                balance = self.bal_calc.calcRegionBalance(working_region, data)
-                balances.append(balance)
-                break # TODO
-            break # TODO
-        
-        return HeapOfBalances(balances, center_region.height, center_region.width)
+        return HeapOfBalances(balances.toRegionBalances(), center_region.height, center_region.width)
 
-    def calcHeapsOfBalances(self, data: DataLoader, region: Region):
+    def calcBalanceHeaps(self, data: DataLoader, region: Region) -> BalanceHeaps:
         """
         Рассчитывает балансы для различных регионов различных размеров, сдвинутых относи-
-        тельно 'region' 
+        тельно 'region', и возвращает их в одном массиве (см. BalanceHeaps)
+
+        Расчет распределяется по 'workers' процессам; задача - это группа рядов  регионов
+        одного размера с одинаковым сдвигом широты. Групп столько, чтобы занять все процессы,
+        но не больше, чем нужно: каждая задача читает общий прямоугольник своих регионов.
+        Порядок результатов не зависит от количества процессов
         """
-        size_shifts = (np.arange(0, 55, 5) - 25) / - 10
+        center_regions = self.calcCenterRegionSet(region)
+        regions = self.calcShiftedRegionSet(center_regions)
+
+        # координаты всех регионов, массив (центральный регион, сдвиг широты, сдвиг долготы, 4)
+        rows_count = self.STEP_SHIFTS.size
+        shape = (len(center_regions), rows_count, rows_count)
+        heaps_coords = regions.coords.reshape(*shape, 4)
+
+        # таблицы строятся до запуска процессов, которые затем только открывают их
+        tables = _openTables(data, self.tables_dir, self.chunk_size)
+
+        if self.workers == 1:
+            results = [
+                _calcLatticeBalances(rows_coords, data, self.chunk_size, tables)
+                for rows_coords in heaps_coords
+            ]
 
-        heights = size_shifts + region.height
-        widths = size_shifts + region.width
+        else:
+            group_size = math.ceil(rows_count / math.ceil(self.workers / len(center_regions)))
 
-        balances = {}
+            # задачи в детерминированном порядке: размер, сдвиг широты
+            coords = [
+                rows_coords[group_start : group_start + group_size]
+                for rows_coords in heaps_coords
+                for group_start in range(0, rows_count, group_size)
+            ]
+            chunk_sizes = [self.chunk_size] * len(coords)
 
-        count = 0
-        for height, width in zip(heights, widths):
-            center_region = region.centralizeRegion(height, width)
-            balances[count] = self.calcHeapOfBalances(center_region, data)
-            break #TODO
-        
-        return balances
+            date_range = data.date_range
+            initargs = (data.getOpenArgs(), date_range.start, date_range.end, self.tables_dir, self.chunk_size)
+
+            with ProcessPoolExecutor(self.workers, initializer=_initWorker, initargs=initargs) as executor:
+                results = list(executor.map(_calcBalancesTask, coords, chunk_sizes))
+
+        heaps = BalanceHeaps(
+            balance=np.concatenate(results),
+            regions=regions.coords,
+            time=data.date_range.time_series.to_numpy().astype("datetime64[s]"),
+            heights=center_regions.height,
+            widths=center_regions.width,
+            shape=shape,
+        )
+        return heaps
+
+    def calcHeapsOfBalances(self, data: DataLoader, region: Region) -> dict[int, HeapOfBalances]:
+        """
+        Рассчитывает балансы для различных регионов различных размеров, сдвинутых относи-
+        тельно 'region' (см. calcBalanceHeaps), и возвращает словарь {номер размера:
+        HeapOfBalances}
+        """
+        return self.calcBalanceHeaps(data, region).toHeaps()
@@ -0,0 +1,213 @@
+import numpy as np
+
+from src.data_loading import DataLoader
+from src.containers import *
+from src.constants import *
+
+
+class _WindowState():
+    """
+    Состояние  скользящего  окна:  ряд  сумм  и  суммы  положительных  и  отрицательных
+    частей потоков через каждую из четырех границ
+    """
+
+    def __init__(self, sums: np.ndarray, edges: dict[str, np.ndarray]) -> None:
+        self.sums = sums
+        self.edges = edges
+
+    def calcIncomeOutcome(self) -> tuple[np.ndarray, np.ndarray]:
+        """Рассчитывает приход и уход (в кг / с)"""
+        edges = self.edges
+        income = edges["right_neg"] * -1 + edges["left_pos"] + edges["down_pos"] + edges["up_neg"] * -1
+        outcome = edges["right_pos"] + edges["left_neg"] * -1 + edges["down_neg"] * -1 + edges["up_pos"]
+        return income, outcome
+
+
+class SlidingEvaluator():
+    """
+    Класс для инкрементального расчета балансов регионов, сдвинутых друг относительно друга
+
+    Регионы решетки сдвигов обходятся змейкой (четные ряды слева направо, нечетные  справа
+    налево). Если соседние в обходе регионы имеют одинаковый размер и  отличаются  сдвигом
+    ровно на одну ячейку сетки,  суммы  и  потоки  через  границы  обновляются  добавлением
+    и удалением одной полосы ячеек, иначе рассчитываются заново. Таким образом,  объем
+    вычислений для решетки пропорционален периметру регионов, а не их площади
+
+    Из-за обхода регионов по одному на решетке StaticMaker расчет примерно  вдвое
+    медленнее BalanceCalculator.calcRegionBalances, поэтому StaticMaker его не использует
+
+    Примеры использования:
+    ----------------------
+    >>> evaluator = SlidingEvaluator()
+    >>> balances = evaluator.calcRegionBalances(StaticMaker.calcShiftedRegions(region), data)
+    """
+
+    @staticmethod
+    def serpentineOrder(lattice: list[list]) -> list[tuple[int, int]]:
+        """Возвращает индексы (ряд, столбец) решетки в порядке обхода змейкой"""
+        order = []
+        for row_id, row in enumerate(lattice):
+            columns = range(len(row)) if row_id % 2 == 0 else reversed(range(len(row)))
+            order += [(row_id, column_id) for column_id in columns]
+
+        return order
+
+    def calcRegionBalances(self,
+                           lattice: list[list[Region]],
+                           data: DataLoader,
+                           chunk_size: int = 8,
+                          ) -> RegionBalances:
+        """
+        Рассчитывает балансы для решетки регионов
+
+        :param lattice: регионы, сгруппированные по рядам (см. StaticMaker.calcShiftedRegions)
+        :type lattice: list[list[Region]]
+        :param chunk_size: количество единиц времени, читаемых за одно обращение к файлу
+        :type chunk_size: int
+        ...
+        :return: балансы регионов в порядке следования рядов
+        :rtype: RegionBalances
+        """
+        grid = data.getGrid()
+        date_range = data.date_range
+        start_id, end_id = date_range.start_id, date_range.end_id
+
+        regions = sum(lattice, [])
+        coords = np.array([(region.down, region.up, region.left, region.right) for region in regions])
+        ids = grid.index.snapIds(coords)
+
+        # индексы регионов в порядке обхода змейкой
+        row_offsets = np.cumsum([0] + [len(row) for row in lattice])
+        order = [row_offsets[row_id] + column_id for row_id, column_id in self.serpentineOrder(lattice)]
+
+        # общий ограничивающий прямоугольник всех регионов
+        bounds = Id(
+            down=int(ids[:, 0].max()),
+            up=int(ids[:, 1].min()),
+            left=int(ids[:, 2].min()),
+            right=int(ids[:, 3].max()),
+        )
+        row_areas = grid.geometry.areas[bounds.up : bounds.down + 1]
+        row_lengths = grid.geometry.parallel_lengths[bounds.up : bounds.down + 1]
+
+        # индексы относительно ограничивающего прямоугольника
+        local_ids = ids - np.array([bounds.up, bounds.up, bounds.left, bounds.left])
+
+        sums = np.zeros((len(regions), date_range.timesize + 1))
+        convs = np.zeros((len(regions), date_range.timesize))
+
+        for chunk_start, chunk_end, chunk in data.iterCubeChunks(bounds, start_id, end_id, chunk_size):
+            # в последней части концентрации содержат одну лишнюю единицу времени
+            sums_end = chunk_start + chunk.target.shape[0] - 1
+            timesize = chunk_end - chunk_start + 1
+
+            weighted = chunk.target * row_areas[:, np.newaxis]
+            uflow = chunk.target[:timesize] * chunk.U * CELL_LENGTH_METERS
+            vflow = chunk.target[:timesize] * chunk.V * row_lengths[:, np.newaxis]
+
+            state, previous = None, None
+            for region_id in order:
+                id = local_ids[region_id]
+                state = self._moveWindow(state, previous, id, weighted, uflow, vflow)
+                previous = id
+
+                income, outcome = state.calcIncomeOutcome()
+                sums[region_id, chunk_start - start_id : sums_end - start_id + 1] = state.sums
+                convs[region_id, chunk_start - start_id : chunk_end - start_id + 1] = (
+                    (income - outcome) * date_range.seconds
+                )
+
+        balance = np.diff(sums, axis=1) - convs
+
+        return RegionBalances(regions=coords, balance=balance, time_series=date_range.time_series)
+
+    @classmethod
+    def _moveWindow(cls,
+                    state: _WindowState | None,
+                    previous: np.ndarray | None,
+                    id: np.ndarray,
+                    weighted: np.ndarray,
+                    uflow: np.ndarray,
+                    vflow: np.ndarray,
+                   ) -> _WindowState:
+        """
+        Возвращает  состояние  окна  с  индексами  'id'  (down, up, left, right),  обновляя
+        состояние предыдущего окна, если это возможно
+        """
+        if state is None:
+            return cls._calcWindow(id, weighted, uflow, vflow)
+
+        shift = id - previous
+        down, up, left, right = id
+        sums, edges = state.sums.copy(), dict(state.edges)
+
+        if shift[0] == shift[1] and shift[2] == shift[3] == 0 and abs(shift[0]) == 1:
+            # сдвиг по широте: добавляется одна строка, удаляется другая
+            if shift[0] > 0:
+                added, removed = down, previous[1]
+            else:
+                added, removed = up, previous[0]
+
+            sums += weighted[:, added, left : right + 1].sum(axis=1)
+            sums -= weighted[:, removed, left : right + 1].sum(axis=1)
+
+            for side, column in (("left", left), ("right", right)):
+                cls._addCell(edges, side, uflow[:, added, column], 1)
+                cls._addCell(edges, side, uflow[:, removed, column], -1)
+
+            edges.update(cls._calcEdge("down", vflow[:, down, left : right + 1]))
+            edges.update(cls._calcEdge("up", vflow[:, up, left : right + 1]))
+
+        elif shift[2] == shift[3] and shift[0] == shift[1] == 0 and abs(shift[2]) == 1:
+            # сдвиг по долготе: добавляется один столбец, удаляется другой
+            if shift[2] > 0:
+                added, removed = right, previous[2]
+            else:
+                added, removed = left, previous[3]
+
+            sums += weighted[:, up : down + 1, added].sum(axis=1)
+            sums -= weighted[:, up : down + 1, removed].sum(axis=1)
+
+            for side, row in (("down", down), ("up", up)):
+                cls._addCell(edges, side, vflow[:, row, added], 1)
+                cls._addCell(edges, side, vflow[:, row, removed], -1)
+
+            edges.update(cls._calcEdge("left", uflow[:, up : down + 1, left]))
+            edges.update(cls._calcEdge("right", uflow[:, up : down + 1, right]))
+
+        else:
+            return cls._calcWindow(id, weighted, uflow, vflow)
+
+        return _WindowState(sums, edges)
+
+    @classmethod
+    def _calcWindow(cls, id: np.ndarray, weighted: np.ndarray, uflow: np.ndarray, vflow: np.ndarray) -> _WindowState:
+        """Рассчитывает состояние окна с индексами 'id' заново"""
+        down, up, left, right = id
+
+        sums = weighted[:, up : down + 1, left : right + 1].sum(axis=(1, 2))
+
+        edges = {}
+        edges.update(cls._calcEdge("left", uflow[:, up : down + 1, left]))
+        edges.update(cls._calcEdge("right", uflow[:, up : down + 1, right]))
+        edges.update(cls._calcEdge("down", vflow[:, down, left : right + 1]))
+        edges.update(cls._calcEdge("up", vflow[:, up, left : right + 1]))
+
+        return _WindowState(sums, edges)
+
+    @staticmethod
+    def _calcEdge(side: str, flow: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Рассчитывает суммы положительных и отрицательных частей  потока  через  границу  с
+        осями (время, длина границы)
+        """
+        return {
+            f"{side}_pos": np.maximum(flow, 0).sum(axis=1),
+            f"{side}_neg": np.minimum(flow, 0).sum(axis=1),
+        }
+
+    @staticmethod
+    def _addCell(edges: dict[str, np.ndarray], side: str, flow: np.ndarray, sign: int) -> None:
+        """Добавляет (sign = 1) или удаляет (sign = -1) поток одной ячейки границы"""
+        edges[f"{side}_pos"] = edges[f"{side}_pos"] + np.maximum(flow, 0) * sign
+        edges[f"{side}_neg"] = edges[f"{side}_neg"] + np.minimum(flow, 0) * sign
@@ -0,0 +1,172 @@
+"""
+Локальное хранилище данных в виде несжатых файлов .npy
+
+Сжатые переменные файла NetCDF один раз переписываются в каталог хранилища в  порядке
+(время, широта, долгота), после чего DataLoader открывает их через numpy.memmap: чтение
+региона за диапазон времени - это чтение непрерывных строк файла из кэша страниц ОС без
+распаковки.
+
+Использование:
+--------------
+python -m src.store ../CO_flow_2022.nc ../CO_flow_2022_store -v 20220601_mean U V
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+import h5netcdf
+
+
+# файл с описанием хранилища
+STORE_META = "store.json"
+
+# одномерные переменные, которые всегда переносятся в хранилище
+AXIS_VARIABLES = ("stime", "lat", "lon")
+
+
+class StoreVariable():
+    """
+    Переменная хранилища
+
+    Предоставляет тот же интерфейс, что и h5netcdf.Variable:  оси  (долгота, широта, время)
+    и индексирование, - но возвращает представления numpy.memmap без копирования
+    """
+
+    chunks = None
+    compression = None
+    compression_opts = None
+
+    def __init__(self, array: np.ndarray) -> None:
+        """Инициализация"""
+        # массив хранится в порядке (время, широта, долгота)
+        self._array = np.transpose(array) if array.ndim == 3 else array
+
+    @property
+    def shape(self) -> tuple:
+        return self._array.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self._array[key]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return np.asarray(self._array, dtype=dtype)
+
+
+class MemmapStore():
+    """
+    Хранилище, открытое через numpy.memmap
+
+    Используется DataLoader вместо h5netcdf.File,  если  путь  к  данным  -  каталог
+    хранилища (см. isStore)
+    """
+
+    def __init__(self, path: str) -> None:
+        """Инициализация"""
+        with open(os.path.join(path, STORE_META)) as file:
+            self.meta: dict = json.load(file)
+
+        self.path: str = path
+        self.variables: dict[str, StoreVariable] = {
+            name: StoreVariable(np.load(self.variablePath(path, name), mmap_mode="r"))
+            for name in self.meta["variables"]
+        }
+
+    @staticmethod
+    def isStore(path: str) -> bool:
+        """Проверяет, является ли 'path' каталогом хранилища"""
+        return os.path.isdir(path) and os.path.exists(os.path.join(path, STORE_META))
+
+    @staticmethod
+    def variablePath(path: str, name: str) -> str:
+        return os.path.join(path, f"{name}.npy")
+
+    def __getitem__(self, name: str) -> StoreVariable:
+        return self.variables[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.variables
+
+    def close(self) -> None:
+        """Закрывает хранилище"""
+        self.variables = {}
+
+
+def _plainArray(array: np.ndarray) -> np.ndarray:
+    """
+    Возвращает массив без метаданных типа h5py; строки переменной длины переводятся в
+    строки байтов фиксированной длины
+    """
+    if array.dtype.kind == "O":
+        return np.array([
+            value if isinstance(value, bytes) else str(value).encode() for value in array
+        ], dtype="S")
+
+    return array.astype(np.dtype(array.dtype.str))
+
+
+def materialize(nc_path: str, store_path: str, variables: list[str] | None = None, chunk_size: int = 8) -> None:
+    """
+    Переписывает переменные файла NetCDF в хранилище
+
+    Трехмерные переменные (долгота, широта, время) сохраняются без сжатия  в  порядке
+    (время, широта, долгота); чтение идет частями по 'chunk_size' единиц времени
+
+    :param variables: названия трехмерных переменных; если None, переносятся все
+        трехмерные переменные
+    :type variables: list[str] | None
+    """
+    os.makedirs(store_path, exist_ok=True)
+
+    with h5netcdf.File(nc_path, "r") as db:
+        if variables is None:
+            variables = [name for name, variable in db.variables.items() if variable.ndim == 3]
+
+        for name in AXIS_VARIABLES:
+            np.save(MemmapStore.variablePath(store_path, name), _plainArray(np.asarray(db[name][:])))
+
+        for name in variables:
+            variable = db[name]
+            lon_size, lat_size, timesize = variable.shape
+
+            array = np.lib.format.open_memmap(
+                MemmapStore.variablePath(store_path, name),
+                mode="w+",
+                dtype=np.dtype(variable.dtype.str),
+                shape=(timesize, lat_size, lon_size),
+            )
+
+            for chunk_start in range(0, timesize, chunk_size):
+                chunk_end = min(chunk_start + chunk_size, timesize)
+                array[chunk_start:chunk_end] = np.transpose(variable[..., chunk_start:chunk_end])
+
+            array.flush()
+            del array
+
+    meta = {
+        "source": os.path.abspath(nc_path),
+        "variables": list(AXIS_VARIABLES) + list(variables),
+    }
+
+    # описание пишется последним: без него каталог не считается хранилищем
+    with open(os.path.join(store_path, STORE_META), "w") as file:
+        json.dump(meta, file, indent=4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Переписывает файл NetCDF в локальное хранилище .npy")
+    parser.add_argument("nc_path", help="путь к файлу NetCDF")
+    parser.add_argument("store_path", help="каталог хранилища")
+    parser.add_argument("-v", "--variables", nargs="+", default=None, help="трехмерные переменные")
+    parser.add_argument("--chunk-size", type=int, default=8, help="единиц времени за одно чтение")
+    args = parser.parse_args()
+
+    materialize(args.nc_path, args.store_path, args.variables, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import numpy as np
+
+from datetime import datetime
+
+from src.tools import findClosestTimeIds
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.containers import *
+
+
+class TimeIndex():
+    """
+    Накопленные по времени суммы баланса одного региона
+
+    Хранит ряд сумм содержания вещества и накопленные суммы вноса и выноса вещества,  так
+    что баланс, внос или вынос за любое окно времени [начало, конец] - это  разность  двух
+    элементов
+
+    Параметры:
+    ----------
+    time: np.ndarray
+        значения времени (T) в формате numpy.datetime64
+    sums: np.ndarray
+        суммы содержания вещества (T + 1), на одну единицу времени больше (см.
+        BalanceCalculator.calcSumSeries)
+    income, outcome: np.ndarray
+        накопленные суммы вноса и выноса вещества (T + 1), начинающиеся с нуля
+
+    Примеры использования:
+    ----------------------
+    >>> index = TimeIndex.fromLoader(data_loader, region)
+    >>> weeks = index.calcWindows([(datetime(2022, 7, 1), datetime(2022, 7, 7)), ...])
+    >>> print(weeks.balance)
+    """
+
+    def __init__(self, time: np.ndarray, sums: np.ndarray, income: np.ndarray, outcome: np.ndarray) -> None:
+        """Инициализация"""
+        if not (sums.shape == income.shape == outcome.shape == (time.size + 1,)):
+            raise ValueError("'sums', 'income' and 'outcome' must have one more value than 'time'")
+
+        self.time: np.ndarray = np.asarray(time, dtype="datetime64[s]")
+        self.sums: np.ndarray = sums
+        self.income: np.ndarray = income
+        self.outcome: np.ndarray = outcome
+
+    @classmethod
+    def fromLoader(cls, data: DataLoader, region: Region, chunk_size: int = 8) -> "TimeIndex":
+        """
+        Строит индекс региона 'region' для временного диапазона 'data'
+
+        Данные читаются частями по 'chunk_size' единиц времени (см. BalanceCalculator.iterBalance)
+        """
+        calculator = BalanceCalculator()
+        date_range = data.date_range
+        regdata = RegionProcessor(region, data.getGrid()).getRegionData()
+
+        cube = data.getTargetCube(regdata.id, date_range.start_id, date_range.start_id)
+        start_sum = float(calculator.sum_calculator.calcSumSeries(cube, regdata)[0])
+
+        time = np.empty(date_range.timesize, dtype="datetime64[s]")
+        # изменения сумм, вносы и выносы по единицам времени; накапливаются в конце
+        sums = np.zeros(date_range.timesize + 1)
+        income = np.zeros(date_range.timesize + 1)
+        outcome = np.zeros(date_range.timesize + 1)
+        sums[0] = start_sum
+
+        position = 0
+        records = calculator.iterBalance(BalanceData(reg_data=regdata, data=data), chunk_size, start_sum)
+        for record in records:
+            steps = slice(position + 1, position + len(record) + 1)
+            time[position : position + len(record)] = record.time
+            sums[steps] = record.diff_sum
+            income[steps] = record.income
+            outcome[steps] = record.outcome
+            position += len(record)
+
+        return cls(time, np.cumsum(sums), np.cumsum(income), np.cumsum(outcome))
+
+    def getTimeIds(self, times: list[datetime] | np.ndarray) -> np.ndarray:
+        """
+        Находит индексы ближайших времен индекса (см. findClosestTimeIds);  если  время
+        находится ровно посередине между двумя временами, выбирается более раннее
+        """
+        return findClosestTimeIds(self.time, times)
+
+    def calcWindowsByIds(self, start_ids: np.ndarray, end_ids: np.ndarray) -> WindowBalances:
+        """
+        Рассчитывает суммарные значения за окна [start_ids[i], end_ids[i]] (индексы  времени
+        индекса, включительно)
+        """
+        start_ids = np.asarray(start_ids, dtype=np.int64)
+        end_ids = np.asarray(end_ids, dtype=np.int64)
+
+        if np.any(start_ids > end_ids):
+            raise ValueError("window start is after its end")
+
+        if np.any(start_ids < 0) or np.any(end_ids >= self.time.size):
+            raise IndexError("window is out of the index time range")
+
+        diff_sum = self.sums[end_ids + 1] - self.sums[start_ids]
+        income = self.income[end_ids + 1] - self.income[start_ids]
+        outcome = self.outcome[end_ids + 1] - self.outcome[start_ids]
+
+        windows = WindowBalances(
+            start=self.time[start_ids],
+            end=self.time[end_ids],
+            diff_sum=diff_sum,
+            income=income,
+            outcome=outcome,
+            balance=diff_sum - (income - outcome),
+        )
+        return windows
+
+    def calcWindows(self, windows: list[tuple[datetime, datetime]] | np.ndarray) -> WindowBalances:
+        """
+        Рассчитывает суммарные значения за окна времени (начало, конец); начало  и  конец
+        заменяются ближайшими временами индекса
+        """
+        windows = np.asarray(windows, dtype="datetime64[s]").reshape(-1, 2)
+        ids = self.getTimeIds(windows)
+
+        return self.calcWindowsByIds(ids[:, 0], ids[:, 1])
@@ -13,6 +13,25 @@ class Mode(Enum):
     DF = 3
 
 
+def findClosestTimeIds(axis: np.ndarray, times: list | np.ndarray) -> np.ndarray:
+    """
+    Находит индексы ближайших времен возрастающей оси времени 'axis' для массива времен
+
+    Если время находится ровно посередине между двумя временами,  выбирается  более
+    раннее
+    """
+    times = np.asarray(times, dtype="datetime64[s]")
+    if axis.size == 1:
+        return np.zeros(times.shape, dtype=np.int64)
+
+    # индекс первого времени, не меньшего искомого, и предшествующий ему
+    right = np.clip(np.searchsorted(axis, times), 1, axis.size - 1)
+    left = right - 1
+
+    closer_right = (axis[right] - times) < (times - axis[left])
+    return np.where(closer_right, right, left)
+
+
 def verifyMap(data_map: np.ndarray) -> None:
     """"Проверяет размерность карты"""
     return None
@@ -34,17 +53,17 @@ class CoordTools():
     @staticmethod
     def calcGrid() -> Grid:
         """Рассчитывает сетку координат и возвращает результат"""
-        STD_lons =  [
-            (20.125 + X * 0.25) if X<640 else (20.125 + (X - 1440) * 0.25) for X in range(STD_WIDTH)
-        ]
+        X = np.arange(STD_WIDTH)
+        STD_lons = 20.125 + np.where(X < 640, X, X - 1440) * 0.25
 
-        STD_lats_Btm0 = [ 89.875 - (719 - Y) * 0.25 for Y in range(STD_HEIGTH) ]
-        STD_lats_Top0 = [ (719 - Y) * 0.25 - 89.875 for Y in range(STD_HEIGTH) ]
+        Y = np.arange(STD_HEIGTH)
+        STD_lats_Btm0 = 89.875 - (719 - Y) * 0.25
+        STD_lats_Top0 = (719 - Y) * 0.25 - 89.875
         STD_lats = STD_lats_Top0 if OPT_IMAGE_TOP0 else STD_lats_Btm0
 
         grid = Grid(
-            lat=np.array(STD_lats), 
-            lon=np.array(STD_lons),
+            lat=STD_lats,
+            lon=STD_lons,
         )
     
         return grid
@@ -0,0 +1,72 @@
+import h5py
+import h5netcdf
+import numpy as np
+import pytest
+
+from datetime import datetime, timedelta
+
+
+# ---------- SETTINGS ----------
+
+START_DAY = datetime(2022, 7, 1)
+TIMESIZE = 24
+HOURS_STEP = 3
+
+# сетка с убывающей широтой, как в исходных файлах
+LAT = np.arange(69.875, 50.0, -0.25)
+LON = np.arange(120.125, 150.0, 0.25)
+
+TARGET_VARIABLE_NAME = "20220601_mean"
+OTHER_VARIABLE_NAME = "other_mean"
+
+# ------------------------------
+
+
+def writeDataFile(path: str,
+                  start: datetime = START_DAY,
+                  timesize: int = TIMESIZE,
+                  seed: int = 0,
+                  chunks: tuple | None = (16, 16, 4),
+                  stime_dtype: str = "S19",
+                 ) -> str:
+    """
+    Записывает файл NetCDF со случайными концентрациями и скоростями в формате  исходных
+    данных: переменные с осями (долгота, широта, время) и времена вида  b"YYYY-MM-DD_HH..."
+    """
+    rng = np.random.default_rng(seed)
+
+    times = [start + timedelta(hours=HOURS_STEP * time_id) for time_id in range(timesize)]
+    stimes = [time.strftime("%Y-%m-%d_%H:%M:%S") for time in times]
+    shape = (LON.size, LAT.size, timesize)
+    options = dict(chunks=chunks, compression="gzip") if chunks else {}
+
+    with h5netcdf.File(path, "w") as db:
+        db.dimensions = {"lon": LON.size, "lat": LAT.size, "time": timesize}
+        db.create_variable("lat", ("lat",), data=LAT)
+        db.create_variable("lon", ("lon",), data=LON)
+
+        if stime_dtype == "O":
+            # строки переменной длины читаются как массив объектов
+            stime = db.create_variable("stime", ("time",), dtype=h5py.string_dtype())
+            stime[:] = np.array(stimes, dtype=object)
+        else:
+            db.create_variable("stime", ("time",), data=np.array(stimes, dtype=stime_dtype))
+
+        db.create_variable(TARGET_VARIABLE_NAME, ("lon", "lat", "time"), data=rng.random(shape) * 1e-3, **options)
+        db.create_variable(OTHER_VARIABLE_NAME, ("lon", "lat", "time"), data=rng.random(shape) * 1e-3, **options)
+        db.create_variable("U", ("lon", "lat", "time"), data=rng.normal(size=shape) * 5, **options)
+        db.create_variable("V", ("lon", "lat", "time"), data=rng.normal(size=shape) * 5, **options)
+
+    return path
+
+
+@pytest.fixture
+def write_data_file():
+    """Функция записи файла NetCDF со случайными данными (см. writeDataFile)"""
+    return writeDataFile
+
+
+@pytest.fixture
+def data_path(tmp_path) -> str:
+    """Путь к небольшому файлу NetCDF со случайными данными"""
+    return writeDataFile(str(tmp_path / "data.nc"))
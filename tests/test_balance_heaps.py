@@ -0,0 +1,52 @@
+import numpy as np
+
+from src.containers import BalanceHeaps
+
+
+# ---------- SETTINGS ----------
+
+SHAPE = (3, 5, 5)
+TIMESIZE = 12
+
+# ------------------------------
+
+
+def makeHeaps(seed: int = 0) -> BalanceHeaps:
+    """Генерирует случайные балансы"""
+    rng = np.random.default_rng(seed)
+    regions_count = int(np.prod(SHAPE))
+
+    heaps = BalanceHeaps(
+        balance=rng.normal(size=(regions_count, TIMESIZE)) * 1e6,
+        regions=rng.uniform(-90, 90, (regions_count, 4)).astype(np.float32),
+        time=np.datetime64("2022-07-01T00", "s") + np.timedelta64(3, "h") * np.arange(TIMESIZE),
+        heights=rng.uniform(1, 10, SHAPE[0]),
+        widths=rng.uniform(1, 10, SHAPE[0]),
+        shape=SHAPE,
+    )
+    return heaps
+
+
+def test_BalanceHeaps(tmp_path) -> None:
+    """Выборки - представления общего массива; сохранение и загрузка не меняют данные"""
+    heaps = makeHeaps()
+
+    view = heaps.getBalances(size=1, lat_shift=2)
+    assert np.shares_memory(view, heaps.balance)
+    assert np.array_equal(view, heaps.balance[1 * 25 + 2 * 5 : 1 * 25 + 3 * 5])
+
+    heap = heaps.getHeap(2)
+    assert len(heap.balances) == 25
+    assert np.array_equal(heap.balances[7].balance, heaps.balance[2 * 25 + 7])
+
+    for name, compress in (("heaps.npz", True), ("heaps_stored.npz", False), ("heaps.nc", True)):
+        path = str(tmp_path / name)
+        heaps.save(path, compress=compress)
+        loaded = BalanceHeaps.load(path)
+
+        for array_name in BalanceHeaps.ARRAYS:
+            assert np.array_equal(getattr(loaded, array_name), getattr(heaps, array_name))
+        assert loaded.shape == heaps.shape
+
+    # несжатый .npz открывается через memmap
+    assert isinstance(BalanceHeaps.load(str(tmp_path / "heaps_stored.npz")).balance, np.memmap)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.prefix_sums import SumTable, BorderFluxTable, idsToArray
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGIONS = [
+    Region(55, 65, 130, 140),
+    Region(56.5, 63, 131.25, 138),
+    # далекие регионы в противоположных углах сетки
+    Region(51, 53, 121, 123.5),
+    Region(66, 69, 145.5, 149),
+]
+TARGET_VARIABLE_NAME = "20220601_mean"
+CHUNK_SIZE = 5
+
+# ------------------------------
+
+
+def test_calcRegionBalances(data_path) -> None:
+    """
+    Тестирование метода BalanceCalculator.calcRegionBalances()
+
+    Балансы, рассчитанные за один проход по таблицам накопленных сумм, должны  совпадать
+    с балансами BalanceCalculator.getBalanceSeries() для каждого региона; далекие регионы
+    не должны читаться по их общему ограничивающему прямоугольнику
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(2), data.getDatetimeById(20))
+    bal_calc = BalanceCalculator()
+
+    balances = bal_calc.calcRegionBalances(REGIONS, data, CHUNK_SIZE)
+    report = data.getReadReport()
+
+    assert balances.balance.shape == (len(REGIONS), data.date_range.timesize)
+
+    for region_id, region in enumerate(REGIONS):
+        regdata = RegionProcessor(region, data.getGrid()).getRegionData()
+        etalon_balance = bal_calc.getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+
+        scale = np.abs(etalon_balance).max()
+        assert np.allclose(balances.balance[region_id], etalon_balance, rtol=0, atol=1e-6 * scale), "Балансы должны совпадать"
+
+    # объем U, если бы читался общий ограничивающий прямоугольник всех регионов
+    ids = idsToArray([RegionProcessor(region, data.getGrid()).getRegionData().id for region in REGIONS])
+    union_cells = (ids[:, 0].max() - ids[:, 1].min() + 1) * (ids[:, 3].max() - ids[:, 2].min() + 1)
+    union_bytes = union_cells * data.date_range.timesize * np.dtype(data.index.variables["U"].dtype).itemsize
+
+    assert report["U"].bytes_used < union_bytes / 2
+
+    data.close()
+
+
+def test_calcRegionBalances_tables(data_path, tmp_path) -> None:
+    """
+    Балансы по сохраненным таблицам накопленных сумм (см. SumTable.fromLoader) должны
+    совпадать с балансами, рассчитанными по файлу данных; таблицы для другого  диапазона
+    дат должны отвергаться
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(2), data.getDatetimeById(20))
+    bal_calc = BalanceCalculator()
+
+    tables = (
+        SumTable.fromLoader(data, str(tmp_path / "sums.npy"), CHUNK_SIZE),
+        BorderFluxTable.fromLoader(data, str(tmp_path / "fluxes.npy"), CHUNK_SIZE),
+    )
+    etalon = bal_calc.calcRegionBalances(REGIONS, data, CHUNK_SIZE)
+    balances = bal_calc.calcRegionBalances(REGIONS, data, CHUNK_SIZE, tables)
+
+    scale = np.abs(etalon.balance).max()
+    assert np.allclose(balances.balance, etalon.balance, rtol=0, atol=1e-9 * scale), "Балансы должны совпадать"
+
+    data.setDateRange(data.getDatetimeById(2), data.getDatetimeById(10))
+    with pytest.raises(ValueError):
+        bal_calc.calcRegionBalances(REGIONS, data, CHUNK_SIZE, tables)
+
+    data.close()
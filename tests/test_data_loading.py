@@ -0,0 +1,158 @@
+import os
+import numpy as np
+
+from datetime import datetime
+
+from src.data_loading import DataLoader
+from src.metadata import DatasetIndex
+from src.data_processing import RegionProcessor, SumCalculator
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+TIMESIZE = 12
+START = np.datetime64("2022-07-01T00", "s")
+STEP = np.timedelta64(3, "h")
+
+# ------------------------------
+
+
+def test_calcSumSeries(data_path) -> None:
+    """
+    Тестирование методов DataLoader.getTargetCube() и SumCalculator.calcSumSeries()
+
+    Суммы по прямоугольнику, прочитанному за весь диапазон одним обращением, должны
+    совпадать с суммами по глобальным картам каждой единицы времени
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    regdata = RegionProcessor(REGION, data.getGrid()).getRegionData()
+    start_id, end_id = 3, 17
+
+    cube = data.getTargetCube(regdata.id, start_id, end_id)
+    sums = SumCalculator.calcSumSeries(cube, regdata)
+
+    etalon_sums = [SumCalculator.calcSum(data.getTargetMap(day_id), regdata) for day_id in range(start_id, end_id + 1)]
+
+    assert cube.shape[0] == end_id - start_id + 1
+    assert np.allclose(sums, etalon_sums, rtol=1e-12)
+
+    data.close()
+
+
+def test_getBorderSeries(data_path) -> None:
+    """
+    Тестирование методов DataLoader.getBorderConcSeries(), getBorderFlowSeries()  и
+    getBorderSeries()
+
+    Границы, прочитанные за весь диапазон одним обращением, должны совпадать с  границами,
+    прочитанными по одной единице времени
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    region_id = RegionProcessor(REGION, data.getGrid()).getRegionData().id
+    start_id, end_id = 3, 17
+
+    conc = data.getBorderConcSeries(region_id, start_id, end_id)
+    flow = data.getBorderFlowSeries(region_id, start_id, end_id)
+    border = data.getBorderSeries(region_id, start_id, end_id)
+
+    for position, day_id in enumerate(range(start_id, end_id + 1)):
+        day_data = data.getConvData(day_id, region_id)
+
+        for edge in ("right", "left", "down", "up"):
+            assert np.array_equal(getattr(conc, edge)[position], getattr(day_data.conc, edge))
+            assert np.array_equal(getattr(flow, edge)[position], getattr(day_data.flow, edge))
+            assert np.array_equal(border.conc[position, border.getEdge(edge)], getattr(day_data.conc, edge))
+            assert np.array_equal(border.flow[position, border.getEdge(edge)], getattr(day_data.flow, edge))
+
+    data.close()
+
+
+def test_getTimeIds(tmp_path, write_data_file) -> None:
+    """
+    Тестирование методов DataLoader._decodeStimes() и getTimeIds()
+
+    Времена в виде строк фиксированной длины (S) и строк переменной длины (object)
+    должны декодироваться одинаково; ближайшее время ищется с выбором более  раннего
+    при равенстве расстояний
+    """
+    expected_axis = START + STEP * np.arange(TIMESIZE)
+
+    for stime_dtype in ("S19", "O"):
+        path = write_data_file(str(tmp_path / f"data_{stime_dtype}.nc"), timesize=TIMESIZE, stime_dtype=stime_dtype)
+        data = DataLoader(path, TARGET_VARIABLE_NAME)
+
+        assert np.array_equal(data.time_axis, expected_axis)
+
+        times = np.array([
+            expected_axis[0] - STEP,       # раньше начала оси
+            expected_axis[3],              # точное совпадение
+            expected_axis[3] + STEP / 3,   # ближе к предыдущему
+            expected_axis[3] + STEP / 2,   # ровно посередине
+            expected_axis[3] + STEP * 2 / 3,
+            expected_axis[-1] + STEP * 5,  # позже конца оси
+        ])
+        assert data.getTimeIds(times).tolist() == [0, 3, 3, 3, 4, TIMESIZE - 1]
+        assert data.getTimeId(expected_axis[5].astype(datetime)) == 5
+
+        data.close()
+
+
+def test_DatasetIndex(data_path) -> None:
+    """
+    Тестирование сохранения и загрузки индекса метаданных (см. DatasetIndex)
+
+    DataLoader, открытый по индексу, должен иметь те же метаданные, что и  открытый  по
+    файлу; после изменения файла данных индекс должен считаться устаревшим
+    """
+    etalon = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    etalon.close()
+
+    assert DatasetIndex.load(data_path) is None
+
+    # первое открытие создает индекс, второе - использует его
+    DataLoader(data_path, TARGET_VARIABLE_NAME, use_index=True).close()
+    index = DatasetIndex.load(data_path)
+    assert index is not None
+
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME, use_index=True)
+    assert data._file is None, "Файл данных не должен открываться до первого чтения"
+
+    assert np.array_equal(data.time_axis, etalon.time_axis)
+    assert np.array_equal(data.getGrid().lat, etalon.getGrid().lat)
+    assert np.array_equal(data.getGrid().lon, etalon.getGrid().lon)
+    assert data.index.variables == etalon.index.variables
+    data.close()
+
+    # изменение времени модификации файла делает индекс устаревшим
+    stat = os.stat(data_path)
+    os.utime(data_path, (stat.st_atime, stat.st_mtime + 10))
+    assert DatasetIndex.load(data_path) is None
+
+
+def test_iterCubeChunks_prefetch(data_path) -> None:
+    """
+    Тестирование метода DataLoader.iterCubeChunks()
+
+    Части, прочитанные фоновым потоком заранее, должны совпадать с частями, прочитанными
+    синхронно
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    region_id = RegionProcessor(REGION, data.getGrid()).getRegionData().id
+
+    etalon = list(data.iterCubeChunks(region_id, 2, 20, 5))
+    assert etalon[-1][1] == 20
+
+    for prefetch in (1, 3):
+        chunks = list(data.iterCubeChunks(region_id, 2, 20, 5, prefetch=prefetch))
+        assert [chunk[:2] for chunk in chunks] == [chunk[:2] for chunk in etalon]
+
+        for (*_, chunk), (*_, etalon_chunk) in zip(chunks, etalon):
+            assert np.array_equal(chunk.target, etalon_chunk.target)
+            assert np.array_equal(chunk.U, etalon_chunk.U)
+            assert np.array_equal(chunk.V, etalon_chunk.V)
+
+    data.close()
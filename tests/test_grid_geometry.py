@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.data_processing import RegionProcessor
+from src.tools import CoordTools
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGIONS = (
+    Region(55, 65, 130, 140),
+    Region(59, 65, 59.5, 66),
+    Region(-10.25, 3.5, -70, -61.75),
+    Region(80, 89.5, 30, 50),
+)
+
+# ------------------------------
+
+
+def test_getGridCell() -> None:
+    """
+    Тестирование методов RegionProcessor.getGridCell() и getAreasView()
+
+    Размеры краевых ячеек и площади ячеек по таблицам сетки должны совпадать  с  расчетом
+    по координатам региона (RegionProcessor.getCell(), calcAreasMatrix())
+    """
+    grid = CoordTools.calcGrid()
+
+    for region in REGIONS:
+        processor = RegionProcessor(region, grid)
+        id, grid_region = processor.id, processor.grid_region
+
+        cell = RegionProcessor.getGridCell(id, grid)
+        etalon_cell = RegionProcessor.getCell(grid_region)
+        for side in ("left", "right", "down", "up"):
+            assert np.isclose(getattr(cell, side), getattr(etalon_cell, side), rtol=1e-12)
+
+        areas = RegionProcessor.getAreasView(id, grid)
+        etalon_areas = RegionProcessor.calcAreasMatrix(grid_region)
+        assert areas.shape == etalon_areas.shape
+        assert np.allclose(areas, etalon_areas, rtol=1e-12)
+
+        # представление таблицы площадей сетки, а не копия
+        assert not areas.flags.writeable
+        assert np.shares_memory(areas, grid.geometry.areas)
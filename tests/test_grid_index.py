@@ -0,0 +1,22 @@
+import numpy as np
+
+from src.tools import CoordTools
+from src.containers import AxisIndex
+
+
+def test_AxisIndex() -> None:
+    """Поиск по оси совпадает с CoordTools.closestId, в том числе для оси со швом"""
+    rng = np.random.default_rng(0)
+    grid = CoordTools.calcGrid()
+
+    for values in (grid.lon, grid.lat, np.sort(rng.random(50)) * 10, rng.random(50) * 10):
+        axis = AxisIndex(values)
+
+        coords = np.concatenate((
+            rng.uniform(values.min() - 1, values.max() + 1, 2000),
+            # середины между значениями сетки
+            np.round(rng.uniform(values.min(), values.max(), 500) * 8) / 8,
+        ))
+        expected = [CoordTools.closestId(coord, values) for coord in coords]
+
+        assert np.array_equal(axis.closestIds(coords), expected)
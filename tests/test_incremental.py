@@ -0,0 +1,68 @@
+import shutil
+import h5netcdf
+import numpy as np
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.incremental import BalanceState
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TARGET_VARIABLE_NAME = "20220601_mean"
+FIRST_TIMESIZE = 9
+
+# ------------------------------
+
+
+def copyTimeRange(source_path: str, path: str, timesize: int) -> None:
+    """Записывает в 'path' первые 'timesize' единиц времени файла 'source_path'"""
+    with h5netcdf.File(source_path, "r") as source, h5netcdf.File(path, "w") as db:
+        db.dimensions = {"lon": source.dimensions["lon"].size, "lat": source.dimensions["lat"].size, "time": timesize}
+
+        for name, variable in source.variables.items():
+            data = variable[..., :timesize] if "time" in variable.dimensions else variable[:]
+            db.create_variable(name, variable.dimensions, data=data)
+
+
+def test_BalanceState_refresh(tmp_path, write_data_file) -> None:
+    """
+    Тестирование метода BalanceState.refresh()
+
+    Баланс, дорассчитанный по мере пополнения файла (с сохранением и загрузкой состояния
+    между дорасчетами), должен совпадать с балансом, рассчитанным за один раз
+    """
+    full_path = write_data_file(str(tmp_path / "full.nc"))
+    path = str(tmp_path / "data.nc")
+    states_dir = str(tmp_path / "states")
+
+    copyTimeRange(full_path, path, FIRST_TIMESIZE)
+    data = DataLoader(path, TARGET_VARIABLE_NAME)
+    state = BalanceState.open(states_dir, data, REGION)
+
+    assert state.refresh(data, chunk_size=4) == FIRST_TIMESIZE - 1
+    assert state.refresh(data, chunk_size=4) == 0
+    state.save()
+    data.close()
+
+    # файл пополняется новыми единицами времени
+    shutil.copy(full_path, path)
+    data = DataLoader(path, TARGET_VARIABLE_NAME)
+    timesize = data.time_axis.size
+
+    state = BalanceState.open(states_dir, data, REGION)
+    assert state.end_id == FIRST_TIMESIZE - 2
+    assert state.refresh(data, chunk_size=4) == timesize - FIRST_TIMESIZE
+    data.close()
+
+    data = DataLoader(full_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(0), data.getDatetimeById(timesize - 2))
+    regdata = RegionProcessor(REGION, data.getGrid()).getRegionData()
+    etalon_balance = BalanceCalculator().getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+
+    assert np.array_equal(state.time, data.time_axis[:-1])
+    assert np.allclose(state.balance, etalon_balance, rtol=1e-9)
+
+    data.close()
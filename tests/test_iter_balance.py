@@ -0,0 +1,44 @@
+import numpy as np
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def test_iterBalance(data_path) -> None:
+    """
+    Тестирование метода BalanceCalculator.iterBalance()
+
+    Склеенные части баланса должны совпадать с BalanceCalculator.getBalanceSeries() при
+    любом размере частей, а сумма в конце каждой части - с суммой в начале следующей
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(21))
+    regdata = RegionProcessor(REGION, data.getGrid()).getRegionData()
+    balance_data = BalanceData(reg_data=regdata, data=data)
+
+    bal_calc = BalanceCalculator()
+    etalon_balance = bal_calc.getBalanceSeries(balance_data)
+    sums = bal_calc.sum_calculator.calcSumSeries(data.getTargetCube(regdata.id, 1, 22), regdata)
+
+    for chunk_size in (1, 4, 7, 50):
+        records = list(bal_calc.iterBalance(balance_data, chunk_size))
+
+        balance = np.concatenate([record.balance for record in records])
+        time = np.concatenate([record.time for record in records])
+
+        assert np.allclose(balance, etalon_balance, rtol=1e-9)
+        assert np.array_equal(time, data.time_axis[1:22])
+
+        positions = np.cumsum([len(record) for record in records])
+        assert np.allclose([record.last_sum for record in records], sums[positions], rtol=1e-12)
+
+    data.close()
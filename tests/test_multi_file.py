@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from datetime import datetime, timedelta
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.multi_file import MultiFileDataLoader
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TARGET_VARIABLE_NAME = "20220601_mean"
+START_DAY = datetime(2022, 7, 1)
+FILE_TIMESIZE = 12
+HOURS_STEP = 3
+
+# ------------------------------
+
+
+def writeFiles(tmp_path, write_data_file, starts: list[int]) -> list[str]:
+    """Записывает файлы, начинающиеся с единиц времени 'starts' от общего начала"""
+    return [
+        write_data_file(
+            str(tmp_path / f"part_{file_id}.nc"),
+            start=START_DAY + timedelta(hours=HOURS_STEP * start),
+            timesize=FILE_TIMESIZE,
+            seed=file_id,
+        )
+        for file_id, start in enumerate(starts)
+    ]
+
+
+def test_MultiFileDataLoader(tmp_path, write_data_file) -> None:
+    """
+    Тестирование класса MultiFileDataLoader
+
+    Чтение через границу файлов должно совпадать со склейкой чтений из каждого  файла;
+    файлы упорядочиваются по времени независимо от порядка путей
+    """
+    paths = writeFiles(tmp_path, write_data_file, [0, FILE_TIMESIZE])
+    parts = [DataLoader(path, TARGET_VARIABLE_NAME) for path in paths]
+
+    data = MultiFileDataLoader(paths[::-1], TARGET_VARIABLE_NAME, max_open=1)
+    assert data.paths == paths
+    assert np.array_equal(data.time_axis, np.concatenate([part.time_axis for part in parts]))
+
+    regdata = RegionProcessor(REGION, data.getGrid()).getRegionData()
+    start_id, end_id = FILE_TIMESIZE - 4, FILE_TIMESIZE + 3
+
+    cube = data.getUCube(regdata.id, start_id, end_id)
+    etalon_cube = np.concatenate([
+        parts[0].getUCube(regdata.id, start_id, FILE_TIMESIZE - 1),
+        parts[1].getUCube(regdata.id, 0, end_id - FILE_TIMESIZE),
+    ])
+    assert np.array_equal(cube, etalon_cube)
+
+    border = data.getBorderSeries(regdata.id, start_id, end_id)
+    etalon_flow = np.concatenate([
+        parts[0].getBorderSeries(regdata.id, start_id, FILE_TIMESIZE - 1).flow,
+        parts[1].getBorderSeries(regdata.id, 0, end_id - FILE_TIMESIZE).flow,
+    ])
+    assert np.array_equal(border.flow, etalon_flow)
+
+    # баланс через границу файлов: в момент FILE_TIMESIZE - 1 нужны концентрации второго файла
+    data.setDateRange(data.getDatetimeById(start_id), data.getDatetimeById(end_id))
+    balance = BalanceCalculator().getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+    assert balance.shape == (end_id - start_id + 1,)
+    assert np.all(np.isfinite(balance))
+
+    for loader in (data, *parts):
+        loader.close()
+
+
+def test_MultiFileDataLoader_timeAxis(tmp_path, write_data_file) -> None:
+    """Перекрывающиеся файлы и файлы с пропуском времени между ними не открываются"""
+    for starts in ([0, FILE_TIMESIZE - 2], [0, FILE_TIMESIZE + 1]):
+        paths = writeFiles(tmp_path, write_data_file, starts)
+
+        with pytest.raises(ValueError):
+            MultiFileDataLoader(paths, TARGET_VARIABLE_NAME)
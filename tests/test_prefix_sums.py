@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from src.data_loading import DataLoader
+from src.data_processing import RegionProcessor, SumCalculator, ConvCalculator
+from src.prefix_sums import SumTable, BorderFluxTable, _tableMeta, _loadTable
+from src.tools import CoordTools, Mode
+from src.containers import Region, ConvConc, ConvFlow, ConvOriginalDayData
+
+
+# ---------- SETTINGS ----------
+
+REGIONS = (
+    Region(55, 65, 130, 140),
+    Region(59, 65, 59.5, 66),
+    Region(-10.25, 3.5, -70, -61.75),
+)
+TIMESIZE = 3
+SECONDS = 3 * 60 * 60
+
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def makeMaps(seed: int = 0) -> np.ndarray:
+    """Генерирует случайные карты концентраций с осями (время, широта, долгота)"""
+    rng = np.random.default_rng(seed)
+    grid = CoordTools.calcGrid()
+    return rng.random((TIMESIZE, grid.lat.size, grid.lon.size)) * 1e-3
+
+
+def test_SumTable() -> None:
+    """
+    Тестирование метода SumTable.calcSums()
+
+    Суммы по таблице накопленных сумм должны совпадать с суммами SumCalculator
+    """
+    grid = CoordTools.calcGrid()
+    maps = makeMaps()
+    regions_data = [RegionProcessor(region, grid).getRegionData() for region in REGIONS]
+
+    table = SumTable.fromCube(maps, grid.geometry.areas)
+    calculated_sums = table.calcSums([regdata.id for regdata in regions_data])
+
+    etalon_sums = np.array([
+        [SumCalculator.calcSum(data_map, regdata) for data_map in maps]
+        for regdata in regions_data
+    ])
+
+    assert calculated_sums.shape == (len(REGIONS), TIMESIZE)
+    assert np.allclose(calculated_sums, etalon_sums, rtol=1e-9), "Суммы должны совпадать"
+
+
+def test_BorderFluxTable() -> None:
+    """
+    Тестирование метода BorderFluxTable.calcConvs()
+
+    Конвергенция по таблице накопленных потоков должна совпадать с  конвергенцией
+    ConvCalculator
+    """
+    grid = CoordTools.calcGrid()
+    conc = makeMaps(seed=1)
+    umap, vmap = (makeMaps(seed) * 1e4 - 5 for seed in (2, 3))
+    regions_data = [RegionProcessor(region, grid).getRegionData() for region in REGIONS]
+
+    table = BorderFluxTable.fromCubes(conc, umap, vmap, grid.geometry.parallel_lengths)
+    calculated_convs = table.calcConvs([regdata.id for regdata in regions_data], SECONDS, Mode.SEP)
+
+    conv_calc = ConvCalculator()
+    for region_id, regdata in enumerate(regions_data):
+        id = regdata.id
+        lat, lon = slice(id.up, id.down + 1), slice(id.left, id.right + 1)
+
+        convdata = ConvOriginalDayData(
+            conc=ConvConc(conc[:, lat, id.right], conc[:, lat, id.left], conc[:, id.down, lon], conc[:, id.up, lon]),
+            flow=ConvFlow(umap[:, lat, id.right], umap[:, lat, id.left], vmap[:, id.down, lon], vmap[:, id.up, lon]),
+        )
+        etalon_convs = conv_calc.calcConvSeries(convdata, regdata, SECONDS, Mode.SEP)
+
+        for calculated, etalon in zip(calculated_convs, etalon_convs):
+            assert np.allclose(calculated[region_id], etalon, rtol=1e-9), "Потоки должны совпадать"
+
+
+def test_SumTable_interruptedRebuild(data_path, tmp_path, monkeypatch) -> None:
+    """
+    Тестирование метода SumTable.fromLoader() с сохранением таблицы
+
+    Прерванное построение таблицы не должно оставлять  описание  старой  таблицы,  по
+    которому открылись бы другие данные
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    path = str(tmp_path / "sums.npy")
+
+    data.setDateRange(data.getDatetimeById(0), data.getDatetimeById(10))
+    table = SumTable.fromLoader(data, path, chunk_size=4)
+    old_meta = _tableMeta(data, "sums", 0, 11)
+    assert _loadTable(path, old_meta) is not None
+
+    # построение таблицы для другого диапазона прерывается при чтении
+    def failingRead(*args, **kwargs):
+        raise OSError("read failed")
+
+    data.setDateRange(data.getDatetimeById(2), data.getDatetimeById(20))
+    monkeypatch.setattr(data, "getTargetCube", failingRead)
+    with pytest.raises(OSError):
+        SumTable.fromLoader(data, path, chunk_size=4)
+
+    assert _loadTable(path, old_meta) is None, "Описание старой таблицы должно быть удалено"
+
+    monkeypatch.undo()
+    data.setDateRange(data.getDatetimeById(0), data.getDatetimeById(10))
+    rebuilt = SumTable.fromLoader(data, path, chunk_size=4)
+    assert np.array_equal(rebuilt.table, table.table)
+    assert _loadTable(path, old_meta) is not None
+
+    data.close()
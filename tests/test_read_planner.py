@@ -0,0 +1,124 @@
+import numpy as np
+
+from src.data_loading import DataLoader
+from src.read_planner import ReadPlanner
+from src.metadata import VariableInfo
+from src.containers import Id
+
+
+# ---------- SETTINGS ----------
+
+SHAPE = (120, 80, 24)
+CHUNKS = (16, 16, 4)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def makePlanner(chunks: tuple | None = CHUNKS) -> ReadPlanner:
+    """Создает планировщик для одной переменной 'x' формы SHAPE"""
+    info = VariableInfo(shape=SHAPE, dtype="<f8", chunks=chunks, compression=None, compression_opts=None)
+    return ReadPlanner({"x": info})
+
+
+def test_alignTimeBatches() -> None:
+    """
+    Тестирование метода ReadPlanner.alignTimeBatches()
+
+    Части диапазона должны покрывать его без пропусков, не превышать 'batch_size' и
+    начинаться на границах блоков по времени; если блок длиннее 'batch_size', части  не
+    выравниваются
+    """
+    planner = makePlanner()
+
+    for start_id, end_id, batch_size in ((0, 23, 8), (3, 21, 8), (5, 17, 10), (2, 9, 1)):
+        batches = planner.alignTimeBatches("x", start_id, end_id, batch_size)
+
+        assert batches[0][0] == start_id and batches[-1][1] == end_id
+        assert all(previous[1] + 1 == batch[0] for previous, batch in zip(batches, batches[1:]))
+        assert all(end - start + 1 <= batch_size for start, end in batches)
+
+        if batch_size >= CHUNKS[-1]:
+            assert all(start % CHUNKS[-1] == 0 for start, _ in batches[1:])
+
+    # блок по времени покрывает всю ось: части не увеличиваются до размера блока
+    planner = makePlanner((16, 16, SHAPE[-1]))
+    assert planner.alignTimeBatches("x", 1, 20, 8) == [(1, 8), (9, 16), (17, 20)]
+
+
+def test_groupWindows() -> None:
+    """
+    Тестирование метода ReadPlanner.groupWindows()
+
+    Окна с общими блоками должны объединяться в одну группу, а далекие окна - нет
+    """
+    planner = makePlanner()
+    windows = [
+        Id(down=20, up=5, left=5, right=20),
+        Id(down=24, up=18, left=18, right=30),
+        Id(down=75, up=70, left=100, right=110),
+        Id(down=10, up=2, left=30, right=33),
+    ]
+
+    groups = planner.groupWindows("x", windows)
+    window_groups = sorted(sorted(window_ids) for _, window_ids in groups)
+
+    # окно 3 использует блок (1, 0) вместе с окном 1
+    assert window_groups == [[0, 1, 3], [2]]
+
+    bounds = {tuple(window_ids): window for window, window_ids in groups}
+    assert bounds[(2,)] == windows[2]
+
+
+def test_groupWindows_unchunked() -> None:
+    """Для переменной без блоков каждое окно должно быть отдельной группой"""
+    planner = makePlanner(None)
+    windows = [
+        Id(down=20, up=5, left=5, right=20),
+        Id(down=24, up=18, left=18, right=30),
+        Id(down=79, up=0, left=0, right=119),
+    ]
+
+    groups = planner.groupWindows("x", windows)
+
+    assert groups == [(window, [window_id]) for window_id, window in enumerate(windows)]
+
+
+def test_account() -> None:
+    """
+    Тестирование метода ReadPlanner.account()
+
+    Повторное чтение тех же блоков увеличивает количество распаковок, но не количество
+    различных блоков
+    """
+    planner = makePlanner()
+    chunk_bytes = np.prod(CHUNKS) * 8
+
+    planner.account("x", slice(0, 20), slice(0, 10), slice(0, 4))
+    planner.account("x", slice(10, 20), slice(0, 10), slice(2, 6))
+
+    report = planner.report()["x"]
+    assert report.bytes_used == (20 * 10 * 4 + 10 * 10 * 4) * 8
+    # первое чтение касается 2 блоков, второе - 4, из них 2 новых
+    assert report.chunks_decoded == 2 + 4
+    assert report.unique_chunks == 4
+    assert report.bytes_decoded == 6 * chunk_bytes
+    assert 0 < report.efficiency < report.cached_efficiency <= 1
+
+    planner.resetReport()
+    assert planner.report() == {}
+
+
+def test_getReadReport(data_path) -> None:
+    """Чтение через DataLoader учитывается в статистике планировщика"""
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME, chunk_cache="auto")
+    region_id = Id(down=40, up=20, left=30, right=60)
+
+    data.getUCube(region_id, 0, 7)
+    data.getUCube(region_id, 4, 11)
+
+    report = data.getReadReport()["U"]
+    assert report.bytes_used == 2 * 21 * 31 * 8 * 8
+    assert report.unique_chunks < report.chunks_decoded
+
+    data.close()
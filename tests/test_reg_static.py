@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from src.data_loading import DataLoader
+from src.reg_static import StaticMaker
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(58, 62, 133, 137)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+class SmallStaticMaker(StaticMaker):
+    """StaticMaker с двумя размерами регионов, чтобы тест выполнялся быстро"""
+    SIZE_SHIFTS = np.array([0.5, -0.5])
+
+
+def test_calcBalanceHeaps_workers(data_path) -> None:
+    """
+    Тестирование метода StaticMaker.calcBalanceHeaps()
+
+    Результаты расчета в одном процессе и в пуле процессов (в том числе с разбиением рядов
+    регионов на несколько задач) должны совпадать, в том числе по порядку регионов
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(18))
+
+    etalon = SmallStaticMaker(workers=1, chunk_size=5).calcBalanceHeaps(data, REGION)
+
+    for workers in (2, 3):
+        heaps = SmallStaticMaker(workers=workers, chunk_size=5).calcBalanceHeaps(data, REGION)
+
+        assert heaps.shape == etalon.shape
+        assert np.array_equal(heaps.regions, etalon.regions)
+        # задачи с разными прямоугольниками строят таблицы сумм от разных начал, поэтому
+        # значения совпадают с точностью до округления
+        assert np.allclose(heaps.balance, etalon.balance, rtol=1e-9), f"Балансы при workers={workers} должны совпадать"
+
+    data.close()
+
+
+def test_calcBalanceHeaps_tables(data_path, tmp_path) -> None:
+    """
+    Расчет по сохраненным таблицам накопленных сумм (StaticMaker(tables_dir=...)) должен
+    совпадать с расчетом по файлу данных, в том числе в пуле процессов
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(18))
+
+    etalon = SmallStaticMaker(workers=1, chunk_size=5).calcBalanceHeaps(data, REGION)
+    scale = np.abs(etalon.balance).max()
+
+    for workers in (1, 2):
+        maker = SmallStaticMaker(workers=workers, chunk_size=5, tables_dir=str(tmp_path / "tables"))
+        heaps = maker.calcBalanceHeaps(data, REGION)
+
+        assert np.array_equal(heaps.regions, etalon.regions)
+        # таблицы по всей сетке накапливают суммы от другого начала, поэтому значения
+        # совпадают с точностью до округления
+        assert np.allclose(heaps.balance, etalon.balance, rtol=0, atol=1e-9 * scale), f"Балансы при workers={workers} должны совпадать"
+
+    data.close()
+
+
+def test_calcCenterRegionSet_small() -> None:
+    """Для слишком маленького региона должна возникать понятная ошибка"""
+    with pytest.raises(ValueError):
+        StaticMaker.calcCenterRegionSet(Region(58, 60, 133, 137))
+
+    with pytest.raises(ValueError):
+        StaticMaker.calcCenterRegionSet(Region(58, 62, 133, 135.5))
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.tools import CoordTools
+from src.containers import Region, RegionSet
+from src.data_processing import RegionProcessor
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(59, 65, 59.5, 66)
+SHIFTS = (np.arange(0, 425, 25) - 200) / 100
+
+# ------------------------------
+
+
+def test_RegionSet() -> None:
+    """Операции над набором совпадают с операциями над отдельными регионами"""
+    grid = CoordTools.calcGrid()
+    heights = np.array([2.5, 6.0, 9.5]) + REGION.height
+    widths = np.array([2.5, 6.0, 9.5]) + REGION.width
+
+    centers = RegionSet.fromRegions([REGION]).centralize(heights, widths)
+    expected = [REGION.centralizeRegion(height, width) for height, width in zip(heights, widths)]
+    assert np.array_equal(centers.coords, RegionSet.fromRegions(expected).coords)
+
+    lattice = centers.shiftLattice(SHIFTS, SHIFTS)
+    expected = [
+        center.addCoords(lat_shift, lon_shift)
+        for center in expected for lat_shift in SHIFTS for lon_shift in SHIFTS
+    ]
+    assert np.array_equal(lattice.coords, RegionSet.fromRegions(expected).coords)
+
+    ids = [RegionProcessor.getId(region, grid) for region in expected]
+    assert np.array_equal(lattice.snapIds(grid), [(id.down, id.up, id.left, id.right) for id in ids])
+
+    areas = [RegionProcessor(region, grid).areas.sum() for region in expected[:20]]
+    assert np.allclose(lattice[:20].calcAreas(grid), areas)
@@ -0,0 +1,109 @@
+import os
+import numpy as np
+
+from src.data_loading import DataLoader
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.cache import ResultCache
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+# регионы, совпадающие после привязки к сетке
+REGION = Region(55.1, 65.1, 130.1, 140.1)
+SHIFTED_REGION = Region(55.15, 65.15, 130.15, 140.15)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def test_ResultCache(tmp_path) -> None:
+    """Результаты сохраняются на диск и вытесняются по давности обращения"""
+    arrays = [np.full(16, value, dtype=np.float64) for value in range(3)]
+    entry_bytes = os.path.getsize(_saveProbe(tmp_path, arrays[0]))
+
+    cache = ResultCache(str(tmp_path / "cache"), 2 * entry_bytes)
+    keys = [cache.makeKey(id=[value, 0, 0, 0], start_id=0, end_id=15) for value in range(3)]
+
+    cache.put(keys[0], arrays[0])
+    cache.put(keys[1], arrays[1])
+
+    # обращение к первому результату делает давно не использовавшимся второй
+    assert np.array_equal(cache.get(keys[0]), arrays[0])
+    cache.put(keys[2], arrays[2])
+
+    assert cache.get(keys[1]) is None
+    assert np.array_equal(cache.get(keys[2]), arrays[2])
+    assert cache.stats.entries == 2
+    assert cache.stats.evictions == 1
+
+
+def _saveProbe(tmp_path, array: np.ndarray) -> str:
+    path = str(tmp_path / "probe.npy")
+    np.save(path, array)
+    return path
+
+
+def test_ResultCache_reopen(tmp_path, monkeypatch) -> None:
+    """
+    Каталог кэша просматривается только при открытии: объем ведется по  записям,  а
+    порядок вытеснения после повторного открытия берется из времени обращения к файлам
+    """
+    arrays = [np.full(16, value, dtype=np.float64) for value in range(4)]
+    entry_bytes = os.path.getsize(_saveProbe(tmp_path, arrays[0]))
+    directory = str(tmp_path / "cache")
+
+    cache = ResultCache(directory, 3 * entry_bytes)
+    keys = [cache.makeKey(id=[value, 0, 0, 0]) for value in range(4)]
+    for key, array in zip(keys[:3], arrays):
+        cache.put(key, array)
+
+    for time, key in enumerate((keys[1], keys[2], keys[0])):
+        os.utime(cache._path(key), (time, time))
+
+    def failingList():
+        raise AssertionError("Каталог кэша не должен просматриваться")
+
+    cache = ResultCache(directory, 3 * entry_bytes)
+    assert cache.stats.bytes == 3 * entry_bytes
+
+    monkeypatch.setattr(cache, "_listFiles", failingList)
+    cache.put(keys[3], arrays[3])
+
+    # дольше всего не использовался второй результат
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+    assert cache.stats.entries == 3
+    assert cache.stats.bytes == 3 * entry_bytes
+
+
+def test_calcRegionBalance_cache(data_path, tmp_path) -> None:
+    """
+    Тестирование кэша результатов BalanceCalculator.calcRegionBalance()
+
+    Повторный расчет, в том числе для региона, совпадающего с первым  после  привязки  к
+    сетке, должен браться из кэша и совпадать с первым
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(2), data.getDatetimeById(20))
+
+    grid = data.getGrid()
+    assert RegionProcessor(REGION, grid).getRegionData().id == RegionProcessor(SHIFTED_REGION, grid).getRegionData().id
+
+    cache = ResultCache(str(tmp_path / "cache"), 2**20)
+    bal_calc = BalanceCalculator(result_cache=cache)
+
+    etalon = bal_calc.calcRegionBalance(REGION, data)
+    assert (cache.stats.hits, cache.stats.misses) == (0, 1)
+
+    balance = bal_calc.calcRegionBalance(REGION, data)
+    assert cache.stats.hits == 1
+    assert np.array_equal(balance.balance, etalon.balance)
+
+    shifted = bal_calc.calcRegionBalance(SHIFTED_REGION, data)
+    assert cache.stats.hits == 2
+    assert shifted.region == SHIFTED_REGION
+    assert np.array_equal(shifted.balance, etalon.balance)
+    assert cache.stats.entries == 1
+
+    data.close()
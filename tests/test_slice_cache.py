@@ -0,0 +1,101 @@
+import numpy as np
+
+from src.data_loading import DataLoader
+from src.cache import SliceCache
+from src.containers import Id
+
+
+# ---------- SETTINGS ----------
+
+REGION_ID = Id(down=40, up=20, left=30, right=60)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def test_SliceCache() -> None:
+    """Массивы вытесняются по давности обращения при превышении объема"""
+    arrays = [np.full(16, value, dtype=np.float64) for value in range(3)]
+    cache = SliceCache(2 * arrays[0].nbytes)
+
+    cache.put("a", arrays[0])
+    cache.put("b", arrays[1])
+    assert cache.get("a") is not None
+    assert cache.get("c") is None
+
+    # "b" использовался давно и вытесняется
+    cache.put("c", arrays[2])
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 1, 1, 2)
+    assert stats.bytes == 2 * arrays[0].nbytes
+
+
+def test_DataLoader_cache(data_path) -> None:
+    """
+    Тестирование кэша прочитанных срезов DataLoader
+
+    Пересекающееся по времени чтение берет общие срезы из кэша и читает из файла только
+    недостающие; результат совпадает с чтением без кэша
+    """
+    etalon = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME, cache_bytes=64 * 2**20)
+
+    data.getUCube(REGION_ID, 0, 9)
+    used_before = data.getReadReport()["U"].bytes_used
+
+    cube = data.getUCube(REGION_ID, 5, 14)
+    assert np.array_equal(cube, etalon.getUCube(REGION_ID, 5, 14))
+
+    stats = data.getCacheStats()
+    assert stats.hits == 5
+    assert stats.entries == 15
+
+    # из файла прочитаны только единицы времени 10-14
+    slice_bytes = 21 * 31 * 8
+    assert data.getReadReport()["U"].bytes_used - used_before == 5 * slice_bytes
+
+    etalon.close()
+    data.close()
+
+
+def test_DataLoader_cacheEviction(data_path) -> None:
+    """При малом объеме кэша срезы вытесняются, а результаты чтения не меняются"""
+    slice_bytes = 21 * 31 * 8
+    etalon = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME, cache_bytes=3 * slice_bytes)
+
+    for start_id in (0, 4, 2):
+        cube = data.getUCube(REGION_ID, start_id, start_id + 5)
+        assert np.array_equal(cube, etalon.getUCube(REGION_ID, start_id, start_id + 5))
+
+    stats = data.getCacheStats()
+    assert stats.evictions > 0
+    assert stats.entries == 3
+    assert stats.bytes <= 3 * slice_bytes
+
+    etalon.close()
+    data.close()
+
+
+def test_DataLoader_cache_writable(data_path) -> None:
+    """
+    Карты и кубы, прочитанные через кэш, должны быть доступны для записи,  а  их  изме-
+    нение не должно затрагивать кэш
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME, cache_bytes=64 * 2**20)
+
+    data_map = data.getTargetMap(3)
+    etalon = data_map.copy()
+    data_map[0, 0] = 1
+    assert np.array_equal(data.getTargetMap(3), etalon)
+
+    cube = data.getUCube(REGION_ID, 0, 4)
+    etalon = cube.copy()
+    cube[:] = 0
+    assert np.array_equal(data.getUCube(REGION_ID, 0, 4), etalon)
+
+    assert data.getCacheStats().hits == 6
+
+    data.close()
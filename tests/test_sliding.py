@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.data_loading import DataLoader
+from src.data_processing import BalanceCalculator
+from src.sliding import SlidingEvaluator
+from src.reg_static import StaticMaker
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(57, 63, 132, 138)
+TARGET_VARIABLE_NAME = "20220601_mean"
+CHUNK_SIZE = 5
+
+# ------------------------------
+
+
+def calcEtalon(lattice: list[list[Region]], data: DataLoader) -> np.ndarray:
+    """Рассчитывает балансы решетки по таблицам накопленных сумм"""
+    return BalanceCalculator().calcRegionBalances(sum(lattice, []), data, CHUNK_SIZE).balance
+
+
+def test_SlidingEvaluator(data_path) -> None:
+    """
+    Тестирование метода SlidingEvaluator.calcRegionBalances()
+
+    Балансы, рассчитанные сдвигом окна на одну ячейку, должны совпадать с балансами
+    BalanceCalculator.calcRegionBalances()
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(19))
+
+    lattice = StaticMaker.calcShiftedRegions(REGION)
+    balances = SlidingEvaluator().calcRegionBalances(lattice, data, CHUNK_SIZE)
+
+    assert np.allclose(balances.balance, calcEtalon(lattice, data), rtol=1e-7)
+
+    data.close()
+
+
+def test_SlidingEvaluator_fallback(data_path) -> None:
+    """
+    Тестирование метода SlidingEvaluator.calcRegionBalances()
+
+    Если после привязки к сетке соседние регионы отличаются не на одну ячейку (шаг  не
+    кратен шагу сетки, разные размеры регионов в ряду), окна рассчитываются заново,  и
+    балансы тоже должны совпадать
+    """
+    data = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(19))
+
+    shifts = np.arange(-4, 5) * 0.3
+    lattice = [
+        [REGION.addCoords(lat_shift, lon_shift) for lon_shift in shifts]
+        for lat_shift in shifts
+    ]
+    # регион другого размера в середине ряда
+    lattice[2][4] = Region(58, 61.5, 131, 136)
+
+    balances = SlidingEvaluator().calcRegionBalances(lattice, data, CHUNK_SIZE)
+
+    assert np.allclose(balances.balance, calcEtalon(lattice, data), rtol=1e-7)
+
+    data.close()
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.store import MemmapStore, materialize
+from src.containers import Region
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TARGET_VARIABLE_NAME = "20220601_mean"
+
+# ------------------------------
+
+
+def test_materialize(data_path, tmp_path) -> None:
+    """
+    Тестирование функции materialize() и чтения хранилища через DataLoader
+
+    Значения, время, сетка и баланс, прочитанные из хранилища, должны совпадать  с
+    прочитанными из файла NetCDF
+    """
+    store_path = str(tmp_path / "store")
+    materialize(data_path, store_path, [TARGET_VARIABLE_NAME, "U", "V"], chunk_size=5)
+
+    assert MemmapStore.isStore(store_path)
+
+    etalon = DataLoader(data_path, TARGET_VARIABLE_NAME)
+    data = DataLoader(store_path, TARGET_VARIABLE_NAME)
+
+    assert isinstance(data._db, MemmapStore)
+    assert np.array_equal(data.time_axis, etalon.time_axis)
+    assert np.array_equal(data.getGrid().lat, etalon.getGrid().lat)
+    assert np.array_equal(data.getGrid().lon, etalon.getGrid().lon)
+
+    regdata = RegionProcessor(REGION, data.getGrid()).getRegionData()
+    for name in (TARGET_VARIABLE_NAME, "U", "V"):
+        assert np.array_equal(data.getCube(name, regdata.id, 3, 17), etalon.getCube(name, regdata.id, 3, 17))
+
+    assert np.array_equal(data.getTargetMap(7), etalon.getTargetMap(7))
+
+    for loader in (data, etalon):
+        loader.setDateRange(loader.getDatetimeById(2), loader.getDatetimeById(20))
+
+    bal_calc = BalanceCalculator()
+    balance = bal_calc.getBalanceSeries(BalanceData(reg_data=regdata, data=data))
+    etalon_balance = bal_calc.getBalanceSeries(BalanceData(reg_data=regdata, data=etalon))
+    # порядок хранения в памяти другой, поэтому суммы совпадают с точностью до округления
+    assert np.allclose(balance, etalon_balance, rtol=1e-9)
+
+    etalon.close()
+    data.close()
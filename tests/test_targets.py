@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.data_loading import DataLoader, BalanceData
+from src.data_processing import BalanceCalculator, RegionProcessor
+from src.containers import Region, BorderSeries
+
+
+# ---------- SETTINGS ----------
+
+REGIONS = [Region(55, 65, 130, 140), Region(56.5, 63, 131.25, 138)]
+TARGET_NAMES = ["20220601_mean", "other_mean"]
+CHUNK_SIZE = 5
+
+# ------------------------------
+
+
+def test_getTargetsBalanceSeries(data_path) -> None:
+    """
+    Тестирование метода BalanceCalculator.getTargetsBalanceSeries()
+
+    Баланс каждой переменной должен совпадать с балансом, рассчитанным  DataLoader  с
+    одной этой переменной
+    """
+    data = DataLoader(data_path, TARGET_NAMES)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(20))
+    regdata = RegionProcessor(REGIONS[0], data.getGrid()).getRegionData()
+
+    bal_calc = BalanceCalculator()
+    balances = bal_calc.getTargetsBalanceSeries(BalanceData(reg_data=regdata, data=data))
+    assert balances.shape == (len(TARGET_NAMES), data.date_range.timesize)
+
+    for target_id, name in enumerate(TARGET_NAMES):
+        single = DataLoader(data_path, name)
+        single.setDateRange(data.date_range.start, data.date_range.end)
+
+        etalon_balance = bal_calc.getBalanceSeries(BalanceData(reg_data=regdata, data=single))
+        assert np.array_equal(balances[target_id], etalon_balance)
+        single.close()
+
+    data.close()
+
+
+def test_calcRegionTargetsBalances(data_path) -> None:
+    """
+    Тестирование метода BalanceCalculator.calcRegionTargetsBalances()
+
+    Балансы каждой переменной должны совпадать с BalanceCalculator.calcRegionBalances()
+    для DataLoader с одной этой переменной
+    """
+    data = DataLoader(data_path, TARGET_NAMES)
+    data.setDateRange(data.getDatetimeById(1), data.getDatetimeById(20))
+
+    bal_calc = BalanceCalculator()
+    balances = bal_calc.calcRegionTargetsBalances(REGIONS, data, CHUNK_SIZE)
+    assert balances.balance.shape == (len(TARGET_NAMES), len(REGIONS), data.date_range.timesize)
+
+    for name in TARGET_NAMES:
+        single = DataLoader(data_path, name)
+        single.setDateRange(data.date_range.start, data.date_range.end)
+
+        etalon = bal_calc.calcRegionBalances(REGIONS, single, CHUNK_SIZE)
+        assert np.array_equal(balances.getTargetBalances(name).balance, etalon.balance)
+        single.close()
+
+    data.close()
+
+
+def test_getBorderSeries_out(data_path) -> None:
+    """Буферы, не соответствующие количеству переменных, не принимаются"""
+    data = DataLoader(data_path, TARGET_NAMES)
+    region_id = RegionProcessor(REGIONS[0], data.getGrid()).getRegionData().id
+    height, width = region_id.down - region_id.up + 1, region_id.right - region_id.left + 1
+
+    out = BorderSeries.empty((10,), height, width)
+    with pytest.raises(ValueError):
+        data.getBorderSeries(region_id, 0, 9, out=out, target_names=TARGET_NAMES)
+
+    out.conc = np.empty((len(TARGET_NAMES), *out.flow.shape))
+    border = data.getBorderSeries(region_id, 0, 9, out=out, target_names=TARGET_NAMES)
+    with pytest.raises(ValueError):
+        data.getBorderSeries(region_id, 0, 9, out=out)
+
+    etalon = data.getBorderSeries(region_id, 0, 9, target_names=TARGET_NAMES)
+    assert np.array_equal(border.conc, etalon.conc)
+    assert np.array_equal(border.flow, etalon.flow)
+
+    data.close()
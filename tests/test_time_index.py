@@ -0,0 +1,52 @@
+import numpy as np
+
+from src.time_index import TimeIndex
+
+
+# ---------- SETTINGS ----------
+
+TIMESIZE = 48
+START = np.datetime64("2022-07-01T00", "s")
+STEP = np.timedelta64(3, "h")
+
+# ------------------------------
+
+
+def test_TimeIndex() -> None:
+    """Суммы за окна по накопленным суммам совпадают с прямым суммированием"""
+    rng = np.random.default_rng(0)
+
+    time = START + STEP * np.arange(TIMESIZE)
+    sums = rng.random(TIMESIZE + 1) * 1e7
+    income_steps = rng.random(TIMESIZE) * 1e5
+    outcome_steps = rng.random(TIMESIZE) * 1e5
+
+    index = TimeIndex(
+        time,
+        sums,
+        np.concatenate(([0], np.cumsum(income_steps))),
+        np.concatenate(([0], np.cumsum(outcome_steps))),
+    )
+    balance = np.diff(sums) - (income_steps - outcome_steps)
+
+    start_ids = rng.integers(0, TIMESIZE, 20)
+    end_ids = np.array([rng.integers(start_id, TIMESIZE) for start_id in start_ids])
+
+    windows = index.calcWindowsByIds(start_ids, end_ids)
+    expected = [balance[start_id : end_id + 1].sum() for start_id, end_id in zip(start_ids, end_ids)]
+    assert np.allclose(windows.balance, expected)
+
+    # окна по времени, в том числе между значениями оси времени
+    windows = index.calcWindows([(time[2], time[9]), (time[2] + STEP / 2, time[9] + STEP / 3)])
+    assert np.allclose(windows.balance, balance[2:10].sum())
+    assert np.allclose(windows.income, income_steps[2:10].sum())
+
+
+def test_TimeIndex_getTimeIds() -> None:
+    """Ближайшие времена ищутся так же, как в DataLoader: при равенстве выбирается более раннее"""
+    time = START + STEP * np.arange(TIMESIZE)
+    zeros = np.zeros(TIMESIZE + 1)
+    index = TimeIndex(time, zeros, zeros, zeros)
+
+    times = [time[0] - STEP, time[4] + STEP / 2, time[4] + STEP * 2 / 3, time[-1] + STEP]
+    assert index.getTimeIds(times).tolist() == [0, 4, 5, TIMESIZE - 1]
@@ -0,0 +1,116 @@
+import numpy as np
+
+from src.tools import Mode
+from src.data_processing import BalanceCalculator, ConvCalculator, RegionProcessor
+from src.containers import Region, ConvConc, ConvFlow, ConvOriginalDayData, BorderSeries
+
+
+# ---------- SETTINGS ----------
+
+REGION = Region(55, 65, 130, 140)
+TIMESIZE = 12
+SECONDS = 3 * 60 * 60
+
+# ------------------------------
+
+
+def makeData(regdata, seed: int = 0) -> tuple:
+    """Генерирует случайные данные в ограничивающем прямоугольнике региона"""
+    rng = np.random.default_rng(seed)
+    height, width = regdata.cellareas.shape
+
+    cube = rng.random((TIMESIZE + 1, height, width)) * 1e-3
+    umap = rng.normal(size=(TIMESIZE, height, width)) * 5
+    vmap = rng.normal(size=(TIMESIZE, height, width)) * 5
+
+    conc = ConvConc(right=cube[:-1, :, -1], left=cube[:-1, :, 0], down=cube[:-1, -1, :], up=cube[:-1, 0, :])
+    flow = ConvFlow(right=umap[:, :, -1], left=umap[:, :, 0], down=vmap[:, -1, :], up=vmap[:, 0, :])
+
+    return cube, ConvOriginalDayData(conc=conc, flow=flow)
+
+
+def calcConvByLoop(conc: ConvConc, flow: ConvFlow, cell) -> float:
+    """
+    Рассчитывает внос минус вынос вещества за одну единицу времени по исходным формулам
+    (выбор потоков через np.argwhere), независимо от ConvCalculator
+    """
+    right = conc.right * flow.right * cell.right
+    left = conc.left * flow.left * cell.left
+    down = conc.down * flow.down * cell.down
+    up = conc.up * flow.up * cell.up
+
+    income = (
+        right[np.argwhere(right < 0)].sum() * -1
+        + left[np.argwhere(left > 0)].sum()
+        + down[np.argwhere(down > 0)].sum()
+        + up[np.argwhere(up < 0)].sum() * -1
+    )
+    outcome = (
+        right[np.argwhere(right >= 0)].sum()
+        + left[np.argwhere(left <= 0)].sum() * -1
+        + down[np.argwhere(down <= 0)].sum() * -1
+        + up[np.argwhere(up >= 0)].sum()
+    )
+
+    return float(income - outcome) * SECONDS
+
+
+def calcBalanceByLoop(cube, convdata, regdata) -> np.ndarray:
+    """Рассчитывает баланс по одной единице времени, как это делалось изначально"""
+    conc, flow = convdata.conc, convdata.flow
+
+    balance = np.zeros(TIMESIZE)
+    for day_id in range(TIMESIZE):
+        day_conc = ConvConc(conc.right[day_id], conc.left[day_id], conc.down[day_id], conc.up[day_id])
+        day_flow = ConvFlow(flow.right[day_id], flow.left[day_id], flow.down[day_id], flow.up[day_id])
+
+        diff_sum = (cube[day_id + 1] * regdata.cellareas).sum() - (cube[day_id] * regdata.cellareas).sum()
+        balance[day_id] = diff_sum - calcConvByLoop(day_conc, day_flow, regdata.cell)
+
+    return balance
+
+
+def test_calcBalanceFromArrays() -> None:
+    """
+    Тестирование метода BalanceCalculator.calcBalanceFromArrays()
+
+    Векторизованный расчет должен совпадать с расчетом по одной единице времени
+    """
+    regdata = RegionProcessor(REGION).getRegionData()
+    cube, convdata = makeData(regdata)
+
+    calculated_balance = BalanceCalculator().calcBalanceFromArrays(cube, convdata, regdata, SECONDS)
+    etalon_balance = calcBalanceByLoop(cube, convdata, regdata)
+
+    assert calculated_balance.shape == (TIMESIZE,), "Ряд должен быть одномерным"
+    assert np.allclose(calculated_balance, etalon_balance), "Ряды должны совпадать"
+
+
+def test_calcIncomeOutcomeBatch() -> None:
+    """
+    Тестирование метода ConvCalculator.calcIncomeOutcomeBatch()
+
+    Расчет по буферам нескольких регионов должен совпадать с расчетом по границам каждого
+    региона
+    """
+    regions = [REGION.addCoords(lat_shift, 0) for lat_shift in (-10, 0, 10)]
+    regions_data = [RegionProcessor(region).getRegionData() for region in regions]
+
+    convdatas = [makeData(regdata, seed)[1] for seed, regdata in enumerate(regions_data)]
+    borders = [BorderSeries.fromConvData(convdata) for convdata in convdatas]
+
+    batch = BorderSeries.empty((len(regions), TIMESIZE), borders[0].height, borders[0].width)
+    for region_id, border in enumerate(borders):
+        batch.conc[region_id], batch.flow[region_id] = border.conc, border.flow
+
+    cells = [regdata.cell for regdata in regions_data]
+    income, outcome = ConvCalculator.calcIncomeOutcomeBatch(batch, cells, SECONDS)
+
+    for region_id, (convdata, regdata) in enumerate(zip(convdatas, regions_data)):
+        etalon_income, etalon_outcome = ConvCalculator().calcConvSeries(convdata, regdata, SECONDS, Mode.SEP)
+        assert np.allclose(income[region_id], etalon_income), "Приходы должны совпадать"
+        assert np.allclose(outcome[region_id], etalon_outcome), "Уходы должны совпадать"
+
+        # представление одной единицы времени
+        day_data = batch.getConvData(region_id, 5)
+        assert np.array_equal(day_data.conc.down, convdata.conc.down[5])